@@ -0,0 +1,500 @@
+"""
+Local stand-in for the Microsoft Graph drive and workbook endpoints used by utils/.
+
+Only what the app calls is implemented: path-addressed items and content, folder creation,
+the copy action with a monitor URL, upload sessions, PDF conversion, delta, $batch and the
+JobTable workbook calls. Files live in memory; the tracker workbook is kept as a DataFrame
+and only written to .xlsx bytes when its content is downloaded.
+"""
+import io
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import pandas as pd
+
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class DriveItem:
+    def __init__(self, item_id, path, folder=False, content=b"", parent_id=None):
+        self.id = item_id
+        self.path = path
+        self.folder = folder
+        self.parent_id = parent_id
+        self.version = 0
+        self.seq = 0
+        self.table = None  # DataFrame of a workbook's JobTable
+        self._content = content
+
+    @property
+    def name(self):
+        return self.path.rsplit("/", 1)[-1] if self.path else "root"
+
+    @property
+    def content(self) -> bytes:
+        if self.table is not None and self._content is None:
+            buffer = io.BytesIO()
+            self.table.to_excel(buffer, index=False, sheet_name="Sheet1")
+            self._content = buffer.getvalue()
+        return self._content
+
+    def set_content(self, content: bytes):
+        self._content = content
+        self.table = None
+
+    def touch(self, seq):
+        self.version += 1
+        self.seq = seq
+        if self.table is not None:
+            self._content = None  # Re-serialized on the next download
+
+    def metadata(self, base_url) -> dict:
+        data = {
+            "id": self.id,
+            "name": self.name,
+            "eTag": f'"{{{self.id}}},{self.version}"',
+            "cTag": f'"c:{{{self.id}}},{self.version}"',
+            "parentReference": {"id": self.parent_id},
+        }
+        if self.folder:
+            data["folder"] = {"childCount": 0}
+        else:
+            data["file"] = {}
+            data["size"] = len(self.content)
+            data["@microsoft.graph.downloadUrl"] = f"{base_url}/_download/{self.id}"
+        return data
+
+
+class MockDrive:
+    """
+    In-memory drive with request counters, configurable latency and throttling.
+
+    Parameters:
+    - latency: seconds added to every request
+    - jitter: random extra latency, up to this many seconds
+    - throttle_every: answer every Nth request or $batch sub-request with 429 + Retry-After (0 disables)
+    - retry_after: Retry-After seconds sent with 429 responses
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, throttle_every=0, retry_after=0.05):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.base_url = ""
+
+        self.lock = threading.RLock()
+        self.items = {"": DriveItem("ROOT", "", folder=True)}
+        self.by_id = {"ROOT": self.items[""]}
+        self.deleted = []              # [(seq, item id)]
+        self.seq = 0
+        self._ids = itertools.count(1)
+        self._monitors = {}
+        self._uploads = {}
+        self._sessions = itertools.count(1)
+
+        self.counts = Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._requests = 0
+
+    # --- Seeding ---
+
+    def _next_seq(self):
+        self.seq += 1
+        return self.seq
+
+    def _key(self, path):
+        return path.strip("/").lower()
+
+    def get(self, path):
+        return self.items.get(self._key(path))
+
+    def mkdirs(self, path):
+        with self.lock:
+            parts = path.strip("/").split("/")
+            for i in range(1, len(parts) + 1):
+                sub = "/".join(parts[:i])
+                if self._key(sub) not in self.items:
+                    parent = self.items[self._key("/".join(parts[:i - 1]))]
+                    self._add(DriveItem(f"ITEM{next(self._ids)}", sub, folder=True, parent_id=parent.id))
+            return self.get(path)
+
+    def put_file(self, path, content: bytes):
+        with self.lock:
+            item = self.get(path)
+            if item is None:
+                parent = self.mkdirs(path.rsplit("/", 1)[0]) if "/" in path.strip("/") else self.items[""]
+                item = self._add(DriveItem(f"ITEM{next(self._ids)}", path.strip("/"), content=content, parent_id=parent.id))
+            else:
+                item.set_content(content)
+            item.touch(self._next_seq())
+            self._touch_parents(item)
+            return item
+
+    def put_table(self, path, df: pd.DataFrame):
+        item = self.put_file(path, None)
+        item.table = df.reset_index(drop=True)
+        item.touch(item.seq)
+        return item
+
+    def _add(self, item):
+        self.items[self._key(item.path)] = item
+        self.by_id[item.id] = item
+        item.seq = self._next_seq()
+        return item
+
+    def _touch_parents(self, item):
+        parent = self.by_id.get(item.parent_id)
+        while parent is not None and parent.id != "ROOT":
+            parent.touch(self._next_seq())
+            parent = self.by_id.get(parent.parent_id)
+
+    def reset_counters(self):
+        with self.lock:
+            self.counts.clear()
+            self.bytes_in = self.bytes_out = 0
+
+    @property
+    def round_trips(self):
+        return sum(self.counts.values())
+
+
+class MockGraphHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    drive: MockDrive = None
+
+    def log_message(self, *args):
+        pass
+
+    # --- Plumbing ---
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status, body=None, headers=None):
+        if isinstance(body, (dict, list)):
+            payload = json.dumps(body).encode("utf-8")
+            content_type = "application/json"
+        else:
+            payload = body or b""
+            content_type = "application/octet-stream"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        self.drive.bytes_out += len(payload)
+
+    def _handle(self, method):
+        drive = self.drive
+        body = self._body()
+        with drive.lock:
+            drive._requests += 1
+            throttled = drive.throttle_every and drive._requests % drive.throttle_every == 0
+            drive.counts[f"{method} {_route_name(self.path)}"] += 1
+            drive.bytes_in += len(body)
+
+        delay = drive.latency + (random.uniform(0, drive.jitter) if drive.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if throttled:
+            return self._send(429, {"error": {"code": "activityLimitReached"}}, {"Retry-After": str(drive.retry_after)})
+
+        status, payload, headers = dispatch(drive, method, self.path, dict(self.headers), body)
+        self._send(status, payload, headers)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+def _route_name(raw_path):
+    """
+    Groups request paths for the round-trip counters, e.g. "drive:/content" or "$batch".
+    """
+    path = urlsplit(raw_path).path
+    if "/_download/" in path:
+        return "downloadUrl"
+    if "/_upload/" in path:
+        return "uploadUrl"
+    if "/_monitor/" in path:
+        return "monitor"
+    if path.endswith("$batch"):
+        return "$batch"
+    match = re.search(r"root:/.*?(:(/.*))?$", unquote(path))
+    if match:
+        suffix = match.group(2) or ""
+        if suffix.startswith("/workbook"):
+            return "workbook" + re.sub(r"\('.*?'\)|\(address=.*?\)", "", suffix[len("/workbook"):])
+        return f"drive:{suffix or 'item'}"
+    return path
+
+
+# --- Routing ---
+
+def dispatch(drive: MockDrive, method, raw_path, headers, body):
+    parts = urlsplit(raw_path)
+    path = unquote(parts.path)
+    query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+    if path.endswith("/$batch"):
+        return handle_batch(drive, json.loads(body or b"{}"))
+    if "/_download/" in path:
+        item = drive.by_id.get(path.rsplit("/", 1)[-1])
+        return (200, item.content, {}) if item else (404, {"error": {"code": "itemNotFound"}}, {})
+    if "/_monitor/" in path:
+        return 303, b"", {"Location": drive.base_url + "/me/drive/items/" + drive._monitors.get(path.rsplit("/", 1)[-1], "")}
+    if "/_upload/" in path:
+        return handle_upload_chunk(drive, method, path.rsplit("/", 1)[-1], headers, body)
+
+    match = re.search(r"/me/drive/root:/(.*?)(?::(/.*))?$", path)
+    if not match:
+        if path.rstrip("/").endswith("/me/drive/root/children") and method == "POST":
+            return create_child(drive, "", json.loads(body))
+        return 404, {"error": {"code": "itemNotFound", "message": path}}, {}
+
+    item_path = match.group(1).rstrip(":")
+    suffix = match.group(2) or ""
+
+    with drive.lock:
+        if suffix.startswith("/workbook"):
+            return handle_workbook(drive, method, item_path, suffix[len("/workbook"):], headers, body)
+        if suffix == "/delta":
+            return handle_delta(drive, item_path, query)
+        if suffix == "/content" and method == "PUT":
+            return put_content(drive, item_path, headers, body)
+        if suffix == "/children" and method == "POST":
+            return create_child(drive, item_path, json.loads(body))
+        if suffix == "/copy" and method == "POST":
+            return copy_item(drive, item_path, json.loads(body))
+        if suffix == "/createUploadSession" and method == "POST":
+            return create_upload_session(drive, item_path)
+
+        item = drive.get(item_path)
+        if item is None:
+            return 404, {"error": {"code": "itemNotFound", "message": item_path}}, {}
+        if suffix == "/content" and method == "GET":
+            if query.get("format") == "pdf":
+                return 200, b"%PDF-1.4\n% mock conversion\n" + item.content[:1024], {}
+            return 200, item.content, {}
+        if not suffix and method == "GET":
+            return 200, item.metadata(drive.base_url), {}
+        if not suffix and method == "DELETE":
+            del drive.items[drive._key(item.path)]
+            drive.deleted.append((drive._next_seq(), item.id))
+            return 204, b"", {}
+    return 405, {"error": {"code": "notSupported", "message": f"{method} {suffix}"}}, {}
+
+
+def put_content(drive, item_path, headers, body):
+    item = drive.get(item_path)
+    if_match = headers.get("If-Match")
+    if if_match and (item is None or item.metadata(drive.base_url)["eTag"] != if_match):
+        return 412, {"error": {"code": "resourceModified"}}, {}
+    created = item is None
+    item = drive.put_file(item_path, body)
+    return (201 if created else 200), item.metadata(drive.base_url), {}
+
+
+def create_child(drive, parent_path, payload):
+    if parent_path and drive.get(parent_path) is None:
+        return 404, {"error": {"code": "itemNotFound"}}, {}
+    child_path = f"{parent_path}/{payload['name']}".strip("/")
+    if drive.get(child_path) is not None:
+        return 409, {"error": {"code": "nameAlreadyExists"}}, {}
+    item = drive.mkdirs(child_path)
+    return 201, item.metadata(drive.base_url), {}
+
+
+def copy_item(drive, item_path, payload):
+    source = drive.get(item_path)
+    if source is None:
+        return 404, {"error": {"code": "itemNotFound"}}, {}
+    target_folder = payload["parentReference"]["path"].split("root:", 1)[-1].strip("/")
+    target_path = f"{target_folder}/{payload.get('name', source.name)}"
+    if drive.get(target_path) is not None:
+        return 409, {"error": {"code": "nameAlreadyExists"}}, {}
+    copy = drive.put_file(target_path, source.content)
+    monitor_id = str(len(drive._monitors) + 1)
+    drive._monitors[monitor_id] = copy.id
+    return 202, b"", {"Location": f"{drive.base_url}/_monitor/{monitor_id}"}
+
+
+def create_upload_session(drive, item_path):
+    session_id = str(next(drive._sessions))
+    drive._uploads[session_id] = {"path": item_path, "data": bytearray(), "received": 0}
+    return 200, {"uploadUrl": f"{drive.base_url}/_upload/{session_id}", "nextExpectedRanges": ["0-"]}, {}
+
+
+def handle_upload_chunk(drive, method, session_id, headers, body):
+    session = drive._uploads.get(session_id)
+    if session is None:
+        return 404, {"error": {"code": "itemNotFound"}}, {}
+    if method == "GET":
+        return 200, {"nextExpectedRanges": [f"{session['received']}-"]}, {}
+    if method == "DELETE":
+        drive._uploads.pop(session_id, None)
+        return 204, b"", {}
+
+    match = re.match(r"bytes (\d+)-(\d+)/(\d+)", headers.get("Content-Range", ""))
+    start, end, total = (int(value) for value in match.groups())
+    if start != session["received"]:
+        return 416, {"error": {"code": "invalidRange"}}, {}
+    session["data"] += body
+    session["received"] = end + 1
+    if session["received"] < total:
+        return 202, {"nextExpectedRanges": [f"{session['received']}-"]}, {}
+
+    with drive.lock:
+        item = drive.put_file(session["path"], bytes(session["data"]))
+    drive._uploads.pop(session_id, None)
+    return 201, item.metadata(drive.base_url), {}
+
+
+def handle_delta(drive, root_path, query):
+    root = drive.get(root_path)
+    if root is None:
+        return 404, {"error": {"code": "itemNotFound"}}, {}
+    since = int(query.get("token", 0))
+    prefix = drive._key(root.path)
+
+    changed = [
+        item.metadata(drive.base_url) for key, item in drive.items.items()
+        if (key == prefix or key.startswith(prefix + "/")) and item.seq > since
+    ]
+    changed += [{"id": item_id, "deleted": {"state": "deleted"}} for seq, item_id in drive.deleted if seq > since]
+    delta_link = f"{drive.base_url}/me/drive/root:/{root.path}:/delta?token={drive.seq}"
+    return 200, {"value": changed, "@odata.deltaLink": delta_link}, {}
+
+
+def handle_batch(drive, payload):
+    responses = []
+    for sub in payload.get("requests", []):
+        # Graph throttles each sub-request on its own, inside a 200 batch response
+        with drive.lock:
+            drive._requests += 1
+            throttled = drive.throttle_every and drive._requests % drive.throttle_every == 0
+        if throttled:
+            responses.append({
+                "id": sub["id"], "status": 429, "headers": {"Retry-After": str(drive.retry_after)},
+                "body": {"error": {"code": "activityLimitReached"}}
+            })
+            continue
+
+        body = json.dumps(sub["body"]).encode("utf-8") if "body" in sub else b""
+        with drive.lock:
+            status, result, headers = dispatch(drive, sub["method"], "/v1.0" + sub["url"], sub.get("headers", {}), body)
+        if isinstance(result, bytes):
+            result = None
+        responses.append({"id": sub["id"], "status": status, "headers": headers, "body": result})
+    return 200, {"responses": responses}, {}
+
+
+def handle_workbook(drive, method, item_path, workbook_path, headers, body):
+    item = drive.get(item_path)
+    if item is None or item.table is None:
+        return 404, {"error": {"code": "itemNotFound"}}, {}
+
+    if workbook_path == "/createSession":
+        return 201, {"id": f"session-{next(drive._sessions)}", "persistChanges": True}, {}
+    if workbook_path in ["/refreshSession", "/closeSession"]:
+        return 204, b"", {}
+
+    df = item.table
+    if workbook_path.endswith("/headerRowRange"):
+        last = _column_letter(len(df.columns))
+        return 200, {"address": f"Sheet1!A1:{last}1", "values": [list(df.columns)]}, {}
+
+    match = re.search(r"/columns\('(.*?)'\)/dataBodyRange$", workbook_path)
+    if match and method == "GET":
+        if match.group(1) not in df.columns:
+            return 404, {"error": {"code": "itemNotFound", "message": match.group(1)}}, {}
+        return 200, {"values": [[value] for value in df[match.group(1)].tolist()]}, {}
+
+    if workbook_path.endswith("/rows/add"):
+        values = json.loads(body)["values"]
+        item.table = pd.concat([df, pd.DataFrame(values, columns=df.columns)], ignore_index=True)
+        item.touch(drive._next_seq())
+        return 201, {"index": len(item.table) - 1, "values": values}, {}
+
+    match = re.search(r"range\(address='([A-Z]+)(\d+):([A-Z]+)(\d+)'\)", workbook_path)
+    if match and method == "PATCH":
+        values = json.loads(body)["values"][0]
+        first_col = _column_number(match.group(1)) - 1
+        row = int(match.group(2)) - 2  # Row 1 is the header
+        for offset, value in enumerate(values):
+            df.iat[row, first_col + offset] = value
+        item.touch(drive._next_seq())
+        return 200, {"address": f"Sheet1!{match.group(1)}{match.group(2)}"}, {}
+
+    return 405, {"error": {"code": "notSupported", "message": workbook_path}}, {}
+
+
+def _column_letter(number):
+    letters = ""
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def _column_number(letters):
+    number = 0
+    for ch in letters:
+        number = number * 26 + (ord(ch) - ord("A") + 1)
+    return number
+
+
+class MockGraphServer:
+    """
+    Runs a MockDrive behind a threaded HTTP server on localhost.
+
+    with MockGraphServer(latency=0.02) as server:
+        os.environ["GRAPH_BASE_URL"] = server.base_url
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, **drive_options):
+        self.drive = MockDrive(**drive_options)
+        handler = type("Handler", (MockGraphHandler,), {"drive": self.drive})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self.httpd.server_port}/v1.0"
+        self.drive.base_url = self.base_url
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
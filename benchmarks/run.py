@@ -0,0 +1,323 @@
+"""
+Offline benchmarks: times utils/ functions and the page scripts against the local mock Graph server.
+
+    python -m benchmarks.run                        # default sizes, compared with benchmarks/baseline.json
+    python -m benchmarks.run --sizes 1000,100000 --latency 0.03 --throttle-every 50
+    python -m benchmarks.run --only read_excel --repeat 10
+    python -m benchmarks.run --update-baseline      # store this run as the new baseline
+    python -m benchmarks.run --check                # exit 1 on regressions (for CI)
+
+Reports p50/p95 wall time, Graph round trips and peak Python memory (tracemalloc) per benchmark.
+"""
+import argparse
+import gc
+import io
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.mock_graph import MockGraphServer
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRACKER_PATH = "Jobs/JobTracker.xlsx"
+TOKEN = "bench-token"
+
+
+class Benchmark:
+    """
+    One timed operation. setup runs before every repetition and is not timed.
+    """
+
+    def __init__(self, name, fn, setup=None, repeat=None):
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.repeat = repeat
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * fraction
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def measure(benchmark: Benchmark, drive, repeat: int) -> dict:
+    repeat = benchmark.repeat or repeat
+    timings = []
+    round_trips = {}
+
+    for _ in range(repeat):
+        if benchmark.setup:
+            benchmark.setup()
+        gc.collect()
+        drive.reset_counters()
+        started = time.perf_counter()
+        benchmark.fn()
+        timings.append((time.perf_counter() - started) * 1000)
+        round_trips = dict(drive.counts)
+
+    # Memory is measured in a separate run, tracemalloc slows Python code down too much for timing
+    if benchmark.setup:
+        benchmark.setup()
+    gc.collect()
+    tracemalloc.start()
+    benchmark.fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": round(percentile(timings, 0.5), 2),
+        "p95_ms": round(percentile(timings, 0.95), 2),
+        "mean_ms": round(statistics.mean(timings), 2),
+        "runs": repeat,
+        "round_trips": sum(round_trips.values()),
+        "routes": dict(sorted(round_trips.items())),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def build_benchmarks(drive, sizes, cache_dir) -> list:
+    # Imported here: utils/ reads GRAPH_BASE_URL and the cache dir at import time
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+    from docxtpl import RichText
+    from benchmarks import seed
+    from utils.helpers import load_json_with_version, get_json_cache, get_template_target_folder_paths
+    from utils.onedrive import (
+        read_excel_from_onedrive, get_excel_cache, diff_tracker_rows, update_excel_rows, append_rows_to_excel_table,
+    )
+    from utils.provisioning import ensure_application_folder
+    from utils.template_cache import load_docx_template, get_template_cache
+    from utils.upload_session import upload_file
+    from utils.download_stream import download_to_spool
+    from utils.bullet_index import BulletIndex
+    from utils.tracker_filters import TrackerIndex
+    from utils.tracker_analytics import compute_tracker_analytics
+    from utils.drive_index import get_drive_index
+
+    def reset_local_state():
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def run_page(script, session_state=None):
+        app = AppTest.from_file(os.path.join(REPO_ROOT, script), default_timeout=300)
+        for key, value in (session_state or {}).items():
+            app.session_state[key] = value
+        app.run()
+        if app.exception:
+            raise Exception(f"❌ {script} raised: {app.exception[0].message}")
+        return app
+
+    benchmarks = []
+
+    # --- Tracker, per size ---
+    for rows in sizes:
+        def seed_tracker(rows=rows):
+            drive.put_table(TRACKER_PATH, seed.make_tracker(rows))
+
+        def read_tracker():
+            return read_excel_from_onedrive(TOKEN, TRACKER_PATH)
+
+        def cold_tracker(seed_tracker=seed_tracker):
+            reset_local_state()
+            seed_tracker()
+
+        benchmarks.append(Benchmark(f"read_excel[cold,{rows}]", read_tracker, setup=cold_tracker))
+        benchmarks.append(Benchmark(
+            f"read_excel[snapshot,{rows}]", read_tracker,
+            setup=lambda: get_excel_cache().invalidate(TRACKER_PATH, snapshots=False)  # Memory only, like a restart
+        ))
+        benchmarks.append(Benchmark(f"read_excel[warm,{rows}]", read_tracker))
+
+        def index_and_filter():
+            df = read_tracker()
+            index = TrackerIndex(df)
+            index.page(index.filter(["Applied", "In process"], seed.JOB_TYPES[:3], None, "company 1"), 0)
+
+        benchmarks.append(Benchmark(f"tracker_filters[{rows}]", index_and_filter))
+        benchmarks.append(Benchmark(f"tracker_analytics[{rows}]", lambda: compute_tracker_analytics(read_tracker())))
+
+        def save_edits():
+            df = read_tracker()
+            edited = df.head(50).copy()
+            for label in edited.index[::10]:
+                edited.at[label, "Status"] = "In process" if edited.at[label, "Status"] != "In process" else "Applied"
+            update_excel_rows(TOKEN, diff_tracker_rows(df, edited), TRACKER_PATH)
+
+        benchmarks.append(Benchmark(f"update_excel_rows[5 rows,{rows}]", save_edits))
+        benchmarks.append(Benchmark(
+            f"append_rows[10 rows,{rows}]",
+            lambda: append_rows_to_excel_table(TOKEN, [seed.sample_job(i) | {"Date": "2024-04-01"} for i in range(10)], TRACKER_PATH),
+            setup=seed_tracker
+        ))
+        benchmarks.append(Benchmark(f"page:tracker[{rows}]", lambda: run_page("pages/tracker.py"), setup=read_tracker, repeat=3))
+
+    # --- Application folders and documents ---
+    job_counter = iter(range(1, 1_000_000))
+    fresh_job = {}
+
+    def new_job():
+        fresh_job["job"] = seed.sample_job(next(job_counter))
+
+    def provision(job):
+        template_folder, target_folder, _ = get_template_target_folder_paths(job)
+        ensure_application_folder(TOKEN, template_folder, target_folder, seed.TEMPLATE_FILES)
+
+    benchmarks.append(Benchmark("provision[cold]", lambda: provision(fresh_job["job"]), setup=new_job))
+    benchmarks.append(Benchmark("provision[warm]", lambda: provision(seed.sample_job(0))))
+
+    bullets_path = "Jobs/templates/Bullet Bank/CV_WEBullets.json"
+    benchmarks.append(Benchmark(
+        "load_json_with_version[cold]", lambda: load_json_with_version(TOKEN, bullets_path),
+        setup=get_json_cache.clear
+    ))
+    benchmarks.append(Benchmark("load_json_with_version[warm]", lambda: load_json_with_version(TOKEN, bullets_path)))
+
+    bank = seed.make_bullet_bank(5000)
+    bullet_index = BulletIndex(bank)
+    benchmarks.append(Benchmark("bullet_index[build,5000]", lambda: BulletIndex(bank)))
+    benchmarks.append(Benchmark("bullet_index[search,5000]", lambda: [
+        bullet_index.page(bullet_index.search(query, category), 0) for query, category in
+        [("kube", "DevOps"), ("latncy", None), ("python api", "Backend"), ("", "Cloud")]
+    ]))
+
+    placeholders = seed.make_placeholders()
+    template_path = f"Jobs/templates/{seed.JOB_TYPES[0]}/nagarjuna_ravella_CV.docx"
+
+    def render_docx():
+        doc = load_docx_template(TOKEN, template_path)
+        doc.render({key: RichText(field["value"]) if key.startswith("Bullet") else field["value"]
+                    for key, field in placeholders.items()})
+        doc.save(io.BytesIO())
+
+    benchmarks.append(Benchmark("docx_render[cold]", render_docx, setup=get_template_cache.clear))
+    benchmarks.append(Benchmark("docx_render[warm]", render_docx))
+
+    payload = os.urandom(8 * 1024 * 1024)
+    benchmarks.append(Benchmark("upload_file[8MB]", lambda: upload_file(
+        TOKEN, "Jobs/bench/upload.bin", io.BytesIO(payload), "application/octet-stream"
+    )))
+    benchmarks.append(Benchmark("download_to_spool[8MB]", lambda: download_to_spool(TOKEN, "Jobs/bench/upload.bin").close()))
+
+    benchmarks.append(Benchmark("drive_index[incremental sync]", lambda: get_drive_index().sync(TOKEN)))
+
+    benchmarks.append(Benchmark(
+        "page:applications", lambda: run_page("pages/applications.py", {"selected_job": seed.sample_job(0)}), repeat=3
+    ))
+    return benchmarks
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Returns human-readable regressions: slower p50 beyond the tolerance, or more round trips.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["p50_ms"] > base["p50_ms"] * (1 + tolerance) and result["p50_ms"] - base["p50_ms"] > 1:
+            regressions.append(f"{name}: p50 {base['p50_ms']} -> {result['p50_ms']} ms")
+        if result["round_trips"] > base["round_trips"]:
+            regressions.append(f"{name}: round trips {base['round_trips']} -> {result['round_trips']}")
+    return regressions
+
+
+def print_report(results: dict, baseline: dict):
+    header = f"{'benchmark':<36} {'p50 ms':>10} {'p95 ms':>10} {'vs base':>8} {'trips':>6} {'peak KB':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        base = baseline.get(name)
+        delta = f"{(result['p50_ms'] / base['p50_ms'] - 1):+.0%}" if base and base["p50_ms"] else "new"
+        print(f"{name:<36} {result['p50_ms']:>10.1f} {result['p95_ms']:>10.1f} {delta:>8} "
+              f"{result['round_trips']:>6} {result['peak_kb']:>10.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks against a mock Graph server.")
+    parser.add_argument("--sizes", default="1000,10000", help="tracker sizes in rows, comma-separated")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--only", default="", help="run benchmarks whose name contains this text")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every mock request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency in seconds")
+    parser.add_argument("--throttle-every", type=int, default=0, help="answer every Nth request with 429")
+    parser.add_argument("--rate-limit", default="0", help="GRAPH_RATE_LIMIT for the client (0 disables the bucket)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown vs the baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 on regressions")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    server = MockGraphServer(latency=args.latency, jitter=args.jitter, throttle_every=args.throttle_every).start()
+    cache_dir = tempfile.mkdtemp(prefix="jobstreamlit-bench-")
+    os.environ["GRAPH_BASE_URL"] = server.base_url
+    os.environ["GRAPH_ACCESS_TOKEN"] = TOKEN
+    os.environ["GRAPH_RATE_LIMIT"] = args.rate_limit
+    os.environ["JOBSTREAMLIT_CACHE_DIR"] = cache_dir
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+    from benchmarks.seed import seed_drive
+    # Bare-mode utils calls (no script run context) make Streamlit warn on every cache access
+    import streamlit.logger
+    streamlit.logger.set_log_level(logging.ERROR)
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+
+    try:
+        seed_drive(server.drive, tracker_rows=sizes[0])
+        results = {}
+        for benchmark in build_benchmarks(server.drive, sizes, cache_dir):
+            if args.only and args.only not in benchmark.name:
+                continue
+            results[benchmark.name] = measure(benchmark, server.drive, args.repeat)
+            print(f"  {benchmark.name}: {results[benchmark.name]['p50_ms']} ms", file=sys.stderr)
+    finally:
+        server.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    print_report(results, baseline)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+
+    if args.update_baseline:
+        merged = {**baseline, **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": {"latency": args.latency, "sizes": args.sizes, "repeat": args.repeat},
+                       "results": merged}, f, indent=2)
+        print(f"\n✅ Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\n⚠️ Regressions against the baseline:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1 if args.check else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Synthetic data for the mock drive: trackers, template sets and bullet banks shaped like the real ones.
+"""
+import datetime
+import io
+import json
+import random
+
+import pandas as pd
+from docx import Document
+
+from utils.onedrive import TABLE_COLUMNS
+
+JOB_TYPES = ["Full Stack Developer", "Cloud Engineer", "DevOps Engineer", "Python Engineer", "Backend Engineer", "AI Engineer"]
+STATUSES = ["Preparation", "Applied", "In process", "Rejected"]
+CATEGORIES = ["Frontend", "Backend", "DevOps", "Cloud", "Metrics", "Database"]
+TEMPLATE_FILES = ["nagarjuna_ravella_CV.docx", "nagarjuna_ravella_coverletter.docx", "CV_template.json", "CL_template.json"]
+
+WORDS = (
+    "built deployed migrated automated designed scaled reduced improved monitored python kubernetes terraform "
+    "react fastapi postgres kafka pipelines latency costs reliability dashboards services microservices api "
+    "azure aws docker observability caching throughput onboarding tests coverage releases"
+).split()
+
+
+def make_tracker(rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = random.Random(seed)
+    start = datetime.date(2024, 1, 1)
+    return pd.DataFrame({
+        "ID": [f"{i:08x}" for i in range(rows)],
+        "Job Type": [rng.choice(JOB_TYPES) for _ in range(rows)],
+        "Date": [(start + datetime.timedelta(days=rng.randrange(365))).strftime("%Y-%m-%d") for _ in range(rows)],
+        "Company Name": [f"Company {rng.randrange(rows * 2)}" for _ in range(rows)],
+        "Url": [f"https://jobs.example.com/{i}" for i in range(rows)],
+        "Created Application folder": [rng.choice(["Yes", "No"]) for _ in range(rows)],
+        "Status": [rng.choice(STATUSES) for _ in range(rows)],
+    }, columns=TABLE_COLUMNS)
+
+
+def make_bullet(rng) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 16))).capitalize() + "."
+
+
+def make_bullet_bank(size: int, seed: int = 11) -> dict:
+    rng = random.Random(seed)
+    bank = {category: [] for category in CATEGORIES}
+    for _ in range(size):
+        bank[rng.choice(CATEGORIES)].append(make_bullet(rng))
+    return bank
+
+
+def make_placeholders(bullets: int = 6) -> dict:
+    placeholders = {
+        "Company": {"type": "text", "label": "Company", "value": "Example GmbH"},
+        "Role": {"type": "text", "label": "Role", "value": "Backend Engineer"},
+        "Date": {"type": "date", "label": "Date", "value": "2024-04-15"},
+    }
+    for i in range(1, bullets + 1):
+        placeholders[f"Bullet{i}"] = {"type": "bullets", "label": f"Bullet {i}", "value": f"**Impact** {i}: shipped things"}
+    return placeholders
+
+
+def make_docx(placeholders: dict, paragraphs: int = 40) -> bytes:
+    document = Document()
+    document.sections[0].header.paragraphs[0].text = "{{ Company }} - {{ Role }}"
+    document.add_heading("{{ Role }} application", level=1)
+    for key in placeholders:
+        if key.startswith("Bullet"):
+            document.add_paragraph("{{r " + key + " }}", style="List Bullet")
+        else:
+            document.add_paragraph("{{ " + key + " }}")
+    for i in range(paragraphs):
+        document.add_paragraph(f"Filler paragraph {i} with static text that is not templated. " * 3)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def seed_drive(drive, tracker_rows: int = 1000, bullet_bank_size: int = 500):
+    """
+    Fills a MockDrive with the Jobs/ layout the app expects.
+    """
+    drive.put_table("Jobs/JobTracker.xlsx", make_tracker(tracker_rows))
+
+    placeholders = make_placeholders()
+    docx = make_docx(placeholders)
+    for job_type in JOB_TYPES:
+        folder = f"Jobs/templates/{job_type}"
+        drive.put_file(f"{folder}/nagarjuna_ravella_CV.docx", docx)
+        drive.put_file(f"{folder}/nagarjuna_ravella_coverletter.docx", docx)
+        drive.put_file(f"{folder}/CV_template.json", json.dumps(placeholders).encode("utf-8"))
+        drive.put_file(f"{folder}/CL_template.json", json.dumps(placeholders).encode("utf-8"))
+
+    for name in ["CV_WEBullets.json", "CL_WEBullets.json"]:
+        drive.put_file(f"Jobs/templates/Bullet Bank/{name}", json.dumps(make_bullet_bank(bullet_bank_size)).encode("utf-8"))
+
+    drive.mkdirs("Jobs/applications")
+
+
+def sample_job(index: int = 0) -> dict:
+    return {
+        "ID": f"bench{index:04d}",
+        "Job Type": JOB_TYPES[index % len(JOB_TYPES)],
+        "Date": datetime.date(2024, 4, 1) + datetime.timedelta(days=index % 28),
+        "Company Name": f"Bench Company {index}",
+        "Url": f"https://jobs.example.com/bench/{index}",
+        "Created Application folder": "Yes",
+        "Status": "Applied",
+    }
@@ -1,21 +1,20 @@
 import streamlit as st
-from docxtpl import DocxTemplate
 from io import BytesIO
 from utils.auth import get_access_token
+from utils.tracing import render_trace_panel
 from utils.helpers import (
     get_template_target_folder_paths,
-    ensure_folder_exists,
-    copy_file_between_folders,
-    load_json_from_onedrive,
-    upload_json_to_onedrive,
-)
-from utils.dynamic_json_ui import render_dynamic_form
-from utils.doc_helpers import (
-    load_docx_from_onedrive,
-    upload_docx_to_onedrive,
-    download_docx_as_pdf,
-    parse_bullet_to_richtext
+    load_json_with_version,
 )
+from utils.bullet_index import get_bullet_index
+from utils.bullet_journal import get_bullet_journal, apply_pending_bullets
+from utils.provisioning import ensure_application_folder
+from utils.drive_index import list_folder
+from utils.dynamic_json_ui import render_dynamic_form, reset_form_state
+from utils.template_cache import load_docx_template
+from utils.render_manifest import load_render_manifest, queue_render_manifest, content_hash
+from utils.doc_helpers import parse_bullet_to_richtext, DOCX_CONTENT_TYPE
+from utils.write_queue import get_write_queue, render_write_status
 
 # --- Page config ---
 st.set_page_config(page_title="📝 Applications", layout="wide", initial_sidebar_state="collapsed")
@@ -37,6 +36,9 @@ file_names = [
 # --- Token ---
 get_access_token()
 
+# --- Replay writes left in the local journals (e.g. after a restart) ---
+get_bullet_journal()
+
 # --- Main logic ---
 if "selected_job" in st.session_state:
     job = st.session_state["selected_job"]
@@ -54,22 +56,29 @@ if "selected_job" in st.session_state:
         st.markdown(f"**Company**: {job['Company Name']}")
         st.markdown(f"**URL**: {job['Url']}")
         st.markdown(f"**Applied On**: {job['Date']}")
+        resync = st.button("🔄 Re-sync templates")
 
     if "token" in st.session_state:
         try:
             template_folder, target_folder, bank_folder = get_template_target_folder_paths(job)
-            ensure_folder_exists(st.session_state["token"], target_folder)
-
-            for file_name in file_names:
-                copy_file_between_folders(
-                    access_token=st.session_state["token"],
-                    file_name=file_name,
-                    source_path=template_folder,
-                    target_path=target_folder,
-                )
+            ensure_application_folder(
+                access_token=st.session_state["token"],
+                template_folder=template_folder,
+                target_folder=target_folder,
+                file_names=file_names,
+                force=resync,
+            )
 
             st.session_state["latest_notification"] = ("success", f"✅ Files copied to `{target_folder}`")
 
+            # Documents already generated for this job, answered by the local drive index
+            generated = sorted(
+                item["name"] for item in list_folder(st.session_state["token"], target_folder)
+                if item["name"].lower().endswith((".docx", ".pdf")) and item["name"] not in file_names
+            )
+            if generated:
+                st.sidebar.markdown("**📂 Generated**: " + ", ".join(f"`{name}`" for name in generated))
+
             # --- Document selection and placeholders editing ---
             col1, col2 = st.columns([4, 3])
 
@@ -97,18 +106,31 @@ if "selected_job" in st.session_state:
                 output_docx_filename = f"{job['Company Name']}_CL.docx"
                 output_pdf_filename = "Nagarjuna_Ravella_CoverLetter.pdf"
 
-            # Load placeholders JSON
+            # Load placeholders JSON (re-downloaded only when its eTag changes)
             json_path = f"{target_folder}/{template_json_filename}"
-            placeholders_dict = load_json_from_onedrive(st.session_state["token"], json_path)
+            placeholders_dict, _ = load_json_with_version(st.session_state["token"], json_path)
+
+            # A save still waiting in the write queue is newer than the OneDrive copy
+            queued_placeholders = get_write_queue().find("json", json_path)
+            if queued_placeholders is not None:
+                placeholders_dict = queued_placeholders
+
+            # Form widgets keep their values in session state, so clear them when switching documents
+            if st.session_state.get("form_source") != json_path:
+                reset_form_state(placeholders_dict)
+                st.session_state["form_source"] = json_path
 
             # Load Bullets Json
             bullets_json_path = f"{bank_folder}/{bullets_json_filename}"
-            bullets_dict = load_json_from_onedrive(st.session_state["token"], bullets_json_path)
+            bullets_dict, bullets_version = load_json_with_version(st.session_state["token"], bullets_json_path)
+            bullet_index = get_bullet_index(bullets_json_path, bullets_version, bullets_dict)
+            apply_pending_bullets(bullets_json_path, bullet_index)
 
-            # Render editable form
-            result = render_dynamic_form(placeholders_dict, bullets_dict, bullets_json_path)
+            # Render editable form (its fields and bullet editors rerun as fragments, without the code above)
+            result = render_dynamic_form(placeholders_dict, bullets_dict, bullets_json_path, bullet_index)
 
             # --- Button to Generate Final ---
+            force_rebuild = st.checkbox("Rebuild even if nothing changed", key="force_rebuild")
             if st.button(f"📄 Create Final {doc_type} and PDF"):
                 try:
                     # Update JSON values
@@ -116,17 +138,25 @@ if "selected_job" in st.session_state:
                         if key in placeholders_dict:
                             placeholders_dict[key]["value"] = result[key]
 
-                    upload_json_to_onedrive(
-                        access_token=st.session_state["token"],
-                        data=placeholders_dict,
-                        filepath=json_path
-                    )
+                    # Each artifact is only rebuilt when the hash of its inputs changed
+                    manifest = load_render_manifest(st.session_state["token"], target_folder)
+                    rebuilt = []
+
+                    # Uploads and the PDF conversion run in the background, in order, one lane per job folder
+                    write_queue = get_write_queue()
+
+                    json_hash = content_hash({key: field.get("value", "") for key, field in placeholders_dict.items()})
+                    if force_rebuild or manifest.get(json_path) != json_hash:
+                        write_queue.enqueue(
+                            "json", json_path, data=placeholders_dict,
+                            lane=target_folder, access_token=st.session_state["token"]
+                        )
+                        manifest[json_path] = json_hash
+                        rebuilt.append("JSON")
 
                     # Load Word template
                     template_docx_path = f"{target_folder}/{template_docx_filename}"
-                    docx_bytes = load_docx_from_onedrive(st.session_state["token"], template_docx_path)
-                    docx_buffer = BytesIO(docx_bytes.read())
-                    doc = DocxTemplate(docx_buffer)
+                    doc = load_docx_template(st.session_state["token"], template_docx_path)
 
                     # Replace placeholders
                     placeholder_mapping = {}
@@ -137,25 +167,47 @@ if "selected_job" in st.session_state:
                         else:
                             placeholder_mapping[key] = value
                     # placeholder_mapping = {key: field.get("value", "") for key, field in placeholders_dict.items()}
-                    doc.render(placeholder_mapping)
-
-                    # Save updated DOCX into memory
-                    final_docx_buffer = BytesIO()
-                    doc.save(final_docx_buffer)
-                    final_docx_buffer.seek(0)
 
-                    # Upload DOCX
                     final_docx_path = f"{target_folder}/{output_docx_filename}"
-                    upload_docx_to_onedrive(st.session_state["token"], final_docx_buffer, final_docx_path)
+                    docx_hash = content_hash(placeholder_mapping, doc.etag)
+                    if force_rebuild or manifest.get(final_docx_path) != docx_hash:
+                        doc.render(placeholder_mapping)
+
+                        # Save updated DOCX into memory
+                        final_docx_buffer = BytesIO()
+                        doc.save(final_docx_buffer)
+                        final_docx_buffer.seek(0)
+
+                        # Upload DOCX
+                        write_queue.enqueue_upload(
+                            final_docx_path, final_docx_buffer, DOCX_CONTENT_TYPE,
+                            lane=target_folder, access_token=st.session_state["token"]
+                        )
+                        manifest[final_docx_path] = docx_hash
+                        rebuilt.append("DOCX")
 
                     # Generate and upload PDF
                     final_pdf_path = f"{target_folder}/{output_pdf_filename}"
-                    download_docx_as_pdf(st.session_state["token"], final_docx_path, final_pdf_path)
-
-                    st.session_state["latest_notification"] = (
-                        "success",
-                        f"✅ Final {doc_type} (.docx) and PDF created successfully!",
-                    )
+                    pdf_hash = content_hash(docx_hash)
+                    if force_rebuild or manifest.get(final_pdf_path) != pdf_hash:
+                        write_queue.enqueue(
+                            "pdf", final_pdf_path, data={"source": final_docx_path},
+                            lane=target_folder, access_token=st.session_state["token"]
+                        )
+                        manifest[final_pdf_path] = pdf_hash
+                        rebuilt.append("PDF")
+
+                    if rebuilt:
+                        queue_render_manifest(target_folder, manifest, access_token=st.session_state["token"])
+                        st.session_state["latest_notification"] = (
+                            "success",
+                            f"📤 Final {doc_type} queued for saving. Rebuilt: {', '.join(rebuilt)}",
+                        )
+                    else:
+                        st.session_state["latest_notification"] = (
+                            "success",
+                            f"ℹ️ Final {doc_type} and PDF are already up to date.",
+                        )
 
                 except Exception as e:
                     st.session_state["latest_notification"] = (
@@ -188,3 +240,10 @@ with notification_box:
             st.error(message)
         elif notif_type == "warning":
             st.warning(message)
+
+# --- Background saves (polled, sidebar) ---
+with st.sidebar:
+    render_write_status()
+
+# --- Performance trace (opt-in, sidebar) ---
+render_trace_panel()
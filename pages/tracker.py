@@ -1,10 +1,28 @@
 import streamlit as st
-from utils.onedrive import read_excel_from_onedrive, append_row_to_excel_table, overwrite_excel_file
+from utils.onedrive import (
+    read_excel_from_onedrive,
+    append_row_to_excel_table,
+    append_rows_to_excel_table,
+    diff_tracker_rows,
+    rebase_tracker_edits,
+    queue_excel_row_updates,
+    apply_queued_row_updates,
+)
+from utils.bulk_import import parse_bulk_jobs
+from utils.tracker_analytics import render_tracker_dashboard
+from utils.tracker_filters import TrackerIndex, get_tracker_index, PAGE_SIZE
 from utils.auth import get_access_token
+from utils.tracing import render_trace_panel
+from utils.write_queue import render_write_status
 import pandas as pd
 import datetime
 import uuid
 
+JOB_TYPES = [
+    "Full Stack Developer", "Cloud Engineer", "DevOps Engineer",
+    "Python Engineer", "Backend Engineer", "AI Engineer"
+]
+STATUS_OPTIONS = ["Preparation", "Applied", "In process", "Rejected"]
 
 
 st.set_page_config(page_title="📊 Tracker", layout="wide")
@@ -22,30 +40,103 @@ if "token" in st.session_state:
             filepath="Jobs/JobTracker.xlsx"
         )
 
-        display_df = df.drop(columns=["ID"])
-        display_df.insert(0, "Open", False)
+        tracker_version = df.attrs.get("version")
+        if tracker_version:
+            tracker_index = get_tracker_index("Jobs/JobTracker.xlsx", tracker_version, df)
+        else:
+            tracker_index = TrackerIndex(df)
+
+        # Saved edits that are still on their way to OneDrive
+        apply_queued_row_updates(df, "Jobs/JobTracker.xlsx")
+
+        # Unsaved edits survive paging and filtering: {row position: {column: value}}
+        # A new tracker version (e.g. a background save landed) moves them to their rows' new positions
+        if st.session_state.get("tracker_edits_version") != tracker_version:
+            rebased, missing = rebase_tracker_edits(
+                st.session_state.get("tracker_edits", {}), st.session_state.get("tracker_edit_ids", {}), df
+            )
+            if missing:
+                st.warning(f"⚠️ {missing} unsaved row edit(s) were dropped: those rows are no longer in the tracker.")
+            st.session_state["tracker_edits"] = rebased
+            st.session_state["tracker_edits_version"] = tracker_version
+        pending_edits = st.session_state["tracker_edits"]
+
+        with st.expander("📈 Analytics", expanded=True):
+            render_tracker_dashboard(df)
 
         st.subheader("📄 Job List")
 
+        # --- Filters ---
+        col1, col2, col3, col4 = st.columns([2, 2, 2, 2])
+        with col1:
+            status_filter = st.multiselect("Status", tracker_index.statuses, key="filter_status")
+        with col2:
+            job_type_filter = st.multiselect("Job Type", tracker_index.job_types, key="filter_job_type")
+        with col3:
+            if tracker_index.min_date:
+                date_filter = st.date_input(
+                    "Date range",
+                    value=(tracker_index.min_date, tracker_index.max_date),
+                    key="filter_dates"
+                )
+            else:
+                date_filter = None
+        with col4:
+            company_filter = st.text_input("Company", placeholder="🔍 Search...", key="filter_company")
+
+        date_range = tuple(date_filter) if isinstance(date_filter, (list, tuple)) and len(date_filter) == 2 else None
+        matches = tracker_index.filter(status_filter, job_type_filter, date_range, company_filter)
+
+        # Back to the first page whenever the filters change
+        filter_signature = (tuple(status_filter), tuple(job_type_filter), date_range, company_filter)
+        if st.session_state.get("tracker_last_filters") != filter_signature:
+            st.session_state["tracker_last_filters"] = filter_signature
+            st.session_state["tracker_page"] = 1
+
+        pages = max(1, -(-len(matches) // PAGE_SIZE))
+        if st.session_state.get("tracker_page", 1) > pages:
+            st.session_state["tracker_page"] = pages
+        col1, col2 = st.columns([1, 5])
+        with col1:
+            page = st.number_input("Page", min_value=1, max_value=pages, step=1, key="tracker_page")
+        with col2:
+            st.caption(f"{len(matches)} of {len(df)} job(s) · page {min(page, pages)} of {pages}")
+
+        # Only the visible slice is sent to the browser; its index labels are the stable row ids
+        visible_labels, _ = tracker_index.page(matches, page - 1)
+        display_df = df.loc[visible_labels].drop(columns=["ID"])
+        for label in visible_labels:
+            for col, value in pending_edits.get(df.index.get_loc(label), {}).items():
+                display_df.at[label, col] = value
+        display_df.insert(0, "Open", False)
+
         edited_df = st.data_editor(
             display_df,
             num_rows="fixed",
             use_container_width=True,
+            hide_index=True,
             column_config={
                 "Open": st.column_config.CheckboxColumn("▶️", help="Go to Application"),
                 "Company Name": st.column_config.TextColumn(),
                 "Url": st.column_config.TextColumn("Application URL"),
                 "Status": st.column_config.SelectboxColumn(
                     "Status",
-                    options=["Preparation", "Applied", "In process", "Rejected"]
+                    options=STATUS_OPTIONS
                 ),
                 "Job Type": st.column_config.TextColumn(disabled=True),
                 "Date": st.column_config.DateColumn("Date", format="DD-MMM-YYYY", disabled=True),
                 "Created Application folder": st.column_config.TextColumn(disabled=True),
             },
-            key="editor"
+            # A new version gets a fresh editor: its widget state holds positions of the old frame
+            key=f"editor_{page}_{hash(filter_signature)}_{hash(tracker_version)}"
         )
 
+        # Track the edits of this page, dropping the ones the user reverted
+        for label in visible_labels:
+            pending_edits.pop(df.index.get_loc(label), None)
+        pending_edits.update(diff_tracker_rows(df, edited_df))
+        st.session_state["tracker_edit_ids"] = {position: df["ID"].iat[position] for position in pending_edits}
+
         selected_rows = edited_df[edited_df["Open"] == True]
 
         # Enforce single selection
@@ -63,15 +154,20 @@ if "token" in st.session_state:
 
         if st.button("💾 Save Updates to Excel"):
             try:
-                editable_cols = ["Company Name", "Url", "Status"]
-                df[editable_cols] = edited_df[editable_cols]
+                # Queued by row ID: the rows may move before the queue writes them
+                changes = {df["ID"].iat[position]: row_changes for position, row_changes in pending_edits.items()}
 
-                overwrite_excel_file(
-                    access_token=st.session_state["token"],
-                    updated_df=df,
-                    filepath="Jobs/JobTracker.xlsx",
-                )
-                st.success("✅ Updates saved to Excel!")
+                if changes:
+                    # Written in the background (see utils/write_queue.py); the sidebar shows the progress
+                    queue_excel_row_updates(
+                        access_token=st.session_state["token"],
+                        changes=changes,
+                        filepath="Jobs/JobTracker.xlsx",
+                    )
+                    pending_edits.clear()
+                    st.success(f"📤 {len(changes)} updated row(s) queued for saving to Excel!")
+                else:
+                    st.info("ℹ️ No changes to save.")
             except Exception as e:
                 st.error("❌ Failed to update Excel.")
                 st.code(str(e))
@@ -81,15 +177,12 @@ if "token" in st.session_state:
 
         if show_form:
             with st.sidebar.form("add_form", clear_on_submit=True):
-                job_type = st.selectbox("Job Type", [
-                    "Full Stack Developer", "Cloud Engineer", "DevOps Engineer",
-                    "Python Engineer", "Backend Engineer", "AI Engineer"
-                ])
+                job_type = st.selectbox("Job Type", JOB_TYPES)
                 date_applied = datetime.date.today().strftime("%d-%b-%Y")
                 company = st.text_input("Company Name")
                 url = st.text_input("Application URL")
                 folder_created = st.selectbox("Created Application Folder", ["Yes", "No"])
-                status = st.selectbox("Status", ["Preparation", "Applied", "In process", "Rejected"])
+                status = st.selectbox("Status", STATUS_OPTIONS)
 
                 submitted = st.form_submit_button("Add Entry")
 
@@ -122,6 +215,41 @@ if "token" in st.session_state:
                             st.sidebar.error("❌ Failed to save to OneDrive.")
                             st.sidebar.code(str(e))
 
+        # Bulk import: paste or upload many postings, added with one rows/add call
+        with st.sidebar.expander("📥 Bulk Import Jobs"):
+            st.caption("CSV or TSV with a header row: Job Type, Company Name, Url (optional: Date, Status, ID)")
+            pasted_jobs = st.text_area("Paste jobs", height=150, key="bulk_paste")
+            uploaded_jobs = st.file_uploader("...or upload a file", type=["csv", "tsv", "txt"], key="bulk_upload")
+
+            if st.button("Import Jobs"):
+                raw_text = uploaded_jobs.getvalue().decode("utf-8-sig") if uploaded_jobs else pasted_jobs
+                try:
+                    new_rows, skipped = parse_bulk_jobs(raw_text, df, JOB_TYPES, STATUS_OPTIONS)
+
+                    if new_rows:
+                        append_rows_to_excel_table(
+                            access_token=st.session_state["token"],
+                            new_rows=new_rows,
+                            filepath="Jobs/JobTracker.xlsx"
+                        )
+                        st.session_state["bulk_import_result"] = f"✅ Imported {len(new_rows)} job(s)."
+                        # Shown after the rerun, like the result
+                        st.session_state["bulk_import_skipped"] = skipped
+                        st.rerun()
+                    else:
+                        for reason in skipped:
+                            st.warning(f"⚠️ Skipped {reason}")
+                        st.info("ℹ️ No new jobs to import.")
+
+                except Exception as e:
+                    st.error("❌ Bulk import failed.")
+                    st.code(str(e))
+
+            if "bulk_import_result" in st.session_state:
+                st.success(st.session_state.pop("bulk_import_result"))
+            for reason in st.session_state.pop("bulk_import_skipped", []):
+                st.warning(f"⚠️ Skipped {reason}")
+
         
 
     except Exception as e:
@@ -129,3 +257,10 @@ if "token" in st.session_state:
         st.code(str(e))
 else:
     st.warning("🔒 Please log in to access your OneDrive data.")
+
+# --- Background saves (polled, sidebar) ---
+with st.sidebar:
+    render_write_status()
+
+# --- Performance trace (opt-in, sidebar) ---
+render_trace_panel()
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# The app reads its settings at import time: run everything against a throwaway local drive
+_root = tempfile.mkdtemp(prefix="jobstreamlit-tests-")
+os.environ.setdefault("JOBSTREAMLIT_STORAGE", "local")
+os.environ.setdefault("JOBSTREAMLIT_LOCAL_ROOT", os.path.join(_root, "drive"))
+os.environ.setdefault("JOBSTREAMLIT_CACHE_DIR", os.path.join(_root, "cache"))
+os.environ.setdefault("GRAPH_ACCESS_TOKEN", "test-token")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
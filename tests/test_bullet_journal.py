@@ -0,0 +1,94 @@
+import io
+import json
+
+import pytest
+
+from utils import bullet_journal
+from utils.bullet_journal import BulletJournal
+from utils.storage import get_storage
+
+BANK = "Jobs/templates/Bullet Bank/CV_WEBullets.json"
+
+
+class RecordingQueue:
+    def __init__(self):
+        self.jobs = []
+
+    def enqueue(self, kind, path, **options):
+        self.jobs.append((kind, path, options.get("delay")))
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    queue = RecordingQueue()
+    monkeypatch.setattr(bullet_journal, "get_write_queue", lambda: queue)
+    journal = BulletJournal(str(tmp_path / "bullet_journal.jsonl"))
+    journal.queue = queue
+    return journal
+
+
+def write_bank(bank: dict, path=BANK):
+    get_storage().write(None, path, io.BytesIO(json.dumps(bank).encode("utf-8")), "application/json")
+
+
+def read_bank(path=BANK) -> dict:
+    with get_storage().read(None, path) as stream:
+        return json.load(stream)
+
+
+def test_append_journals_and_queues_a_debounced_flush(journal):
+    journal.append(None, BANK, "Backend", "Built APIs")
+
+    assert [entry["text"] for entry in journal.pending(BANK)] == ["Built APIs"]
+    assert journal.queue.jobs == [("merge_bullets", BANK, bullet_journal.FLUSH_DEBOUNCE_SECONDS)]
+
+
+def test_flush_merges_one_bank_and_keeps_the_others(journal):
+    write_bank({"Backend": ["Built APIs"]})
+    journal.append(None, BANK, "Backend", "built apis")  # Duplicate after normalization
+    journal.append(None, BANK, "Cloud", "Moved to Azure")
+    journal.append(None, "Jobs/templates/Bullet Bank/CL_WEBullets.json", "Cloud", "Other bank")
+
+    journal.flush(None, BANK)
+
+    assert read_bank() == {"Backend": ["Built APIs"], "Cloud": ["Moved to Azure"]}
+    assert journal.pending(BANK) == []
+    assert [entry["text"] for entry in journal.pending()] == ["Other bank"]
+
+
+def test_flush_merges_again_when_the_bank_changed_in_between(journal, monkeypatch):
+    write_bank({"Backend": ["Built APIs"]})
+    journal.append(None, BANK, "Backend", "Cut latency")
+
+    storage = get_storage()
+    original_write = storage.write
+    conditional_writes = []
+
+    def write_after_another_session(access_token, path, stream, content_type, progress_callback=None, if_match=None):
+        conditional_writes.append(if_match)
+        if len(conditional_writes) == 1:
+            # Another session saves a bullet between our read and our write
+            other = json.dumps({"Backend": ["Built APIs"], "Cloud": ["Moved to Azure"]}).encode("utf-8")
+            original_write(None, path, io.BytesIO(other), "application/json")
+        return original_write(access_token, path, stream, content_type, progress_callback, if_match)
+
+    monkeypatch.setattr(storage, "write", write_after_another_session)
+    journal.flush(None, BANK)
+
+    assert len(conditional_writes) == 2
+    assert conditional_writes[0] != conditional_writes[1]
+    assert read_bank() == {"Backend": ["Built APIs", "Cut latency"], "Cloud": ["Moved to Azure"]}
+    assert journal.pending() == []
+
+
+def test_failed_flush_keeps_the_entries(journal, monkeypatch):
+    journal.append(None, BANK, "Backend", "Kept for later")
+
+    def unreachable(*args, **kwargs):
+        raise Exception("🔌 Network error while saving")
+
+    monkeypatch.setattr(get_storage(), "write", unreachable)
+    with pytest.raises(Exception):
+        journal.flush(None, BANK)
+
+    assert [entry["text"] for entry in journal.pending(BANK)] == ["Kept for later"]
@@ -0,0 +1,128 @@
+import pandas as pd
+import pytest
+
+from benchmarks.mock_graph import MockGraphServer
+from utils import graph_batch, graph_storage, workbook_session
+from utils.graph_client import GraphClient
+from utils.graph_storage import GraphStorage
+from utils.rate_limit import RetryPolicy, TokenBucket
+from utils.workbook_session import WorkbookSessionManager
+
+
+@pytest.fixture
+def mock_graph(monkeypatch):
+    """
+    Starts a mock Graph server with the given options and points GraphStorage at it.
+    """
+    servers = []
+
+    def start(**options):
+        server = MockGraphServer(**options).start()
+        servers.append(server)
+        client = GraphClient(base_url=server.base_url, retry_policy=RetryPolicy(base_delay=0.01))
+        sessions = WorkbookSessionManager()
+        for module in [graph_batch, graph_storage, workbook_session]:
+            monkeypatch.setattr(module, "get_graph_client", lambda: client)
+        monkeypatch.setattr(graph_storage, "get_workbook_sessions", lambda: sessions)
+        return server.drive, GraphStorage()
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def graph(mock_graph):
+    return mock_graph()
+
+
+def test_update_rows_by_id_finds_rows_that_moved(graph):
+    drive, storage = graph
+    drive.put_table("Jobs/T.xlsx", pd.DataFrame({"ID": ["a", "b", "c"], "Status": ["Applied"] * 3}))
+
+    # Sorted and a row deleted after the edit was made
+    drive.get("Jobs/T.xlsx").table = pd.DataFrame({"ID": ["c", "b"], "Status": ["Applied"] * 2})
+    storage.update_rows("token", "Jobs/T.xlsx", "JobTable", {"b": {"Status": "Rejected"}}, key_column="ID")
+
+    assert drive.get("Jobs/T.xlsx").table["Status"].tolist() == ["Applied", "Rejected"]
+
+
+def test_update_rows_by_id_writes_nothing_when_a_row_is_gone(graph):
+    drive, storage = graph
+    drive.put_table("Jobs/T.xlsx", pd.DataFrame({"ID": ["a", "c"], "Status": ["Applied"] * 2}))
+
+    with pytest.raises(Exception, match="Row b is no longer in the table"):
+        storage.update_rows("token", "Jobs/T.xlsx", "JobTable", {"a": {"Status": "Rejected"}, "b": {"Status": "Rejected"}}, key_column="ID")
+
+    assert drive.get("Jobs/T.xlsx").table["Status"].tolist() == ["Applied", "Applied"]
+
+
+def test_stat_many_resends_throttled_sub_requests(mock_graph):
+    drive, storage = mock_graph(throttle_every=4, retry_after=0.01)
+    paths = [f"Jobs/templates/T{i}.docx" for i in range(25)]
+    for path in paths[::2]:
+        drive.put_file(path, b"x")
+
+    items = storage.stat_many("token", paths)
+
+    assert [items[path] is not None for path in paths] == [i % 2 == 0 for i in range(25)]
+    assert drive.counts["POST $batch"] > 2  # The throttled sub-requests went out again
+
+
+class StubResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+        self.text = str(body)
+
+    def json(self):
+        return self.body
+
+
+class StubClient:
+    """
+    Answers $batch calls from a list of prepared replies and records what was sent.
+    """
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.sent = []
+        self.retry_policy = RetryPolicy(base_delay=0.01)
+        self.rate_limiter = TokenBucket(rate=0)
+
+    def post(self, url, access_token=None, json=None, **kwargs):
+        self.sent.append(json["requests"])
+        return StubResponse(200, {"responses": self.replies.pop(0)})
+
+
+def test_send_batch_honors_retry_after_and_resends_dependents(monkeypatch):
+    client = StubClient([
+        [
+            {"id": "0", "status": 429, "headers": {"retry-after": "0.2"}},
+            {"id": "1", "status": 424},
+            {"id": "2", "status": 200, "body": {"name": "b"}},
+        ],
+        [{"id": "0", "status": 201, "body": {"name": "a"}}, {"id": "1", "status": 200, "body": {"name": "a/c"}}],
+    ])
+    monkeypatch.setattr(graph_batch, "get_graph_client", lambda: client)
+    paused = []
+    monkeypatch.setattr(client.rate_limiter, "pause", paused.append)
+
+    responses = graph_batch.send_batch("token", [
+        {"method": "POST", "url": "/a", "body": {}},
+        {"method": "GET", "url": "/a/c", "dependsOn": [0]},
+        {"method": "GET", "url": "/b"},
+    ])
+
+    assert [response.status_code for response in responses] == [201, 200, 200]
+    assert paused == [0.2]
+    assert [[entry["id"] for entry in sent] for sent in client.sent] == [["0", "1", "2"], ["0", "1"]]
+    assert client.sent[1][1]["dependsOn"] == ["0"]
+
+
+def test_send_batch_raises_on_missing_sub_responses(monkeypatch):
+    client = StubClient([[{"id": "0", "status": 200, "body": {}}]])
+    monkeypatch.setattr(graph_batch, "get_graph_client", lambda: client)
+
+    with pytest.raises(Exception, match="missing sub-request"):
+        graph_batch.send_batch("token", [{"url": "/a"}, {"url": "/b"}])
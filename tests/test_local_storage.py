@@ -0,0 +1,56 @@
+import io
+import os
+
+import pytest
+
+from utils.local_storage import LocalStorage
+from utils.storage import StorageBackend, WriteConflict
+
+
+def test_incomplete_backend_cannot_be_created():
+    class ReadOnlyStorage(StorageBackend):
+        def stat(self, access_token, path, select=None):
+            return None
+
+    with pytest.raises(TypeError, match="abstract"):
+        ReadOnlyStorage()
+
+
+def test_local_storage_implements_every_operation(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    storage.write(None, "Jobs/a.json", io.BytesIO(b"{}"), "application/json")
+
+    assert storage.exists(None, "Jobs/a.json")
+
+
+def write_with_mtime(storage, path, content, mtime_ns):
+    storage.write(None, path, io.BytesIO(content), "application/json")
+    os.utime(storage._path(path), ns=(mtime_ns, mtime_ns))
+
+
+def test_etag_changes_with_content_even_if_mtime_and_size_do_not(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    write_with_mtime(storage, "Jobs/a.json", b'{"a": 1}', 1_000_000_000)
+    first = storage.stat(None, "Jobs/a.json")["eTag"]
+    write_with_mtime(storage, "Jobs/a.json", b'{"a": 2}', 1_000_000_000)  # Same size, same timestamp
+
+    assert storage.stat(None, "Jobs/a.json")["eTag"] != first
+
+
+def test_conditional_write_detects_a_same_size_write_in_between(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    write_with_mtime(storage, "Jobs/a.json", b'{"a": 1}', 1_000_000_000)
+    etag = storage.stat(None, "Jobs/a.json")["eTag"]
+    write_with_mtime(storage, "Jobs/a.json", b'{"b": 1}', 1_000_000_000)
+
+    with pytest.raises(WriteConflict):
+        storage.write(None, "Jobs/a.json", io.BytesIO(b'{"c": 1}'), "application/json", if_match=etag)
+    with storage.read(None, "Jobs/a.json") as stream:
+        assert stream.read() == b'{"b": 1}'
+
+
+def test_list_and_stat_report_the_same_etag(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    storage.write(None, "Jobs/a.json", io.BytesIO(b"{}"), "application/json")
+
+    assert storage.list(None, "Jobs")[0]["eTag"] == storage.stat(None, "Jobs/a.json")["eTag"]
@@ -0,0 +1,87 @@
+import email.utils
+import time
+
+import pytest
+
+from benchmarks.mock_graph import MockGraphServer
+from utils.graph_client import GraphClient
+from utils.rate_limit import TokenBucket, RetryPolicy, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_bucket_allows_a_burst_then_paces_callers():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=3, clock=clock, sleep=clock.sleep)
+
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.1)]
+
+
+def test_bucket_pause_stops_every_caller():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=5, clock=clock, sleep=clock.sleep)
+
+    bucket.pause(2.0)
+    bucket.acquire()
+    assert sum(clock.sleeps) >= 2.0
+
+
+def test_bucket_with_zero_rate_never_waits():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=0, burst=0, clock=clock, sleep=clock.sleep)
+    for _ in range(100):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(base_delay=0.5, max_delay=4.0)
+    for attempt in range(10):
+        delay = policy.backoff(attempt)
+        assert 0 <= delay <= min(4.0, 0.5 * 2 ** attempt)
+
+
+def test_retry_after_wins_and_is_capped():
+    class Response:
+        def __init__(self, value):
+            self.headers = {"Retry-After": value}
+
+    policy = RetryPolicy(max_retry_after=10.0)
+    assert policy.delay(0, Response("3")) == 3
+    assert policy.delay(0, Response("120")) == 10.0
+
+
+def test_parse_retry_after_accepts_seconds_and_http_dates():
+    assert parse_retry_after("5") == 5
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+    in_a_minute = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert 55 <= parse_retry_after(in_a_minute) <= 61
+
+
+def test_client_retries_throttled_requests():
+    with MockGraphServer(throttle_every=2, retry_after=0.01) as server:
+        server.drive.put_file("Jobs/a.json", b"{}")
+        client = GraphClient(base_url=server.base_url, retry_policy=RetryPolicy(base_delay=0.01))
+
+        responses = [client.get(client.drive_url("Jobs/a.json"), "token") for _ in range(3)]
+
+        assert [response.status_code for response in responses] == [200, 200, 200]
+        assert server.drive.round_trips == 5  # Requests 2 and 4 were throttled and sent again
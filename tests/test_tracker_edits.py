@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.graph_storage import _contiguous_runs
+from utils.onedrive import diff_tracker_rows, rebase_tracker_edits
+
+
+@pytest.fixture
+def tracker():
+    # Index labels are not positions, like a filtered or sorted frame
+    return pd.DataFrame({
+        "ID": ["a", "b", "c", "d"],
+        "Company Name": ["Acme", "Beta", "Core", "Delta"],
+        "Url": ["https://a", np.nan, "https://c", np.nan],
+        "Status": ["Applied", "Applied", "Rejected", "In process"],
+    }, index=[10, 20, 30, 40])
+
+
+def test_diff_returns_positions_and_only_changed_columns(tracker):
+    edited = tracker.loc[[40, 20]].drop(columns=["ID"])
+    edited.at[40, "Status"] = "Rejected"
+    edited.at[20, "Url"] = "https://b"
+
+    assert diff_tracker_rows(tracker, edited) == {3: {"Status": "Rejected"}, 1: {"Url": "https://b"}}
+
+
+def test_diff_ignores_reverted_edits(tracker):
+    edited = tracker.loc[[10, 30]].copy()
+    edited.at[10, "Status"] = "Rejected"
+    edited.at[10, "Status"] = "Applied"
+
+    assert diff_tracker_rows(tracker, edited) == {}
+
+
+def test_diff_treats_empty_cells_alike(tracker):
+    edited = tracker.loc[[20, 40]].copy()
+    edited.at[20, "Url"] = ""
+    edited.at[40, "Url"] = None
+
+    assert diff_tracker_rows(tracker, edited) == {}
+
+
+def test_diff_reports_a_cleared_cell(tracker):
+    edited = tracker.loc[[10]].copy()
+    edited.at[10, "Url"] = ""
+
+    assert diff_tracker_rows(tracker, edited) == {0: {"Url": ""}}
+
+
+def test_rebase_follows_rows_that_moved(tracker):
+    edits = {1: {"Status": "Rejected"}, 3: {"Url": "https://d"}}
+    edit_ids = {1: "b", 3: "d"}
+    new_df = tracker.iloc[[3, 2, 1, 0]].reset_index(drop=True)  # Sorted the other way round
+
+    assert rebase_tracker_edits(edits, edit_ids, new_df) == ({2: {"Status": "Rejected"}, 0: {"Url": "https://d"}}, 0)
+
+
+def test_rebase_counts_deleted_rows(tracker):
+    edits = {0: {"Status": "Rejected"}, 2: {"Status": "Applied"}}
+    new_df = tracker[tracker["ID"] != "a"].reset_index(drop=True)
+
+    assert rebase_tracker_edits(edits, {0: "a", 2: "c"}, new_df) == ({1: {"Status": "Applied"}}, 1)
+
+
+def test_rebase_drops_edits_the_new_version_already_has(tracker):
+    new_df = tracker.reset_index(drop=True)
+    new_df.at[0, "Status"] = "Rejected"  # Saved in the background meanwhile
+    edits = {0: {"Status": "Rejected", "Company Name": "Acme Corp"}, 1: {"Url": ""}}
+
+    assert rebase_tracker_edits(edits, {0: "a", 1: "b"}, new_df) == ({0: {"Company Name": "Acme Corp"}}, 0)
+
+
+def test_rebase_ignores_columns_that_are_not_editable(tracker):
+    edits = {0: {"ID": "z", "Status": "Rejected"}}
+
+    assert rebase_tracker_edits(edits, {0: "a"}, tracker.reset_index(drop=True)) == ({0: {"Status": "Rejected"}}, 0)
+
+
+COLUMNS = ["ID", "Job Type", "Date", "Company Name", "Url", "Created Application folder", "Status"]
+
+
+def test_runs_merge_adjacent_columns_in_table_order():
+    assert _contiguous_runs({"Url": "u", "Company Name": "c"}, COLUMNS) == [(3, ["c", "u"])]
+
+
+def test_runs_split_non_adjacent_columns():
+    assert _contiguous_runs({"Status": "s", "Company Name": "c"}, COLUMNS) == [(3, ["c"]), (6, ["s"])]
+
+
+def test_runs_reject_unknown_columns():
+    with pytest.raises(Exception, match="Column 'Notes' not found"):
+        _contiguous_runs({"Notes": "n"}, COLUMNS)
@@ -0,0 +1,253 @@
+import io
+import threading
+import time
+
+import pandas as pd
+import pytest
+import requests
+
+from utils import onedrive, write_queue
+from utils.write_queue import WriteQueue, write_handler
+
+executed = []
+gate = threading.Event()
+
+
+@write_handler("test_write")
+def _record_write(access_token, job, stream, progress_callback):
+    gate.wait(5)
+    executed.append((job["kind"], job["path"], stream.read().decode() if stream else job["data"]))
+
+
+@write_handler("test_convert")
+def _record_convert(access_token, job, stream, progress_callback):
+    executed.append((job["kind"], job["path"], job["data"]))
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def factory(workers=1, name="queue"):
+        queue = WriteQueue(str(tmp_path / name), workers=workers, token_source=lambda: "token")
+        queues.append(queue)
+        return queue
+
+    executed.clear()
+    gate.clear()
+    yield factory
+    gate.set()
+    for queue in queues:
+        queue.stop(timeout=5)
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            pytest.fail(f"Timed out after {timeout}s")
+        time.sleep(0.01)
+
+
+def test_coalesced_job_moves_behind_jobs_that_depend_on_it(make_queue):
+    queue = make_queue()
+    lane = "Jobs/applications/April/15_A"
+
+    queue.enqueue("test_write", f"{lane}/CV.docx", stream=io.BytesIO(b"v1"), lane=lane)
+    wait_until(lambda: queue.status()["running"])  # v1 is in flight, held by the gate
+    queue.enqueue("test_convert", f"{lane}/CV.pdf", data="pdf-1", lane=lane)
+    queue.enqueue("test_write", f"{lane}/CV.docx", stream=io.BytesIO(b"v2"), lane=lane)
+    queue.enqueue("test_convert", f"{lane}/CV.pdf", data="pdf-2", lane=lane)
+
+    gate.set()
+    assert queue.wait_idle(5)
+    assert executed == [
+        ("test_write", f"{lane}/CV.docx", "v1"),
+        ("test_write", f"{lane}/CV.docx", "v2"),
+        ("test_convert", f"{lane}/CV.pdf", "pdf-2"),
+    ]
+
+
+def test_last_job_of_lane_is_coalesced_in_place(make_queue):
+    queue = make_queue(workers=0)
+    first = queue.enqueue("test_write", "a.json", stream=io.BytesIO(b"1"))
+    second = queue.enqueue("test_write", "a.json", stream=io.BytesIO(b"2"))
+
+    assert first == second
+    assert queue.status()["pending"] == 1
+
+
+def test_lanes_run_in_parallel_but_jobs_of_a_lane_in_order(make_queue):
+    queue = make_queue(workers=2)
+    queue.enqueue("test_write", "a.docx", stream=io.BytesIO(b"a1"), lane="A")  # Blocks lane A
+    queue.enqueue("test_convert", "a.pdf", data="a2", lane="A")
+    queue.enqueue("test_convert", "b.pdf", data="b1", lane="B")
+
+    queue_b_done = queue.wait_idle(0.5)
+    assert not queue_b_done
+    assert executed == [("test_convert", "b.pdf", "b1")]  # Lane B did not wait for lane A
+
+    gate.set()
+    assert queue.wait_idle(5)
+    assert executed[1:] == [("test_write", "a.docx", "a1"), ("test_convert", "a.pdf", "a2")]
+
+
+network_failures = []
+
+
+@write_handler("test_flaky")
+def _flaky(access_token, job, stream, progress_callback):
+    if len(network_failures) < 3:
+        try:
+            raise requests.exceptions.ConnectionError("connection refused")
+        except requests.exceptions.ConnectionError as e:
+            network_failures.append(e)
+            raise Exception(f"🔌 Network error: {e}")  # Wrapped like the helpers do
+    executed.append(("test_flaky", job["path"], job["data"]))
+
+
+@write_handler("test_broken")
+def _broken(access_token, job, stream, progress_callback):
+    raise Exception("❌ Failed: 400 - bad request")
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(write_queue.RETRY_POLICY, "base_delay", 0.01)
+    monkeypatch.setattr(write_queue.RETRY_POLICY, "max_delay", 0.02)
+    monkeypatch.setattr(write_queue, "MAX_WRITE_ATTEMPTS", 2)
+    network_failures.clear()
+
+
+def test_network_errors_are_retried_without_using_up_attempts(make_queue, fast_retries):
+    queue = make_queue()
+    queue.enqueue("test_flaky", "a.json", data="payload")
+
+    assert queue.wait_idle(5)
+    assert len(network_failures) == 3  # More than MAX_WRITE_ATTEMPTS, still not parked
+    assert executed == [("test_flaky", "a.json", "payload")]
+
+
+def test_failing_job_is_parked_and_blocks_its_lane_until_discarded(make_queue, fast_retries, capsys):
+    queue = make_queue()
+    gate.set()
+    queue.enqueue("test_broken", "a.json", data=None, lane="A")
+    queue.enqueue("test_convert", "a.pdf", data="after", lane="A")
+    queue.enqueue("test_convert", "b.pdf", data="other lane", lane="B")
+
+    assert queue.wait_idle(5)  # Parked jobs do not count as pending
+    status = queue.status()
+    assert [(failed["path"], failed["error"]) for failed in status["failed"]] == [("a.json", "❌ Failed: 400 - bad request")]
+    assert capsys.readouterr().out == ""  # Reported in the write status, not on stdout
+    assert status["pending"] == 1
+    assert executed == [("test_convert", "b.pdf", "other lane")]
+
+    queue.discard_failed()
+    assert queue.wait_idle(5)
+    assert executed[-1] == ("test_convert", "a.pdf", "after")
+
+
+def test_queued_jobs_are_replayed_after_a_restart(make_queue):
+    stopped = make_queue(workers=0, name="journal")
+    stopped.enqueue("test_write", "a.docx", stream=io.BytesIO(b"content"), lane="A")
+    stopped.enqueue("test_convert", "a.pdf", data="pdf", lane="A")
+
+    gate.set()
+    restarted = make_queue(workers=1, name="journal")
+    assert restarted.wait_idle(5)
+    assert executed == [("test_write", "a.docx", "content"), ("test_convert", "a.pdf", "pdf")]
+
+    # Both job files and the blob are gone once replayed
+    assert make_queue(workers=0, name="journal").status()["pending"] == 0
+
+
+def test_row_updates_are_merged_and_survive_a_restart(make_queue):
+    data = {"table_name": "JobTable", "key_column": "ID"}
+    stopped = make_queue(workers=0, name="journal")
+    stopped.enqueue("update_rows", "T.xlsx", data={**data, "changes": {"a1": {"Status": "Applied"}}})
+    stopped.enqueue("update_rows", "T.xlsx", data={**data, "changes": {"a1": {"Url": "u"}, "b2": {"Status": "Rejected"}}})
+
+    restarted = make_queue(workers=0, name="journal")
+    assert restarted.status()["pending"] == 1
+    assert restarted.find("update_rows", "T.xlsx")["changes"] == {
+        "a1": {"Status": "Applied", "Url": "u"},
+        "b2": {"Status": "Rejected"},
+    }
+
+
+def write_tracker(path, ids):
+    from utils.storage import get_storage
+
+    df = pd.DataFrame({"ID": ids, "Company Name": [f"Company {row_id}" for row_id in ids], "Status": "Applied"})
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    get_storage().write(None, path, buffer, "application/octet-stream")
+
+
+def read_tracker(path):
+    from utils.storage import get_storage
+
+    with get_storage().read(None, path) as stream:
+        return pd.read_excel(stream).set_index("ID")
+
+
+def test_queued_row_updates_follow_their_row_when_rows_move(make_queue, monkeypatch):
+    from utils.onedrive import queue_excel_row_updates
+
+    queue = make_queue(workers=0)
+    monkeypatch.setattr(onedrive, "get_write_queue", lambda: queue)
+    write_tracker("Jobs/tests/moved.xlsx", ["a", "b", "c"])
+    queue_excel_row_updates(None, {"b": {"Status": "Rejected"}}, "Jobs/tests/moved.xlsx")
+
+    # Sorted and a row deleted in Excel before the queue got to write
+    write_tracker("Jobs/tests/moved.xlsx", ["c", "b"])
+    restarted = make_queue(workers=1)
+    assert restarted.wait_idle(5)
+
+    assert read_tracker("Jobs/tests/moved.xlsx")["Status"].to_dict() == {"c": "Applied", "b": "Rejected"}
+
+
+def test_queued_row_update_of_a_deleted_row_is_parked(make_queue, fast_retries, monkeypatch):
+    from utils.onedrive import queue_excel_row_updates
+
+    queue = make_queue()
+    monkeypatch.setattr(onedrive, "get_write_queue", lambda: queue)
+    write_tracker("Jobs/tests/deleted.xlsx", ["a", "c"])
+    queue_excel_row_updates(None, {"b": {"Status": "Rejected"}}, "Jobs/tests/deleted.xlsx")
+
+    assert queue.wait_idle(5)
+    assert "Row b is no longer in the table" in queue.status()["failed"][0]["error"]
+    assert read_tracker("Jobs/tests/deleted.xlsx")["Status"].to_dict() == {"a": "Applied", "c": "Applied"}
+
+
+def test_queued_row_updates_are_shown_on_their_row(make_queue, monkeypatch):
+    from utils.onedrive import queue_excel_row_updates, apply_queued_row_updates
+
+    queue = make_queue(workers=0)
+    monkeypatch.setattr(onedrive, "get_write_queue", lambda: queue)
+    queue_excel_row_updates(None, {7: {"Status": "Rejected"}, "gone": {"Status": "Applied"}}, "T.xlsx")
+
+    df = pd.DataFrame({"ID": [9.0, 7.0], "Status": ["Applied", "Applied"]})  # Excel numbers read as floats
+    apply_queued_row_updates(df, "T.xlsx")
+    assert df["Status"].tolist() == ["Applied", "Rejected"]
+
+
+def test_stop_ends_the_workers_and_keeps_queued_jobs(make_queue):
+    queue = make_queue(workers=2, name="journal")
+    queue.stop(timeout=5)
+    assert not any(worker.is_alive() for worker in queue._workers)
+
+    queue.enqueue("test_convert", "a.pdf", data="later")
+    assert not queue.wait_idle(0.2)
+    assert make_queue(workers=0, name="journal").status()["pending"] == 1
+
+
+def test_upload_job_writes_to_storage(make_queue):
+    from utils.storage import get_storage
+
+    queue = make_queue()
+    queue.enqueue_upload("Jobs/tests/upload.bin", io.BytesIO(b"x" * 1000), "application/octet-stream")
+
+    assert queue.wait_idle(5)
+    with get_storage().read(None, "Jobs/tests/upload.bin") as stream:
+        assert stream.read() == b"x" * 1000
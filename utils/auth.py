@@ -1,6 +1,8 @@
 from msal import PublicClientApplication, SerializableTokenCache
 import streamlit as st
+import threading
 import base64
+import time
 import os
 
 CLIENT_ID = "7553f833-0b27-47b3-b336-e7d4a4289cef"
@@ -10,12 +12,95 @@ SCOPES = ["User.Read", "Files.ReadWrite"]
 # Change to True only when you want to regenerate base64 secret
 LOCAL_MODE = False
 
+# Refresh the in-memory token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = 300
+
+# Fixed token, for running against a mock Graph server (see benchmarks/); never set in production
+STATIC_ACCESS_TOKEN = os.environ.get("GRAPH_ACCESS_TOKEN")
+
+# Provider of the last signed-in page load, for background work outside a script run
+_last_provider = None
+
+
+class TokenProvider:
+    """
+    Process-wide MSAL app and token cache.
+
+    The secret is decoded and the PublicClientApplication is built only once.
+    Reruns get the in-memory access token while it is still valid; a silent
+    refresh happens only shortly before expiry, and the lock makes sure
+    concurrent sessions do not start duplicate refreshes.
+    """
+
+    def __init__(self, encoded_cache: str):
+        self.cache = SerializableTokenCache()
+        self.cache.deserialize(base64.b64decode(encoded_cache).decode("utf-8"))
+        self.app = PublicClientApplication(CLIENT_ID, authority=AUTHORITY, token_cache=self.cache)
+
+        self._lock = threading.Lock()
+        self._access_token = None
+        self._expires_at = 0.0
+
+    def _is_valid(self) -> bool:
+        return self._access_token is not None and time.time() < self._expires_at - TOKEN_REFRESH_MARGIN
+
+    def get_token(self):
+        """
+        Returns a valid access token, or None if the cached refresh token no longer works.
+        """
+        if self._is_valid():
+            return self._access_token
+
+        with self._lock:
+            # Another session may have refreshed while we were waiting
+            if self._is_valid():
+                return self._access_token
+
+            accounts = self.app.get_accounts()
+            if not accounts:
+                return None
+
+            # force_refresh, since MSAL would otherwise hand back the same token that is about to expire
+            result = self.app.acquire_token_silent(
+                SCOPES, account=accounts[0], force_refresh=self._access_token is not None
+            )
+            if not result or "access_token" not in result:
+                return None
+
+            self._access_token = result["access_token"]
+            self._expires_at = time.time() + int(result.get("expires_in", 0))
+            return self._access_token
+
+
+@st.cache_resource
+def get_token_provider(encoded_cache: str) -> TokenProvider:
+    """
+    Returns the process-wide TokenProvider for the given encoded token cache.
+    """
+    return TokenProvider(encoded_cache)
+
+
+def get_background_token():
+    """
+    Returns a valid access token for background threads (e.g. the write queue), or None
+    if no page has signed in since the process started.
+    """
+    if STATIC_ACCESS_TOKEN:
+        return STATIC_ACCESS_TOKEN
+    provider = _last_provider
+    return provider.get_token() if provider else None
+
 
 def get_access_token():
-    cache = SerializableTokenCache()
+    global _last_provider
+
+    if STATIC_ACCESS_TOKEN:
+        st.session_state["token"] = STATIC_ACCESS_TOKEN
+        return STATIC_ACCESS_TOKEN
 
     if LOCAL_MODE:
         # Interactive login and regenerate secret.txt
+        cache = SerializableTokenCache()
         app = PublicClientApplication(CLIENT_ID, authority=AUTHORITY, token_cache=cache)
 
         accounts = app.get_accounts()
@@ -47,20 +132,16 @@ def get_access_token():
         # Load from secrets in both local and cloud
         try:
             encoded_cache = st.secrets["auth"]["encoded_token_cache"]
-            decoded_cache = base64.b64decode(encoded_cache).decode("utf-8")
-            cache.deserialize(decoded_cache)
+            provider = get_token_provider(encoded_cache)
         except Exception as e:
             st.warning("⚠️ Could not load token cache from secrets.")
             st.stop()
 
-        app = PublicClientApplication(CLIENT_ID, authority=AUTHORITY, token_cache=cache)
-
-        accounts = app.get_accounts()
-        if accounts:
-            result = app.acquire_token_silent(SCOPES, account=accounts[0])
-            if result and "access_token" in result:
-                st.session_state["token"] = result["access_token"]
-                return result["access_token"]
+        access_token = provider.get_token()
+        if access_token:
+            _last_provider = provider
+            st.session_state["token"] = access_token
+            return access_token
 
         st.error("❌ Token expired or missing. Set `LOCAL_MODE = True` to refresh and update your secret.")
         st.stop()
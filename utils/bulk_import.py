@@ -0,0 +1,119 @@
+import datetime
+import uuid
+from io import StringIO
+import pandas as pd
+
+# Accepted header spellings for each tracker column (compared lower-cased)
+COLUMN_ALIASES = {
+    "ID": ["id"],
+    "Job Type": ["job type", "type", "role"],
+    "Date": ["date", "applied on", "date applied"],
+    "Company Name": ["company name", "company"],
+    "Url": ["url", "application url", "link"],
+    "Created Application folder": ["created application folder", "folder created", "folder"],
+    "Status": ["status"],
+}
+
+REQUIRED_COLUMNS = ["Job Type", "Company Name", "Url"]
+
+
+def parse_bulk_jobs(raw_text: str, existing_df: pd.DataFrame, job_types: list, statuses: list,
+                    default_status="Applied"):
+    """
+    Parses a CSV/TSV paste (with a header row) into tracker rows ready for append_rows_to_excel_table.
+
+    Rows are validated and de-duplicated against the existing tracker (ID, and Company Name + Url)
+    and against each other.
+
+    Returns:
+    - (rows, skipped): list of row dicts to add, and list of "line N: reason" messages
+    """
+    raw_text = raw_text.strip()
+    if not raw_text:
+        return [], []
+
+    first_line = raw_text.splitlines()[0]
+    sep = "\t" if "\t" in first_line else ","
+    try:
+        pasted = pd.read_csv(StringIO(raw_text), sep=sep, dtype=str, keep_default_na=False)
+    except Exception as e:
+        raise Exception(f"📄 Failed to parse pasted jobs: {e}")
+
+    pasted = pasted.rename(columns=_header_mapping(pasted.columns))
+    missing = [col for col in REQUIRED_COLUMNS if col not in pasted.columns]
+    if missing:
+        raise Exception(f"❌ Missing column(s): {', '.join(missing)}")
+
+    existing_ids = set(existing_df["ID"].astype(str)) if "ID" in existing_df else set()
+    existing_keys = set(zip(
+        existing_df["Company Name"].astype(str).str.strip().str.lower(),
+        existing_df["Url"].astype(str).str.strip().str.lower(),
+    )) if len(existing_df) else set()
+
+    today = datetime.date.today().strftime("%d-%b-%Y")
+    rows, skipped = [], []
+
+    # Header is line 1, so data rows start at line 2
+    for line_no, record in enumerate(pasted.to_dict("records"), start=2):
+        record = {k: str(v).strip() for k, v in record.items()}
+        company, url, job_type = record["Company Name"], record["Url"], record["Job Type"]
+        status = record.get("Status") or default_status
+
+        if not (company and url and job_type):
+            skipped.append(f"line {line_no}: Job Type, Company Name and Url are required")
+            continue
+        if job_type not in job_types:
+            skipped.append(f"line {line_no}: unknown Job Type '{job_type}'")
+            continue
+        if status not in statuses:
+            skipped.append(f"line {line_no}: unknown Status '{status}'")
+            continue
+
+        key = (company.lower(), url.lower())
+        if key in existing_keys:
+            skipped.append(f"line {line_no}: {company} ({url}) is already listed")
+            continue
+
+        job_id = record.get("ID") or _new_id(existing_ids)
+        if job_id in existing_ids:
+            skipped.append(f"line {line_no}: ID {job_id} is already listed")
+            continue
+
+        date_applied = today
+        if record.get("Date"):
+            parsed = pd.to_datetime(record["Date"], errors="coerce", dayfirst=True)
+            if pd.isna(parsed):
+                skipped.append(f"line {line_no}: invalid Date '{record['Date']}'")
+                continue
+            date_applied = parsed.strftime("%d-%b-%Y")
+
+        existing_keys.add(key)
+        existing_ids.add(job_id)
+        rows.append({
+            "ID": job_id,
+            "Job Type": job_type,
+            "Date": date_applied,
+            "Company Name": company,
+            "Url": url,
+            "Created Application folder": record.get("Created Application folder") or "No",
+            "Status": status,
+        })
+
+    return rows, skipped
+
+
+def _header_mapping(columns) -> dict:
+    mapping = {}
+    for col in columns:
+        normalized = str(col).strip().lower()
+        for target, aliases in COLUMN_ALIASES.items():
+            if normalized in aliases:
+                mapping[col] = target
+    return mapping
+
+
+def _new_id(existing_ids: set) -> str:
+    while True:
+        new_id = str(uuid.uuid4())[:8]
+        if new_id not in existing_ids:
+            return new_id
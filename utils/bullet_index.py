@@ -0,0 +1,126 @@
+import bisect
+import difflib
+import re
+import threading
+from collections import defaultdict
+import streamlit as st
+
+RESULTS_PER_PAGE = 8
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#.]+")
+
+
+def tokenize(text: str) -> list:
+    return [token.strip(".") for token in _TOKEN_RE.findall(text.lower()) if token.strip(".")]
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+class BulletIndex:
+    """
+    In-memory index over a bullet bank ({category: [bullet, ...]}).
+
+    - duplicate detection is a set lookup on (category, normalized text)
+    - search is an inverted token index, with prefix and fuzzy matching for query tokens
+    """
+
+    def __init__(self, bullets_dict: dict):
+        self._lock = threading.Lock()
+        self.entries = []                   # [(category, text)]
+        self._keys = set()                  # {(category, normalized text)}
+        self._postings = defaultdict(set)   # token -> {entry id}
+        self._by_category = defaultdict(list)
+        self._vocabulary = []               # sorted tokens, for prefix and fuzzy lookups
+
+        for category, bullets in bullets_dict.items():
+            for text in bullets:
+                self._add(category, text)
+        self._vocabulary = sorted(self._postings)
+
+    def _add(self, category, text):
+        entry_id = len(self.entries)
+        self.entries.append((category, text))
+        self._keys.add((category, normalize(text)))
+        self._by_category[category].append(entry_id)
+        for token in set(tokenize(text)):
+            self._postings[token].add(entry_id)
+
+    def contains(self, category: str, text: str) -> bool:
+        return (category, normalize(text)) in self._keys
+
+    def add(self, category: str, text: str) -> bool:
+        """
+        Adds a bullet to the index. Returns False if it is already in that category.
+        """
+        with self._lock:
+            if self.contains(category, text):
+                return False
+            new_tokens = [t for t in set(tokenize(text)) if t not in self._postings]
+            self._add(category, text)
+            for token in new_tokens:
+                bisect.insort(self._vocabulary, token)
+            return True
+
+    def _matching_tokens(self, token: str, fuzzy: bool) -> list:
+        if token in self._postings:
+            matches = [token]
+        else:
+            matches = []
+
+        # Prefix matches, so results show up while the user is still typing
+        start = bisect.bisect_left(self._vocabulary, token)
+        for candidate in self._vocabulary[start:start + 50]:
+            if not candidate.startswith(token):
+                break
+            if candidate != token:
+                matches.append(candidate)
+
+        if fuzzy and not matches:
+            matches = difflib.get_close_matches(token, self._vocabulary, n=3, cutoff=0.75)
+        return matches
+
+    def search(self, query: str = "", category: str = None, fuzzy: bool = True) -> list:
+        """
+        Returns entry ids ranked by the number of query tokens they match.
+        An empty query returns the whole category (or the whole bank).
+        """
+        if category:
+            scope = self._by_category.get(category, [])
+        else:
+            scope = range(len(self.entries))
+
+        tokens = tokenize(query)
+        if not tokens:
+            return list(scope)
+
+        scores = defaultdict(int)
+        for token in tokens:
+            hits = set()
+            for match in self._matching_tokens(token, fuzzy):
+                hits |= self._postings[match]
+            for entry_id in hits:
+                scores[entry_id] += 1
+
+        if category:
+            scores = {entry_id: score for entry_id, score in scores.items() if self.entries[entry_id][0] == category}
+
+        return sorted(scores, key=lambda entry_id: (-scores[entry_id], entry_id))
+
+    def page(self, entry_ids: list, page: int, per_page: int = RESULTS_PER_PAGE):
+        """
+        Returns ([(category, text), ...] for the page, number of pages). Page numbers start at 0.
+        """
+        pages = max(1, -(-len(entry_ids) // per_page))
+        page = min(max(page, 0), pages - 1)
+        visible = entry_ids[page * per_page:(page + 1) * per_page]
+        return [self.entries[entry_id] for entry_id in visible], pages
+
+
+@st.cache_resource(max_entries=8)
+def get_bullet_index(bank_path: str, bank_version: str, _bullets_dict: dict) -> BulletIndex:
+    """
+    Returns the BulletIndex for a bullet bank, built once per bank version.
+    """
+    return BulletIndex(_bullets_dict)
@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+import time
+from io import BytesIO
+import streamlit as st
+from utils.helpers import get_drive_item, local_cache_path
+from utils.storage import get_storage, WriteConflict
+from utils.write_queue import get_write_queue
+from utils.bullet_index import normalize
+
+# Saves within this window are sent to OneDrive together (the queued flush waits this long)
+FLUSH_DEBOUNCE_SECONDS = 3.0
+
+# Attempts per flush when another writer changed the bank in between (eTag conflict)
+MAX_FLUSH_ATTEMPTS = 5
+
+
+class BulletJournal:
+    """
+    Append-only local journal of bullet bank additions, flushed to OneDrive in batches.
+
+    Saving a bullet only appends a line to the journal and queues a flush of its bank on the
+    write queue. The flush waits FLUSH_DEBOUNCE_SECONDS, restarted by every new save, then
+    merges all pending additions into the bank file and writes it with If-Match on the eTag;
+    on a conflict the bank is re-read, merged again and retried.
+    Entries stay in the journal until they are on OneDrive, so nothing is lost on a restart.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def append(self, access_token, bank_path: str, category: str, text: str):
+        entry = {"bank": bank_path, "category": category, "text": text, "ts": time.time()}
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        self.schedule_flush(bank_path, access_token)
+
+    def pending(self, bank_path: str = None) -> list:
+        with self._lock:
+            entries = self._read()
+        return [e for e in entries if bank_path is None or e["bank"] == bank_path]
+
+    def _read(self) -> list:
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        pass  # Torn last line after a crash
+        return entries
+
+    def schedule_flush(self, bank_path: str, access_token=None, delay=FLUSH_DEBOUNCE_SECONDS):
+        """
+        Queues (or postpones) the flush of one bank; saves within the delay are coalesced into it.
+        """
+        get_write_queue().enqueue("merge_bullets", bank_path, delay=delay, access_token=access_token)
+
+    def flush(self, access_token, bank_path: str):
+        """
+        Merges the pending entries of one bank into OneDrive. Raises on failure, keeping them for the next attempt.
+        """
+        with self._flush_lock:
+            with self._lock:
+                entries = self._read()
+            additions = [e for e in entries if e["bank"] == bank_path]
+            if not additions:
+                return
+
+            _merge_into_bank(access_token, bank_path, additions)
+
+            # Drop the flushed entries, keeping other banks and anything appended while we were writing
+            flushed = {id(e) for e in additions}
+            with self._lock:
+                current = self._read()
+                remaining = [e for e in entries if id(e) not in flushed] + current[len(entries):]
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    for entry in remaining:
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                os.replace(tmp_path, self.path)
+
+
+def _merge_into_bank(access_token, bank_path: str, additions: list):
+    """
+    Merges journal entries into the bank file with an eTag-conditional write, retrying on conflicts.
+    """
+    storage = get_storage()
+
+    for _ in range(MAX_FLUSH_ATTEMPTS):
+        item = get_drive_item(access_token, bank_path, select="eTag,@microsoft.graph.downloadUrl")
+        if item:
+            with storage.read(access_token, bank_path, item=item) as bank_stream:
+                bank = json.load(bank_stream)
+        else:
+            bank = {}
+
+        changed = False
+        for entry in additions:
+            bullets = bank.setdefault(entry["category"], [])
+            if normalize(entry["text"]) not in {normalize(b) for b in bullets}:
+                bullets.append(entry["text"])
+                changed = True
+        if not changed:
+            return
+
+        try:
+            storage.write(
+                access_token,
+                bank_path,
+                BytesIO(json.dumps(bank, indent=2).encode("utf-8")),
+                "application/json",
+                if_match=item["eTag"] if item else None
+            )
+            return
+        except WriteConflict:
+            continue  # Someone else wrote the bank since we read it, merge again
+
+    raise Exception(f"❌ Bullet bank kept changing, gave up after {MAX_FLUSH_ATTEMPTS} attempts.")
+
+
+@st.cache_resource
+def get_bullet_journal() -> BulletJournal:
+    journal = BulletJournal(local_cache_path("bullet_journal.jsonl"))
+
+    # Entries left by a restart that have no queued flush yet (coalesced if they do)
+    for bank_path in {entry["bank"] for entry in journal.pending()}:
+        journal.schedule_flush(bank_path, delay=0.0)
+    return journal
+
+
+def apply_pending_bullets(bank_path: str, bullet_index):
+    """
+    Adds journal entries that are not on OneDrive yet to a (re)built bullet index.
+    """
+    for entry in get_bullet_journal().pending(bank_path):
+        bullet_index.add(entry["category"], entry["text"])
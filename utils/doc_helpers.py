@@ -1,59 +1,56 @@
-import requests
 from io import BytesIO
+from utils.storage import get_storage
+from utils.tracing import traced
 
 import re
 from docxtpl import RichText
 
-def load_docx_from_onedrive(access_token, filepath: str) -> BytesIO:
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+@traced()
+def load_docx_from_onedrive(access_token, filepath: str):
     """
-    Downloads a .docx file from OneDrive and returns it as BytesIO.
+    Downloads a .docx file from the storage backend into a seekable buffer.
     
     Parameters:
     - access_token: Microsoft Graph API token
     - filepath: path of the file in OneDrive (e.g., Jobs/applications/April/15_Accenture/nagarjuna_ravella_CV.docx)
 
     Returns:
-    - BytesIO: in-memory bytes object for loading into python-docx
+    - seekable file-like object for loading into python-docx (on Graph a SpooledTemporaryFile,
+      in memory for small files, on disk above DOWNLOAD_SPOOL_THRESHOLD)
     """
-    headers = {
-        "Authorization": f"Bearer {access_token}"
-    }
+    return get_storage().read(access_token, filepath)
 
-    url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{filepath}:/content"
-    
-    response = requests.get(url, headers=headers)
 
-    if response.status_code == 200:
-        return BytesIO(response.content)
-    else:
-        raise Exception(f"❌ Failed to download docx from OneDrive: {response.status_code} - {response.text}")
 
 
 
 
-def upload_docx_to_onedrive(access_token: str, file_stream: BytesIO, filepath: str):
+@traced()
+def upload_docx_to_onedrive(access_token: str, file_stream: BytesIO, filepath: str, progress_callback=None):
     """
     Uploads a DOCX BytesIO object to OneDrive at the given filepath.
+    Large files go through a chunked upload session (see utils/upload_session.py).
 
     Parameters:
     - access_token: Microsoft Graph token
     - file_stream: BytesIO object containing the docx file
     - filepath: OneDrive relative path (e.g., Jobs/applications/April/15_Accenture/FINAL_CV.docx)
+    - progress_callback: optional callable(bytes_sent, total_bytes)
     """
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-    }
-
-    url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{filepath}:/content"
-    response = requests.put(url, headers=headers, data=file_stream.getvalue())
-
-    if response.status_code not in [200, 201]:
-        raise Exception(f"❌ Failed to upload DOCX: {response.status_code} - {response.text}")
+    get_storage().write(
+        access_token,
+        filepath,
+        file_stream,
+        DOCX_CONTENT_TYPE,
+        progress_callback
+    )
 
 
 
-def download_docx_as_pdf(access_token: str, source_docx_path: str, target_pdf_path: str):
+@traced()
+def download_docx_as_pdf(access_token: str, source_docx_path: str, target_pdf_path: str, progress_callback=None):
     """
     Downloads a .docx from OneDrive, converts it to PDF, and uploads the PDF to OneDrive.
 
@@ -61,31 +58,16 @@ def download_docx_as_pdf(access_token: str, source_docx_path: str, target_pdf_pa
     - access_token: Microsoft Graph access token
     - source_docx_path: path of the DOCX in OneDrive
     - target_pdf_path: path to upload the new PDF in OneDrive
+    - progress_callback: optional callable(bytes_sent, total_bytes) for the upload
     """
-    headers = {
-        "Authorization": f"Bearer {access_token}"
-    }
-
-    # Download as PDF using format=pdf
-    url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{source_docx_path}:/content?format=pdf"
-    response = requests.get(url, headers=headers)
-
-    if response.status_code != 200:
-        raise Exception(f"❌ Failed to download DOCX as PDF: {response.status_code} - {response.text}")
-
-    pdf_content = response.content
-
-    # Upload PDF back to OneDrive
-    headers_upload = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/pdf"
-    }
+    storage = get_storage()
 
-    upload_url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{target_pdf_path}:/content"
-    upload_response = requests.put(upload_url, headers=headers_upload, data=pdf_content)
+    # Convert with the backend (Graph: format=pdf streamed into a spool that feeds the upload directly)
+    pdf_stream = storage.convert_to_pdf(access_token, source_docx_path)
 
-    if upload_response.status_code not in [200, 201]:
-        raise Exception(f"❌ Failed to upload PDF: {upload_response.status_code} - {upload_response.text}")
+    # Upload PDF back to the drive
+    with pdf_stream:
+        storage.write(access_token, target_pdf_path, pdf_stream, "application/pdf", progress_callback)
 
 
 def parse_bullet_to_richtext(text: str):
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import requests
+from utils.graph_client import get_graph_client, LONG_TIMEOUT
+from utils.tracing import traced
+
+# Downloads stay in memory below this size and spill to a temporary file above it
+SPOOL_THRESHOLD = int(os.environ.get("DOWNLOAD_SPOOL_THRESHOLD", 2 * 1024 * 1024))
+
+# Refuse anything bigger than this instead of filling memory or disk
+MAX_DOWNLOAD_SIZE = int(os.environ.get("DOWNLOAD_MAX_SIZE", 100 * 1024 * 1024))
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+@traced()
+def download_to_spool(access_token, filepath: str, suffix: str = "/content", max_size=None,
+                      error_message="Failed to download file", timeout=LONG_TIMEOUT, download_url=None):
+    """
+    Streams a drive item's content into a SpooledTemporaryFile instead of holding response.content.
+
+    Parameters:
+    - access_token: Microsoft Graph token
+    - filepath: path of the file in OneDrive
+    - suffix: URL suffix, e.g. "/content?format=pdf" for a PDF conversion
+    - max_size: maximum number of bytes accepted (default MAX_DOWNLOAD_SIZE)
+    - error_message: prefix of the exception raised for non-200 responses
+    - download_url: pre-authenticated @microsoft.graph.downloadUrl to use instead of the path (no token is sent)
+
+    Returns:
+    - SpooledTemporaryFile positioned at 0 (close it, or let it be garbage collected, when done)
+
+    Raises FileNotFoundError for a missing file.
+    """
+    client = get_graph_client()
+    max_size = max_size or MAX_DOWNLOAD_SIZE
+
+    try:
+        if download_url:
+            response = client.get(download_url, stream=True, timeout=timeout)
+        else:
+            response = client.get(client.drive_url(filepath, suffix), access_token, stream=True, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"🔌 Network error while downloading {filepath}: {e}")
+
+    with response:
+        if response.status_code == 404:
+            raise FileNotFoundError(f"❌ {error_message}: 404 - {filepath} not found")
+        if response.status_code != 200:
+            raise Exception(f"❌ {error_message}: {response.status_code} - {response.text}")
+
+        content_length = int(response.headers.get("Content-Length") or 0)
+        if content_length > max_size:
+            raise Exception(f"❌ {filepath} is {content_length} bytes, above the {max_size} byte limit.")
+
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_THRESHOLD)
+        received = 0
+        try:
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                received += len(chunk)
+                if received > max_size:
+                    raise Exception(f"❌ {filepath} is larger than the {max_size} byte limit.")
+                spool.write(chunk)
+        except requests.exceptions.RequestException as e:
+            spool.close()
+            raise Exception(f"🔌 Network error while downloading {filepath}: {e}")
+        except Exception:
+            spool.close()
+            raise
+
+    spool.seek(0)
+    return spool
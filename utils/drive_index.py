@@ -0,0 +1,241 @@
+import json
+import os
+import threading
+import time
+import requests
+import streamlit as st
+from utils.graph_client import get_graph_client
+from utils.helpers import get_drive_item, local_cache_path
+from utils.storage import get_storage, is_graph_storage
+from utils.tracing import traced, annotate
+
+# Subtree of the drive mirrored by the index
+INDEX_ROOT = "Jobs"
+
+# Lookups older than this trigger an incremental delta sync first
+DELTA_SYNC_INTERVAL = 30
+
+DELTA_SELECT = "id,name,parentReference,folder,file,eTag,cTag,size,deleted"
+
+
+class DriveIndex:
+    """
+    Local metadata index of the INDEX_ROOT subtree, kept current with the drive delta API.
+
+    The first sync lists the whole subtree; later syncs send the stored deltaLink and only
+    receive what changed since. Items are stored by id with their parent id (delta responses
+    do not carry paths), and a lowercased path -> id map answers existence, eTag and listing
+    lookups without a Graph call. The index and deltaLink are kept on disk across restarts.
+    """
+
+    def __init__(self, path=None, root=INDEX_ROOT):
+        self.path = path
+        self.root = root
+        self._lock = threading.RLock()
+        self._items = {}        # id -> {"name", "parent", "folder", "eTag", "cTag", "size"}
+        self._root_id = None
+        self._delta_link = None
+        self._by_path = {}      # lowercased path -> id
+        self._children = {}     # folder id -> [child ids]
+        self.synced_at = 0.0
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                if state.get("root") == root:
+                    self._items = state["items"]
+                    self._root_id = state["root_id"]
+                    self._delta_link = state["delta_link"]
+                    self._rebuild_paths()
+            except (OSError, ValueError, KeyError):
+                self._items, self._root_id, self._delta_link = {}, None, None
+
+    # --- Sync ---
+
+    @traced("DriveIndex.sync")
+    def sync(self, access_token) -> int:
+        """
+        Applies the changes since the last sync (everything on the first one).
+
+        Returns:
+        - number of changed items received
+        """
+        with self._lock:
+            if self._delta_link is None:
+                self._reset(access_token)
+
+            client = get_graph_client()
+            url = self._delta_link or client.drive_url(self.root, "/delta")
+            params = None if self._delta_link else {"$select": DELTA_SELECT}
+            changed = 0
+
+            while url:
+                try:
+                    resp = client.get(url, access_token, params=params)
+                except requests.exceptions.RequestException as e:
+                    raise Exception(f"🔌 Network error while syncing drive index: {e}")
+
+                if resp.status_code == 410:
+                    # Delta token expired: start over with a full listing
+                    self._reset(access_token)
+                    url, params, changed = client.drive_url(self.root, "/delta"), {"$select": DELTA_SELECT}, 0
+                    continue
+                if resp.status_code != 200:
+                    raise Exception(f"❌ Failed to sync drive index: {resp.status_code} - {resp.text}")
+
+                page = resp.json()
+                for item in page.get("value", []):
+                    self._apply(item)
+                    changed += 1
+
+                url, params = page.get("@odata.nextLink"), None
+                if "@odata.deltaLink" in page:
+                    self._delta_link = page["@odata.deltaLink"]
+
+            if changed:
+                self._rebuild_paths()
+            self.synced_at = time.time()
+            self._persist()
+            return changed
+
+    def sync_if_stale(self, access_token, max_age=DELTA_SYNC_INTERVAL):
+        if time.time() - self.synced_at >= max_age:
+            self.sync(access_token)
+
+    def invalidate(self):
+        """
+        Makes the next lookup sync first, e.g. after this app created items.
+        """
+        self.synced_at = 0.0
+
+    def _reset(self, access_token):
+        root_item = get_drive_item(access_token, self.root, select="id")
+        if not root_item:
+            raise Exception(f"❌ Folder not found: {self.root}")
+        self._items, self._by_path, self._children = {}, {}, {}
+        self._root_id = root_item["id"]
+        self._delta_link = None
+
+    def _apply(self, item):
+        if "deleted" in item:
+            self._items.pop(item["id"], None)  # Orphaned children are dropped by _rebuild_paths
+            return
+        self._items[item["id"]] = {
+            "name": item.get("name"),
+            "parent": (item.get("parentReference") or {}).get("id"),
+            "folder": "folder" in item,
+            "eTag": item.get("eTag"),
+            "cTag": item.get("cTag"),
+            "size": item.get("size"),
+        }
+
+    def _rebuild_paths(self):
+        children = {}
+        for item_id, item in self._items.items():
+            children.setdefault(item["parent"], []).append(item_id)
+
+        by_path = {}
+        reachable = set()
+        if self._root_id in self._items:
+            stack = [(self._root_id, self.root)]
+            while stack:
+                item_id, path = stack.pop()
+                by_path[path.lower()] = item_id
+                reachable.add(item_id)
+                for child_id in children.get(item_id, []):
+                    stack.append((child_id, f"{path}/{self._items[child_id]['name']}"))
+
+        self._items = {item_id: self._items[item_id] for item_id in reachable}
+        self._children = {parent: ids for parent, ids in children.items() if parent in reachable}
+        self._by_path = by_path
+
+    def _persist(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "root": self.root,
+                "root_id": self._root_id,
+                "delta_link": self._delta_link,
+                "items": self._items,
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    # --- Lookups ---
+
+    def covers(self, path: str) -> bool:
+        """
+        True if the path lies inside the indexed subtree.
+        """
+        path = path.strip("/").lower()
+        root = self.root.lower()
+        return path == root or path.startswith(root + "/")
+
+    def get(self, path: str):
+        """
+        Returns the item's metadata ({"id", "name", "folder", "eTag", "cTag", "size"}) or None.
+        """
+        with self._lock:
+            item_id = self._by_path.get(path.strip("/").lower())
+            if item_id is None:
+                return None
+            return {"id": item_id, **self._items[item_id]}
+
+    def exists(self, path: str) -> bool:
+        return self.get(path) is not None
+
+    def list(self, folder_path: str) -> list:
+        """
+        Returns the metadata of a folder's direct children (empty if the folder is unknown).
+        """
+        with self._lock:
+            folder_id = self._by_path.get(folder_path.strip("/").lower())
+            return [{"id": child_id, **self._items[child_id]} for child_id in self._children.get(folder_id, [])]
+
+
+@st.cache_resource
+def get_drive_index() -> DriveIndex:
+    return DriveIndex(local_cache_path("drive_index.json"))
+
+
+@traced()
+def lookup_drive_items(access_token, paths: list, max_age=DELTA_SYNC_INTERVAL):
+    """
+    Answers existence checks for several paths from the drive index, syncing it first if it is stale.
+
+    Returns:
+    - {path: item metadata or None}, or None when the index cannot answer (path outside the
+      indexed subtree, the sync failed, or the storage backend is not Graph); callers then
+      fall back to direct lookups
+    """
+    if not is_graph_storage():
+        return None  # Local lookups are as cheap as the index
+
+    index = get_drive_index()
+    if not all(index.covers(path) for path in paths):
+        return None
+    try:
+        index.sync_if_stale(access_token, max_age)
+    except Exception as e:
+        # Shows up on this span in the trace panel; the caller checks OneDrive directly
+        annotate(index="sync failed", error=str(e)[:200])
+        return None
+    return {path: index.get(path) for path in paths}
+
+
+@traced()
+def list_folder(access_token, folder_path: str, max_age=DELTA_SYNC_INTERVAL) -> list:
+    """
+    Returns the items directly inside a folder, from the drive index when it covers the folder.
+    """
+    if is_graph_storage() and get_drive_index().covers(folder_path):
+        index = get_drive_index()
+        try:
+            index.sync_if_stale(access_token, max_age)
+        except Exception as e:
+            # Shows up on this span in the trace panel; the listing is served from the last sync
+            annotate(index="sync failed", error=str(e)[:200])
+        return index.list(folder_path)
+    return get_storage().list(access_token, folder_path)
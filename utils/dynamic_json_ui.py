@@ -1,9 +1,32 @@
 import streamlit as st
 import datetime
-from utils.helpers import upload_json_to_onedrive
+from utils.bullet_journal import get_bullet_journal
+from utils.bullet_index import BulletIndex
 
-def render_dynamic_form(schema_with_values: dict, bullets_dict: dict, bullet_upload_path):
-    result = {}
+def render_dynamic_form(schema_with_values: dict, bullets_dict: dict, bullet_upload_path, bullet_index: BulletIndex):
+    """
+    Renders the placeholder form. The fields block and every bullet editor are fragments, so
+    interacting with them reruns only that part of the page (no token, provisioning or JSON loads).
+    Widget values live in st.session_state; read them with collect_form_values().
+    """
+    render_fields(schema_with_values)
+
+    # Pass 2: Bullet fields
+    st.markdown("### 🧑‍💻 Bullet Points")
+
+    for key, field in schema_with_values.items():
+        field_type = field["type"]
+        label = field.get("label", key.capitalize())
+        default = field.get("value", "")
+
+        if field_type in ["textarea", "bullets"]:
+            render_bullet_editor(key, label, default, bullets_dict, bullet_upload_path, bullet_index)
+
+    return collect_form_values(schema_with_values)
+
+
+@st.fragment
+def render_fields(schema_with_values: dict):
     col1, col2 = st.columns(2)
     col_toggle = True
 
@@ -15,61 +38,89 @@ def render_dynamic_form(schema_with_values: dict, bullets_dict: dict, bullet_upl
 
         if field_type in ["text", "select", "date"]:
             with (col1 if col_toggle else col2):
-                result[key] = render_field(field_type, label, default, key)
+                render_field(field_type, label, default, key)
             col_toggle = not col_toggle
 
-    # Pass 2: Bullet fields
-    st.markdown("### 🧑‍💻 Bullet Points")
 
+@st.fragment
+def render_bullet_editor(key, label, default, bullets_dict: dict, bullet_upload_path, bullet_index: BulletIndex):
+    """
+    One bullet field: category, save button, browse popover and text area, rerunning on its own.
+    """
+    with st.container(border=True):
+        st.markdown(f"**{label}**")
+
+        # Category + buttons row
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            st.selectbox(
+                "Category",
+                ["Select category", "Frontend", "Backend", "DevOps", "Cloud", "Metrics", "Database"],
+                key=f"{key}_cat",
+                label_visibility="collapsed"
+            )
+        with col2:
+            if st.button("💾 Save", key=f"{key}_save"):
+                save_bullet_to_bank(
+                    key=key,
+                    bullets_dict=bullets_dict,
+                    upload_path=bullet_upload_path,
+                    access_token=st.session_state["token"],
+                    bullet_index=bullet_index
+                )
+
+        with col3:
+            bullet_browse_popover(key, bullet_index)
+
+        # Text area
+        st.text_area(
+            label="test", value=default, height=70,
+            key=f"{key}_area", label_visibility="collapsed"
+        )
+
+
+def collect_form_values(schema_with_values: dict) -> dict:
+    """
+    Reads the current form values from st.session_state (fragment reruns do not return values).
+    """
+    result = {}
     for key, field in schema_with_values.items():
         field_type = field["type"]
-        label = field.get("label", key.capitalize())
         default = field.get("value", "")
 
-        if field_type in ["textarea", "bullets"]:
-            with st.container(border=True):
-                st.markdown(f"**{label}**")
-
-                # Category + buttons row
-                col1, col2, col3 = st.columns([2, 1, 1])
-                with col1:
-                    st.selectbox(
-                        "Category",
-                        ["Select category", "Frontend", "Backend", "DevOps", "Cloud", "Metrics", "Database"],
-                        key=f"{key}_cat",
-                        label_visibility="collapsed"
-                    )
-                with col2:
-                    if st.button("💾 Save", key=f"{key}_save"):
-                        save_bullet_to_bank(
-                            key=key,
-                            bullets_dict=bullets_dict,
-                            upload_path=bullet_upload_path,
-                            access_token=st.session_state["token"]
-                        )
-
-                with col3:
-                    bullet_browse_popover(key, bullets_dict)
-
-                # Text area
-                result[key] = st.text_area(
-                    label="test", value=default, height=70,
-                    key=f"{key}_area", label_visibility="collapsed"
-                )
-
+        if field_type == "text":
+            result[key] = st.session_state.get(f"{key}_text", default)
+        elif field_type == "select":
+            result[key] = st.session_state.get(f"{key}_select")
+        elif field_type == "date":
+            selected_date = st.session_state.get(f"{key}_date")
+            if selected_date:
+                result[key] = selected_date.strftime("%d.%B.%Y")
+        elif field_type in ["textarea", "bullets"]:
+            result[key] = st.session_state.get(f"{key}_area", default)
     return result
 
 
+def reset_form_state(schema_with_values: dict):
+    """
+    Drops the widget state of a form, e.g. when switching to another job or document.
+    """
+    for key in schema_with_values:
+        for suffix in ["_text", "_select", "_date", "_area", "_cat", "_search", "_search_all", "_page", "_last_search"]:
+            st.session_state.pop(f"{key}{suffix}", None)
+
+
 def render_field(field_type, label, default, key):
     if field_type == "text":
-        return st.text_input(label, value=default)
+        return st.text_input(label, value=default, key=f"{key}_text")
 
     elif field_type == "select":
         return st.selectbox(
             label,
             options=default.get("options", []) if isinstance(default, dict) else [],
             index=default.get("options", []).index(default)
-            if isinstance(default, dict) and default in default.get("options", []) else 0
+            if isinstance(default, dict) and default in default.get("options", []) else 0,
+            key=f"{key}_select"
         )
 
     elif field_type == "date":
@@ -82,10 +133,11 @@ def render_field(field_type, label, default, key):
         return selected_date.strftime("%d.%B.%Y")
 
 
-def bullet_browse_popover(key: str, bullets_dict: dict):
+def bullet_browse_popover(key: str, bullet_index: BulletIndex):
     """
     Show bullet bank popover based on selected category.
-    On select, updates corresponding text area and reruns.
+    Search and paging go through the bullet index, so only the visible page of bullets is rendered.
+    On select, updates corresponding text area and reruns the bullet editor fragment it lives in.
     """
     category = st.session_state.get(f"{key}_cat", None)
 
@@ -94,47 +146,74 @@ def bullet_browse_popover(key: str, bullets_dict: dict):
         return
 
     with st.popover(f"📚 {category} Bullets"):
-        st.markdown("**Click a bullet to use it**")
-        for idx, bullet in enumerate(bullets_dict.get(category, [])):
+        query = st.text_input("Search bullets", key=f"{key}_search", placeholder="🔍 Search...")
+        search_all = st.checkbox("All categories", key=f"{key}_search_all")
+
+        matches = bullet_index.search(query, category=None if search_all else category)
+        page_key = f"{key}_page"
+        if st.session_state.get(f"{key}_last_search") != (query, search_all, category):
+            st.session_state[f"{key}_last_search"] = (query, search_all, category)
+            st.session_state[page_key] = 0
+        results, pages = bullet_index.page(matches, st.session_state.get(page_key, 0))
+
+        st.markdown(f"**Click a bullet to use it** ({len(matches)} found)")
+        for idx, (bullet_category, bullet) in enumerate(results):
             col1, col2 = st.columns([10, 1])
             with col1:
-                st.markdown(f"• {bullet}")
+                prefix = f"`{bullet_category}` " if search_all else ""
+                st.markdown(f"• {prefix}{bullet}")
             with col2:
                 if st.button("➕", key=f"{key}_use_{idx}"):
                     st.session_state[f"{key}_area"] = bullet
-                    st.rerun()
+                    st.rerun(scope="fragment")
+
+        if pages > 1:
+            page = min(st.session_state.get(page_key, 0), pages - 1)
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if st.button("◀", key=f"{key}_prev", disabled=page == 0):
+                    st.session_state[page_key] = page - 1
+                    st.rerun(scope="fragment")
+            with col2:
+                st.caption(f"Page {page + 1} of {pages}")
+            with col3:
+                if st.button("▶", key=f"{key}_next", disabled=page >= pages - 1):
+                    st.session_state[page_key] = page + 1
+                    st.rerun(scope="fragment")
 
 
-def save_bullet_to_bank(key: str, bullets_dict: dict, upload_path: str, access_token: str):
+def save_bullet_to_bank(key: str, bullets_dict: dict, upload_path: str, access_token: str, bullet_index: BulletIndex):
     """
-    Saves a bullet point from the UI into the correct category of bullets_dict and uploads to OneDrive.
+    Saves a bullet point from the UI into the correct category of bullets_dict and queues it for OneDrive.
 
     Parameters:
     - key: Unique key for the bullet field
     - bullets_dict: Dictionary holding bullets grouped by category
     - upload_path: Path to bullet bank file in OneDrive
     - access_token: MS Graph access token
+    - bullet_index: index of the bank, used for the duplicate check
     """
     category = st.session_state.get(f"{key}_cat")
     bullet_text = st.session_state.get(f"{key}_area", "").strip()
 
     if category and category != "Select category" and bullet_text:
         bullets_dict.setdefault(category, [])
-        if bullet_text not in bullets_dict[category]:
-            bullets_dict[category].append(bullet_text)
-            st.success(f"✅ Bullet saved to '{category}'")
-
-            try:
-                upload_json_to_onedrive(
-                    access_token=access_token,
-                    data=bullets_dict,
-                    filepath=upload_path
-                )
-            except Exception as e:
-                st.error("❌ Failed to upload bullet bank.")
-                st.code(str(e))
-        else:
+        if bullet_index.contains(category, bullet_text):
             st.info("ℹ️ Bullet already exists in that category.")
+            return
+
+        try:
+            # Journaled locally and merged into OneDrive in the background (see utils/bullet_journal.py)
+            get_bullet_journal().append(access_token, upload_path, category, bullet_text)
+        except Exception as e:
+            # Nothing recorded, so saving again retries instead of reporting a duplicate
+            st.error("❌ Failed to save bullet.")
+            st.code(str(e))
+            return
+
+        bullet_index.add(category, bullet_text)
+        bullets_dict[category].append(bullet_text)
+        st.success(f"✅ Bullet saved to '{category}'")
     else:
         st.warning("⚠️ Please enter text and select a valid category.")
 
@@ -0,0 +1,149 @@
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib.parse import quote
+from utils.graph_client import get_graph_client
+from utils.rate_limit import RETRY_STATUSES, IDEMPOTENT_METHODS
+from utils.tracing import traced, annotate
+
+# Graph accepts at most 20 sub-requests per $batch call
+MAX_BATCH_SIZE = 20
+
+
+class BatchResponse:
+    """
+    One sub-response of a $batch call.
+    """
+
+    def __init__(self, raw: dict):
+        self.id = raw.get("id")
+        self.status_code = raw.get("status", 0)
+        self.headers = CaseInsensitiveDict(raw.get("headers") or {})
+        self.body = raw.get("body")
+
+    def json(self):
+        return self.body
+
+    @property
+    def text(self):
+        return str(self.body)
+
+
+def batch_drive_url(filepath: str, suffix: str = "") -> str:
+    """
+    Relative, URL-encoded drive path for use inside a $batch sub-request.
+    """
+    path = f"/me/drive/root:/{quote(filepath, safe='/')}"
+    return f"{path}:{suffix}" if suffix else path
+
+
+@traced()
+def send_batch(access_token, sub_requests: list) -> list:
+    """
+    Sends sub-requests through the Graph $batch endpoint, 20 per HTTP call.
+
+    Graph throttles every sub-request on its own, so a 200 batch can hold 429s. Those (and 503/504
+    for GET) are sent again with the client's retry policy, honoring their Retry-After, together with
+    the sub-requests that failed only because they depended on one of them (424).
+
+    Parameters:
+    - access_token: Microsoft Graph token
+    - sub_requests: list of dicts with "method" and "url" (relative to the Graph version root),
+      plus optional "headers", "body" and "dependsOn" (indexes into the same list)
+
+    Returns:
+    - list of BatchResponse, in the same order as sub_requests
+    """
+    client = get_graph_client()
+    policy = client.retry_policy
+    responses = [None] * len(sub_requests)
+    retries = 0
+
+    for chunk_start in range(0, len(sub_requests), MAX_BATCH_SIZE):
+        indexes = list(range(chunk_start, min(chunk_start + MAX_BATCH_SIZE, len(sub_requests))))
+        for index in indexes:
+            if any(i < chunk_start for i in sub_requests[index].get("dependsOn", [])):
+                raise Exception("❌ $batch dependencies must be in the same chunk of 20 requests.")
+
+        attempt = 0
+        while True:
+            for index, response in _post_batch(client, access_token, sub_requests, indexes).items():
+                responses[index] = response
+
+            resend = _to_resend(sub_requests, indexes, responses)
+            if not resend or attempt >= policy.max_retries:
+                break
+
+            throttled = [responses[i] for i in resend if responses[i].status_code in RETRY_STATUSES]
+            delay = max(policy.delay(attempt, response) for response in throttled)
+            if any(response.status_code == 429 for response in throttled):
+                client.rate_limiter.pause(delay)  # Held back like any throttled call (see GraphClient.request)
+            else:
+                policy.sleep(delay)
+            indexes = resend
+            attempt += 1
+            retries += 1
+
+    if retries:
+        annotate(batch_retries=retries)
+    return responses
+
+
+def _post_batch(client, access_token, sub_requests: list, indexes: list) -> dict:
+    """
+    Sends one $batch call with the given sub-requests. Returns {index: BatchResponse}.
+    """
+    sending = set(indexes)
+    payload = []
+    for index in indexes:
+        sub = sub_requests[index]
+        entry = {
+            "id": str(index),
+            "method": sub.get("method", "GET"),
+            "url": sub["url"],
+        }
+        if "body" in sub:
+            entry["body"] = sub["body"]
+            entry["headers"] = {"Content-Type": "application/json", **sub.get("headers", {})}
+        elif sub.get("headers"):
+            entry["headers"] = sub["headers"]
+        # On a resend, dependencies that already succeeded are not part of the batch any more
+        depends_on = [str(i) for i in sub.get("dependsOn", []) if i in sending]
+        if depends_on:
+            entry["dependsOn"] = depends_on
+        payload.append(entry)
+
+    try:
+        # A batch of reads can be resent safely, one with writes only on throttling
+        read_only = all(entry["method"] == "GET" for entry in payload)
+        resp = client.post("$batch", access_token, json={"requests": payload}, retry=read_only or None)
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"🔌 Network error while sending batch request: {e}")
+
+    if resp.status_code != 200:
+        raise Exception(f"❌ Batch request failed: {resp.status_code} - {resp.text}")
+
+    results = {}
+    for raw in resp.json().get("responses", []):
+        if raw.get("id") is not None and int(raw["id"]) in sending:
+            results[int(raw["id"])] = BatchResponse(raw)
+
+    missing = [index for index in indexes if index not in results]
+    if missing:
+        raise Exception(f"❌ Batch response is missing sub-request(s) {', '.join(map(str, missing))}.")
+    return results
+
+
+def _to_resend(sub_requests: list, indexes: list, responses: list) -> list:
+    """
+    Indexes to send again: throttled sub-requests (429, or 503/504 for idempotent methods)
+    and the ones that failed because something they depend on is sent again.
+    """
+    resend = []
+    for index in indexes:
+        status = responses[index].status_code
+        method = sub_requests[index].get("method", "GET").upper()
+        if status == 429 or (status in RETRY_STATUSES and method in IDEMPOTENT_METHODS):
+            resend.append(index)
+        elif status == 424 and any(i in resend for i in sub_requests[index].get("dependsOn", [])):
+            resend.append(index)
+    return resend
@@ -0,0 +1,159 @@
+import os
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+from utils.rate_limit import TokenBucket, RetryPolicy, RETRY_STATUSES, IDEMPOTENT_METHODS
+from utils.tracing import trace_span
+
+GRAPH_BASE_URL = os.environ.get("GRAPH_BASE_URL", "https://graph.microsoft.com/v1.0")
+
+# Keep-alive pool settings shared by every Graph call in utils/
+POOL_SIZE = int(os.environ.get("GRAPH_POOL_SIZE", "10"))
+DEFAULT_TIMEOUT = 10   # seconds, used when a call does not pass its own timeout
+LONG_TIMEOUT = 60      # seconds, for uploads and PDF conversion
+
+
+class GraphClient:
+    """
+    Thin wrapper around a pooled requests.Session for Microsoft Graph.
+
+    Every helper in utils/ goes through one instance of this class so that
+    connections to graph.microsoft.com are reused across calls and reruns.
+    All requests share one token bucket and are retried on throttling (see utils/rate_limit.py).
+    """
+
+    def __init__(self, base_url=GRAPH_BASE_URL, pool_size=POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 rate_limiter=None, retry_policy=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or TokenBucket()
+        self.retry_policy = retry_policy or RetryPolicy()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def url(self, path: str) -> str:
+        """
+        Builds an absolute Graph URL. Absolute URLs (e.g. monitor or upload URLs) are returned as is.
+        """
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _trace_name(self, url: str) -> str:
+        """
+        Graph path without the query string; pre-authenticated URLs keep only their host (they embed tokens).
+        """
+        absolute = self.url(url)
+        if absolute.startswith(self.base_url):
+            return urlsplit(absolute).path[len(urlsplit(self.base_url).path):]
+        return urlsplit(absolute).netloc
+
+    def drive_url(self, filepath: str, suffix: str = "") -> str:
+        """
+        Builds a path-addressed drive item URL, e.g. drive_url("Jobs/JobTracker.xlsx", "/content").
+        """
+        if suffix:
+            return self.url(f"me/drive/root:/{filepath}:{suffix}")
+        return self.url(f"me/drive/root:/{filepath}")
+
+    def request(self, method: str, url: str, access_token=None, headers=None, timeout=None, retry=None, **kwargs):
+        """
+        Sends a request through the pooled session, waiting for the shared rate limiter.
+
+        429 responses are always retried (Graph rejected the request without running it).
+        503/504 responses, timeouts and connection errors are retried for idempotent methods,
+        or for any method when retry=True; retry=False disables retries. Delays use exponential
+        backoff with jitter, or the Retry-After header when Graph sends one.
+
+        Parameters:
+        - method: HTTP method
+        - url: absolute URL or a path relative to the Graph base URL
+        - access_token: Microsoft Graph token (omit for pre-authenticated URLs)
+        - headers: extra headers merged on top of the Authorization header
+        - timeout: overrides the client default timeout
+        - retry: None (decide by method), True or False
+        """
+        all_headers = {}
+        if access_token:
+            all_headers["Authorization"] = f"Bearer {access_token}"
+        if headers:
+            all_headers.update(headers)
+
+        policy = self.retry_policy
+        retry_failures = method.upper() in IDEMPOTENT_METHODS if retry is None else retry
+
+        # File-like bodies are rewound before a retry; other streams cannot be sent twice
+        body = kwargs.get("data")
+        body_start = None
+        if hasattr(body, "read"):
+            body_start = body.tell() if hasattr(body, "seek") else None
+        replayable = body is None or (not hasattr(body, "read") and not hasattr(body, "__next__")) or body_start is not None
+
+        attempt = 0
+        with trace_span(f"{method.upper()} {self._trace_name(url)}", kind="http") as span:
+            while True:
+                if attempt and body_start is not None:
+                    body.seek(body_start)
+                self.rate_limiter.acquire()
+
+                can_retry = retry is not False and replayable and attempt < policy.max_retries
+                try:
+                    response = self.session.request(
+                        method,
+                        self.url(url),
+                        headers=all_headers,
+                        timeout=timeout or self.timeout,
+                        **kwargs
+                    )
+                except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                    if not (can_retry and retry_failures):
+                        raise
+                    policy.sleep(policy.delay(attempt))
+                    attempt += 1
+                    span["retries"] = attempt
+                    continue
+
+                status = response.status_code
+                if not can_retry or status not in RETRY_STATUSES or (status != 429 and not retry_failures):
+                    span["status"] = status
+                    span["bytes_out"] = int(response.request.headers.get("Content-Length") or 0)
+                    span["bytes_in"] = int(response.headers.get("Content-Length") or 0)
+                    return response
+
+                delay = policy.delay(attempt, response)
+                if status == 429:
+                    # Throttled: hold back every session of this process, not just this call
+                    self.rate_limiter.pause(delay)
+                else:
+                    policy.sleep(delay)
+                response.close()
+                attempt += 1
+                span["retries"] = attempt
+
+    def get(self, url, access_token=None, **kwargs):
+        return self.request("GET", url, access_token, **kwargs)
+
+    def put(self, url, access_token=None, **kwargs):
+        return self.request("PUT", url, access_token, **kwargs)
+
+    def post(self, url, access_token=None, **kwargs):
+        return self.request("POST", url, access_token, **kwargs)
+
+    def patch(self, url, access_token=None, **kwargs):
+        return self.request("PATCH", url, access_token, **kwargs)
+
+    def delete(self, url, access_token=None, **kwargs):
+        return self.request("DELETE", url, access_token, **kwargs)
+
+
+@st.cache_resource
+def get_graph_client(pool_size: int = POOL_SIZE, timeout: int = DEFAULT_TIMEOUT) -> GraphClient:
+    """
+    Returns the process-wide GraphClient. Created once per server process, not once per rerun.
+    """
+    return GraphClient(pool_size=pool_size, timeout=timeout)
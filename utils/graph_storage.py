@@ -0,0 +1,306 @@
+import os
+import time
+import requests
+from utils.graph_client import get_graph_client
+from utils.graph_batch import send_batch, batch_drive_url
+from utils.upload_session import upload_file
+from utils.download_stream import download_to_spool
+from utils.workbook_session import get_workbook_sessions
+from utils.storage import StorageBackend, DEFAULT_SELECT, resolve_row_keys
+
+# "server" uses the drive's server-side copy action, "download" pulls the file and uploads it again
+COPY_MODE = os.environ.get("GRAPH_COPY_MODE", "server")
+
+
+class CopyPollPolicy:
+    """
+    How to poll the monitor URL of a server-side copy: exponential backoff between
+    interval and max_interval, giving up after timeout seconds.
+    """
+
+    def __init__(self, interval=0.5, backoff=1.5, max_interval=4.0, timeout=60.0, sleep=time.sleep):
+        self.interval = interval
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self.sleep = sleep
+
+    def delays(self):
+        waited = 0.0
+        delay = self.interval
+        while waited < self.timeout:
+            yield delay
+            waited += delay
+            delay = min(delay * self.backoff, self.max_interval)
+
+
+class GraphStorage(StorageBackend):
+    """
+    OneDrive through Microsoft Graph: path-addressed drive items, $batch lookups, upload sessions,
+    server-side copies, format=pdf conversion and workbook sessions for Excel tables.
+    """
+
+    name = "graph"
+
+    def __init__(self, copy_mode=COPY_MODE, poll_policy=None):
+        self.copy_mode = copy_mode
+        self.poll_policy = poll_policy or CopyPollPolicy()
+
+    def stat(self, access_token, path: str, select: str = DEFAULT_SELECT):
+        client = get_graph_client()
+        response = client.get(client.drive_url(path), access_token, params={"$select": select})
+
+        if response.status_code == 200:
+            return response.json()
+        elif response.status_code == 404:
+            return None
+        else:
+            raise Exception(f"❌ Failed to fetch item metadata: {response.status_code} - {response.text}")
+
+    def stat_many(self, access_token, paths: list, select: str = DEFAULT_SELECT) -> dict:
+        # Up to 20 paths per HTTP call
+        responses = send_batch(access_token, [
+            {"method": "GET", "url": f"{batch_drive_url(path)}?$select={select}"}
+            for path in paths
+        ])
+
+        items = {}
+        for path, response in zip(paths, responses):
+            if response.status_code == 200:
+                items[path] = response.json()
+            elif response.status_code == 404:
+                items[path] = None
+            else:
+                raise Exception(f"❌ Failed to check {path}: {response.status_code} - {response.text}")
+        return items
+
+    def read(self, access_token, path: str, item=None, max_size=None):
+        # A pre-authenticated download URL from stat() saves resolving the path again
+        download_url = (item or {}).get("@microsoft.graph.downloadUrl")
+        return download_to_spool(
+            access_token, path, max_size=max_size,
+            error_message=f"Failed to download {path}", download_url=download_url
+        )
+
+    def write(self, access_token, path: str, stream, content_type: str, progress_callback=None, if_match=None):
+        upload_file(access_token, path, stream, content_type, progress_callback, if_match)
+
+    def mkdir(self, access_token, path: str):
+        client = get_graph_client()
+
+        parent_path = "/".join(path.split("/")[:-1])
+        folder_name = path.split("/")[-1]
+
+        url = client.drive_url(parent_path, "/children") if parent_path else client.url("me/drive/root/children")
+        payload = {
+            "name": folder_name,
+            "folder": {},
+            "@microsoft.graph.conflictBehavior": "fail"
+        }
+        create_resp = client.post(url, access_token, json=payload)
+        if create_resp.status_code == 409:
+            return  # Created in the meantime by another session
+        create_resp.raise_for_status()
+
+    def copy(self, access_token, source_path: str, target_path: str, mode=None, poll_policy=None):
+        """
+        Copies inside the drive with the copy action (the file never leaves OneDrive),
+        falling back to download + upload when server-side copy is not available.
+        """
+        if (mode or self.copy_mode) == "server" and self._server_side_copy(access_token, source_path, target_path, poll_policy):
+            return
+
+        # The upload below would replace an existing target, which copy() must leave alone
+        if self.exists(access_token, target_path):
+            return
+
+        # ⬇ Step 1: Download file from source
+        file_stream = download_to_spool(access_token, source_path, error_message=f"Failed to download {source_path}")
+
+        # ⬆ Step 2: Upload to target folder
+        with file_stream:
+            upload_file(access_token, target_path, file_stream, "application/octet-stream")
+
+    def _server_side_copy(self, access_token, source_path, target_path, poll_policy=None) -> bool:
+        """
+        Returns True if the file was copied (or already exists), False if the caller should fall back.
+        """
+        client = get_graph_client()
+        poll_policy = poll_policy or self.poll_policy
+        target_folder, file_name = target_path.rsplit("/", 1)
+
+        copy_url = client.drive_url(source_path, "/copy")
+        payload = {
+            "parentReference": {"path": f"/drive/root:/{target_folder}"},
+            "name": file_name,
+        }
+        copy_resp = client.post(copy_url, access_token, json=payload)
+
+        if copy_resp.status_code == 409:
+            return True  # Name conflict: the file is already in the target folder
+        if copy_resp.status_code == 404:
+            raise Exception(f"❌ Failed to copy {file_name}: {copy_resp.status_code} - {copy_resp.text}")
+        if copy_resp.status_code != 202 or "Location" not in copy_resp.headers:
+            return False
+
+        # The monitor URL is pre-authenticated, so no token is sent with it
+        monitor_url = copy_resp.headers["Location"]
+        for delay in poll_policy.delays():
+            monitor_resp = client.get(monitor_url, allow_redirects=False)
+
+            if monitor_resp.status_code == 303:
+                return True  # Redirects to the new item once the copy is done
+            if monitor_resp.status_code not in [200, 202]:
+                return False
+
+            status = monitor_resp.json().get("status")
+            if status == "completed":
+                return True
+            if status == "failed":
+                return False
+
+            poll_policy.sleep(delay)
+
+        raise Exception(f"⏱️ Timed out waiting for the copy of {file_name} to finish.")
+
+    def list(self, access_token, folder_path: str) -> list:
+        client = get_graph_client()
+        url = client.drive_url(folder_path, "/children")
+        params = {"$select": "id,name,eTag,cTag,size,folder,file", "$top": 200}
+        items = []
+
+        while url:
+            try:
+                resp = client.get(url, access_token, params=params)
+            except requests.exceptions.RequestException as e:
+                raise Exception(f"🔌 Network error while listing {folder_path}: {e}")
+            if resp.status_code == 404:
+                return []
+            if resp.status_code != 200:
+                raise Exception(f"❌ Failed to list {folder_path}: {resp.status_code} - {resp.text}")
+            page = resp.json()
+            items.extend(page.get("value", []))
+            url, params = page.get("@odata.nextLink"), None
+        return items
+
+    def convert_to_pdf(self, access_token, path: str):
+        return download_to_spool(access_token, path, "/content?format=pdf", error_message="Failed to download DOCX as PDF")
+
+    def append_rows(self, access_token, path: str, table_name: str, values: list):
+        # Rows are added inside the workbook's persistent session (see utils/workbook_session.py)
+        try:
+            append_resp = get_workbook_sessions().request(
+                access_token,
+                path,
+                "POST",
+                f"/tables/{table_name}/rows/add",
+                json={"values": values}
+            )
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"🔌 Network error while appending rows: {e}")
+
+        if append_resp.status_code not in [200, 201]:
+            raise Exception(f"❌ Failed to append rows: {append_resp.status_code} - {append_resp.text}")
+
+    def update_rows(self, access_token, path: str, table_name: str, changes: dict, key_column=None):
+        sessions = get_workbook_sessions()
+
+        # 1. Locate the table: worksheet, first column and header row
+        try:
+            header_resp = sessions.request(
+                access_token,
+                path,
+                "GET",
+                f"/tables/{table_name}/headerRowRange",
+                params={"$select": "address,values"}
+            )
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"🔌 Network error while reading table header: {e}")
+
+        if header_resp.status_code != 200:
+            raise Exception(f"❌ Failed to read table header: {header_resp.status_code} - {header_resp.text}")
+
+        header = header_resp.json()
+        sheet, first_cell = header["address"].split(":")[0].split("!")
+        sheet = sheet.strip("'")
+        first_col, header_row = _split_cell_address(first_cell)
+        column_names = header["values"][0]
+
+        # 2. Rows addressed by ID: find where they are now (rows may have been added, deleted or sorted)
+        if key_column is not None:
+            try:
+                key_resp = sessions.request(
+                    access_token,
+                    path,
+                    "GET",
+                    f"/tables/{table_name}/columns('{key_column}')/dataBodyRange",
+                    params={"$select": "values"}
+                )
+            except requests.exceptions.RequestException as e:
+                raise Exception(f"🔌 Network error while reading the {key_column} column: {e}")
+
+            if key_resp.status_code != 200:
+                raise Exception(f"❌ Failed to read the {key_column} column: {key_resp.status_code} - {key_resp.text}")
+            changes = resolve_row_keys([row[0] for row in key_resp.json()["values"]], changes)
+
+        # 3. PATCH each run of adjacent changed cells in a row as one range
+        for position, row_changes in changes.items():
+            excel_row = header_row + 1 + position
+            for start, values in _contiguous_runs(row_changes, column_names):
+                start_col = _column_letter(first_col + start)
+                end_col = _column_letter(first_col + start + len(values) - 1)
+                address = f"{start_col}{excel_row}:{end_col}{excel_row}"
+
+                try:
+                    resp = sessions.request(
+                        access_token,
+                        path,
+                        "PATCH",
+                        f"/worksheets('{sheet}')/range(address='{address}')",
+                        json={"values": [values]},
+                        retry=True  # Writing the same values twice is harmless
+                    )
+                except requests.exceptions.RequestException as e:
+                    raise Exception(f"🔌 Network error while updating {address}: {e}")
+
+                if resp.status_code != 200:
+                    raise Exception(f"❌ Failed to update {address}: {resp.status_code} - {resp.text}")
+
+
+def _contiguous_runs(row_changes: dict, column_names: list):
+    """
+    Groups changed columns into runs of adjacent table columns: [(start index, [values...]), ...]
+    """
+    indexed = []
+    for col, value in row_changes.items():
+        if col not in column_names:
+            raise Exception(f"❌ Column '{col}' not found in Excel table.")
+        indexed.append((column_names.index(col), value))
+    indexed.sort()
+
+    runs = []
+    for index, value in indexed:
+        if runs and runs[-1][0] + len(runs[-1][1]) == index:
+            runs[-1][1].append(value)
+        else:
+            runs.append((index, [value]))
+    return runs
+
+
+def _split_cell_address(cell: str):
+    """
+    "B3" -> (2, 3) with a 1-based column number
+    """
+    letters = "".join(ch for ch in cell if ch.isalpha())
+    number = 0
+    for ch in letters.upper():
+        number = number * 26 + (ord(ch) - ord("A") + 1)
+    return number, int(cell[len(letters):])
+
+
+def _column_letter(number: int) -> str:
+    letters = ""
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
@@ -1,7 +1,24 @@
 import datetime
-import requests
+import copy
 from io import BytesIO
 import json
+import os
+import streamlit as st
+from utils.storage import get_storage, DEFAULT_SELECT
+from utils.tracing import traced, annotate
+
+# Local directory for snapshots, manifests and journals that should survive restarts
+LOCAL_CACHE_DIR = os.environ.get("JOBSTREAMLIT_CACHE_DIR", ".cache")
+
+
+def local_cache_path(*parts):
+    """
+    Returns a path inside LOCAL_CACHE_DIR, creating its parent folder if needed.
+    """
+    path = os.path.join(LOCAL_CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
 
 def get_template_target_folder_paths(job):
     date_obj = job["Date"]
@@ -18,84 +35,154 @@ def get_template_target_folder_paths(job):
 
 
 
-def ensure_folder_exists(access_token, folder_path):
-    url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{folder_path}"
-    headers = {"Authorization": f"Bearer {access_token}"}
+@traced()
+def get_drive_item(access_token, filepath: str, select: str = DEFAULT_SELECT):
+    """
+    Fetches the metadata of a drive item (no content download).
 
-    response = requests.get(url, headers=headers)
-    if response.status_code == 404:
-        # Create folder
-        parent_path = "/".join(folder_path.split("/")[:-1])
-        folder_name = folder_path.split("/")[-1]
+    Parameters:
+    - access_token: Microsoft Graph token
+    - filepath: path of the file or folder in OneDrive
+    - select: comma-separated properties to return
 
-        url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{parent_path}:/children"
-        payload = {
-            "name": folder_name,
-            "folder": {},
-            "@microsoft.graph.conflictBehavior": "rename"
-        }
-        create_resp = requests.post(url, headers={**headers, "Content-Type": "application/json"}, json=payload)
-        create_resp.raise_for_status()
-    elif response.status_code != 200:
-        raise Exception(f"Failed to check folder: {response.status_code} - {response.text}")
-    
+    Returns:
+    - dict with the selected properties, or None if the item does not exist
+    """
+    return get_storage().stat(access_token, filepath, select)
+
+
+
+@traced()
+def get_drive_items(access_token, filepaths: list, select: str = DEFAULT_SELECT):
+    """
+    Batched version of get_drive_item: checks up to 20 paths per HTTP call on Graph.
+
+    Returns:
+    - dict: {filepath: item metadata dict, or None if the item does not exist}
+    """
+    return get_storage().stat_many(access_token, filepaths, select)
+
+
+
+def folder_ancestors(folder_path: str) -> list:
+    """
+    "Jobs/applications/April" -> ["Jobs", "Jobs/applications", "Jobs/applications/April"]
+    """
+    parts = folder_path.strip("/").split("/")
+    return ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+
+@traced()
+def create_folder(access_token, folder_path):
+    get_storage().mkdir(access_token, folder_path)
+
+
+
+@traced()
+def ensure_folder_exists(access_token, folder_path, known_items=None):
+    """
+    Makes sure the folder and all of its parents exist.
+    The existence checks go out as one $batch call unless known_items (from get_drive_items) already covers them.
+    """
+    ancestors = folder_ancestors(folder_path)
+    if known_items is None or any(path not in known_items for path in ancestors):
+        known_items = get_drive_items(access_token, ancestors, select="id")
 
+    for path in ancestors:
+        if known_items[path] is None:
+            create_folder(access_token, path)
 
-def copy_file_between_folders(access_token, file_name, source_path, target_path):
-    headers = {"Authorization": f"Bearer {access_token}"}
 
-    # 🔍 Check if file already exists in target folder
-    check_url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{target_path}/{file_name}"
-    check_resp = requests.get(check_url, headers=headers)
 
-    if check_resp.status_code == 200:
+@traced()
+def provision_application_folder(access_token, template_folder, target_folder, file_names, known_items=None) -> list:
+    """
+    Creates the job folder and copies the missing template files into it.
+    The folder and all file existence checks share a single $batch call, unless known_items
+    (e.g. from the drive index) already answers them.
+
+    Returns:
+    - list of file names that were copied
+    """
+    file_paths = [f"{target_folder}/{file_name}" for file_name in file_names]
+    items = known_items
+    if items is None or any(path not in items for path in folder_ancestors(target_folder) + file_paths):
+        items = get_drive_items(access_token, folder_ancestors(target_folder) + file_paths, select="id")
+
+    ensure_folder_exists(access_token, target_folder, known_items=items)
+
+    copied = []
+    for file_name, file_path in zip(file_names, file_paths):
+        if items[file_path] is None:
+            copy_file_between_folders(access_token, file_name, template_folder, target_folder, check_exists=False)
+            copied.append(file_name)
+    return copied
+
+
+
+@traced()
+def copy_file_between_folders(access_token, file_name, source_path, target_path, check_exists=True, **options):
+    """
+    Copies a file into another folder. Extra options go to the storage backend
+    (GraphStorage takes mode="server"/"download" and poll_policy).
+    """
+    storage = get_storage()
+
+    # 🔍 Check if file already exists in target folder (callers that batched the check pass check_exists=False)
+    if check_exists and storage.exists(access_token, f"{target_path}/{file_name}"):
         print(f"🔁 Skipping '{file_name}' — already exists in {target_path}")
         return  # ✅ File exists, skip copying
-    elif check_resp.status_code != 404:
-        raise Exception(f"❌ Failed to check file existence: {check_resp.status_code} - {check_resp.text}")
 
-    # ⬇ Step 1: Download file from source
-    download_url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{source_path}/{file_name}:/content"
-    download_resp = requests.get(download_url, headers=headers)
-    if download_resp.status_code != 200:
-        raise Exception(f"❌ Failed to download {file_name}: {download_resp.status_code} - {download_resp.text}")
+    storage.copy(access_token, f"{source_path}/{file_name}", f"{target_path}/{file_name}", **options)
 
-    file_bytes = BytesIO(download_resp.content)
 
-    # ⬆ Step 2: Upload to target folder
-    upload_url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{target_path}/{file_name}:/content"
-    upload_resp = requests.put(upload_url, headers=headers, data=file_bytes.getvalue())
-    if upload_resp.status_code not in [200, 201]:
-        raise Exception(f"❌ Failed to upload {file_name}: {upload_resp.status_code} - {upload_resp.text}")
 
+@st.cache_resource
+def get_json_cache() -> dict:
+    """
+    Process-wide {filepath: (eTag, data)} cache used by load_json_with_version.
+    """
+    return {}
 
 
-def load_json_from_onedrive(access_token, filepath: str):
-    headers = {
-        "Authorization": f"Bearer {access_token}"
-    }
 
-    url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{filepath}:/content"
-    response = requests.get(url, headers=headers)
+@traced()
+def load_json_with_version(access_token, filepath: str):
+    """
+    Loads a JSON file together with its eTag. When the eTag is unchanged since the last load,
+    only the metadata request is made and the cached data is returned.
 
-    if response.status_code == 200:
-        return json.loads(response.content.decode("utf-8"))
-    else:
-        raise Exception(f"❌ Failed to load JSON: {response.status_code} - {response.text}")
-    
-def upload_json_to_onedrive(access_token, data: dict, filepath: str):
-    # Convert dict to JSON bytes
-    json_bytes = BytesIO(json.dumps(data, indent=2).encode("utf-8"))
+    Returns:
+    - (data, eTag): data is a deep copy the caller may modify
+    """
+    item = get_drive_item(access_token, filepath, select="eTag,@microsoft.graph.downloadUrl")
+    if not item:
+        raise Exception(f"❌ Failed to load JSON: 404 - {filepath} not found")
+
+    cache = get_json_cache()
+    cached = cache.get(filepath)
+    if cached and cached[0] == item["eTag"]:
+        annotate(cache="hit")
+        return copy.deepcopy(cached[1]), item["eTag"]
+
+    annotate(cache="miss")
+    with get_storage().read(access_token, filepath, item=item) as json_stream:
+        data = json.load(json_stream)
 
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json"
-    }
+    cache[filepath] = (item["eTag"], data)
+    return copy.deepcopy(data), item["eTag"]
 
-    url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{filepath}:/content"
 
-    response = requests.put(url, headers=headers, data=json_bytes.getvalue())
 
-    if response.status_code not in [200, 201]:
-        raise Exception(f"❌ Failed to upload JSON to OneDrive: {response.status_code} - {response.text}")
+@traced()
+def load_json_from_onedrive(access_token, filepath: str):
+    with get_storage().read(access_token, filepath) as json_stream:
+        return json.load(json_stream)
+    
+@traced()
+def upload_json_to_onedrive(access_token, data: dict, filepath: str, progress_callback=None):
+    # Convert dict to JSON bytes
+    json_bytes = BytesIO(json.dumps(data, indent=2).encode("utf-8"))
 
+    get_storage().write(access_token, filepath, json_bytes, "application/json", progress_callback)
@@ -0,0 +1,230 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from openpyxl import load_workbook
+from openpyxl.utils import range_boundaries, get_column_letter
+from utils.storage import StorageBackend, WriteConflict, DEFAULT_SELECT, resolve_row_keys
+
+# Copy granularity for reads and writes
+CHUNK_SIZE = 1024 * 1024
+
+
+class LocalStorage(StorageBackend):
+    """
+    Files in a local directory laid out like the drive (root/Jobs/...).
+    File eTags are content hashes, so conditional writes behave like on OneDrive.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, path: str) -> str:
+        full_path = os.path.abspath(os.path.join(self.root, path.strip("/")))
+        if full_path != self.root and not full_path.startswith(self.root + os.sep):
+            raise Exception(f"❌ Path '{path}' is outside the local storage root.")
+        return full_path
+
+    def _item(self, path: str, full_path: str) -> dict:
+        info = os.stat(full_path)
+        if os.path.isdir(full_path):
+            tag = f'"{info.st_mtime_ns:x}-{info.st_size:x}"'
+        else:
+            # From the content: two same-size writes within the filesystem's timestamp granularity
+            # would share an mtime-based tag and let a conditional write overwrite the other one
+            tag = f'"{_content_hash(full_path)}"'
+        item = {
+            "id": path.strip("/"),
+            "name": os.path.basename(full_path),
+            "eTag": tag,
+            "cTag": tag,
+            "size": info.st_size,
+        }
+        if os.path.isdir(full_path):
+            item["folder"] = {"childCount": len(os.listdir(full_path))}
+        else:
+            item["file"] = {}
+        return item
+
+    def stat(self, access_token, path: str, select: str = DEFAULT_SELECT):
+        full_path = self._path(path)
+        if not os.path.exists(full_path):
+            return None
+        return self._item(path, full_path)
+
+    def read(self, access_token, path: str, item=None, max_size=None):
+        full_path = self._path(path)
+        if not os.path.isfile(full_path):
+            raise FileNotFoundError(f"❌ Failed to read {path}: 404 - {path} not found")
+        if max_size is not None and os.path.getsize(full_path) > max_size:
+            raise Exception(f"❌ {path} is larger than {max_size} bytes.")
+        return open(full_path, "rb")
+
+    def write(self, access_token, path: str, stream, content_type: str, progress_callback=None, if_match=None):
+        full_path = self._path(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        stream.seek(0, os.SEEK_END)
+        total = stream.tell()
+        stream.seek(0)
+
+        # Written next to the target, then swapped in, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                sent = 0
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    tmp.write(chunk)
+                    sent += len(chunk)
+                    if progress_callback:
+                        progress_callback(sent, total)
+
+            with self._lock:
+                if if_match is not None:
+                    current = self.stat(access_token, path)
+                    if current is None or current["eTag"] != if_match:
+                        raise WriteConflict(f"❌ {path} changed since it was read.")
+                os.replace(tmp_path, full_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def mkdir(self, access_token, path: str):
+        os.makedirs(self._path(path), exist_ok=True)
+
+    def copy(self, access_token, source_path: str, target_path: str, **options):
+        source = self._path(source_path)
+        target = self._path(target_path)
+        if not os.path.isfile(source):
+            raise Exception(f"❌ Failed to copy {os.path.basename(source)}: 404 - {source_path} not found")
+        if os.path.exists(target):
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, target)
+
+    def list(self, access_token, folder_path: str) -> list:
+        full_path = self._path(folder_path)
+        if not os.path.isdir(full_path):
+            return []
+        with os.scandir(full_path) as entries:
+            return [
+                self._item(f"{folder_path.strip('/')}/{entry.name}", entry.path)
+                for entry in entries if not entry.name.startswith(".upload-")
+            ]
+
+    def convert_to_pdf(self, access_token, path: str):
+        """
+        Converts with LibreOffice in headless mode (soffice must be on PATH).
+        """
+        source = self._path(path)
+        if not os.path.isfile(source):
+            raise FileNotFoundError(f"❌ Failed to convert {path}: 404 - {path} not found")
+
+        office = shutil.which("soffice") or shutil.which("libreoffice")
+        if not office:
+            raise Exception("❌ PDF conversion with local storage needs LibreOffice (soffice) installed.")
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            result = subprocess.run(
+                [office, "--headless", "--convert-to", "pdf", "--outdir", out_dir, source],
+                capture_output=True, timeout=120
+            )
+            pdf_path = os.path.join(out_dir, os.path.splitext(os.path.basename(source))[0] + ".pdf")
+            if result.returncode != 0 or not os.path.exists(pdf_path):
+                raise Exception(f"❌ Failed to convert {path} to PDF: {result.stderr.decode(errors='replace')}")
+
+            pdf_stream = tempfile.SpooledTemporaryFile(max_size=CHUNK_SIZE * 8)
+            with open(pdf_path, "rb") as pdf_file:
+                shutil.copyfileobj(pdf_file, pdf_stream)
+            pdf_stream.seek(0)
+            return pdf_stream
+
+    def _open_table(self, path: str, table_name: str):
+        """
+        Returns (workbook, worksheet, table or None, header row, first column, column names).
+        Without a table of that name, the first sheet is used with its header in row 1
+        (the layout overwrite_excel_file writes).
+        """
+        full_path = self._path(path)
+        if not os.path.isfile(full_path):
+            raise FileNotFoundError(f"❌ Failed to open {path}: 404 - {path} not found")
+
+        workbook = load_workbook(full_path)
+        for worksheet in workbook.worksheets:
+            if table_name in worksheet.tables:
+                table = worksheet.tables[table_name]
+                min_col, min_row, max_col, _ = range_boundaries(table.ref)
+                columns = [worksheet.cell(min_row, col).value for col in range(min_col, max_col + 1)]
+                return workbook, worksheet, table, min_row, min_col, columns
+
+        worksheet = workbook.worksheets[0]
+        columns = [cell.value for cell in worksheet[1]]
+        return workbook, worksheet, None, 1, 1, columns
+
+    def append_rows(self, access_token, path: str, table_name: str, values: list):
+        with self._lock:
+            workbook, worksheet, table, header_row, first_col, columns = self._open_table(path, table_name)
+
+            if table is not None:
+                _, _, max_col, max_row = range_boundaries(table.ref)
+            else:
+                max_col, max_row = first_col + len(columns) - 1, worksheet.max_row
+
+            for offset, row in enumerate(values, start=1):
+                for col_offset, value in enumerate(row):
+                    worksheet.cell(max_row + offset, first_col + col_offset, value)
+
+            if table is not None:
+                table.ref = f"{get_column_letter(first_col)}{header_row}:{get_column_letter(max_col)}{max_row + len(values)}"
+                if table.autoFilter is not None:
+                    table.autoFilter.ref = table.ref
+
+            self._save_workbook(workbook, path)
+
+    def update_rows(self, access_token, path: str, table_name: str, changes: dict, key_column=None):
+        with self._lock:
+            workbook, worksheet, table, header_row, first_col, columns = self._open_table(path, table_name)
+
+            if key_column is not None:
+                if key_column not in columns:
+                    raise Exception(f"❌ Column '{key_column}' not found in Excel table.")
+                last_row = range_boundaries(table.ref)[3] if table is not None else worksheet.max_row
+                key_col = first_col + columns.index(key_column)
+                keys = [worksheet.cell(row, key_col).value for row in range(header_row + 1, last_row + 1)]
+                changes = resolve_row_keys(keys, changes)
+
+            for position, row_changes in changes.items():
+                for col, value in row_changes.items():
+                    if col not in columns:
+                        raise Exception(f"❌ Column '{col}' not found in Excel table.")
+                    worksheet.cell(header_row + 1 + position, first_col + columns.index(col), value)
+
+            self._save_workbook(workbook, path)
+
+    def _save_workbook(self, workbook, path: str):
+        full_path = self._path(path)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path), prefix=".upload-")
+        os.close(fd)
+        try:
+            workbook.save(tmp_path)
+            os.replace(tmp_path, full_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _content_hash(full_path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(full_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -1,8 +1,71 @@
 import requests
+import threading
 import pandas as pd
+import streamlit as st
 from io import BytesIO
-import requests
+from utils.helpers import get_drive_item
+from utils.tracker_snapshot import load_snapshot, save_snapshot, delete_snapshots
+from utils.storage import get_storage, row_key
+from utils.write_queue import get_write_queue
+from utils.tracing import traced, annotate
+
+
+class ExcelCache:
+    """
+    Process-wide cache of parsed Excel files, keyed by (filepath, sheet) and validated by the drive item's cTag.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, filepath, sheet_name, version):
+        with self._lock:
+            entry = self._entries.get((filepath, sheet_name))
+        if entry and version and entry[0] == version:
+            return entry[1]
+        return None
+
+    def put(self, filepath, sheet_name, version, df):
+        if not version:
+            return
+        with self._lock:
+            self._entries[(filepath, sheet_name)] = (version, df)
+
+    def invalidate(self, filepath, snapshots=True):
+        """
+        Drops the cached frames of a file. snapshots=False keeps its Arrow snapshots on disk
+        (a fresh process, as in the benchmarks); after a write they must go too.
+        """
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == filepath]:
+                del self._entries[key]
+        if snapshots:
+            # Workbook writes do not always bump the cTag at once, so the on-disk copy must go too
+            delete_snapshots(filepath)
+
+
+@st.cache_resource
+def get_excel_cache() -> ExcelCache:
+    return ExcelCache()
+
 
+@traced()
+def get_excel_version(access_token, filepath="Jobs/JobTracker.xlsx"):
+    """
+    Returns the content version (cTag, falling back to eTag) of a file with a cheap metadata request.
+    """
+    try:
+        item = get_drive_item(access_token, filepath, select="eTag,cTag")
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"🔌 Network error while checking Excel file: {e}")
+
+    if not item:
+        return None
+    return item.get("cTag") or item.get("eTag")
+
+
+@traced()
 def read_excel_from_onedrive(access_token, filepath="Jobs/JobTracker.xlsx", sheet_name=0):
     """
     Reads an Excel file from OneDrive via Microsoft Graph API and returns a Pandas DataFrame.
@@ -13,105 +76,95 @@ def read_excel_from_onedrive(access_token, filepath="Jobs/JobTracker.xlsx", shee
     - sheet_name (int or str): Sheet to read (default: first sheet).
 
     Returns:
-    - pd.DataFrame: Contents of the Excel sheet.
+    - pd.DataFrame: Contents of the Excel sheet. df.attrs["version"] holds the file's cTag.
+
+    The parsed DataFrame is cached per process and mirrored to a local Arrow snapshot,
+    so it is only downloaded and parsed again when the file's cTag changes.
     """
-    headers = {
-        "Authorization": f"Bearer {access_token}"
-    }
+    cache = get_excel_cache()
+    version = get_excel_version(access_token, filepath)
 
-    url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{filepath}:/content"
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"🔌 Network error while fetching Excel file: {e}")
+    cached_df = cache.get(filepath, sheet_name, version)
+    if cached_df is not None:
+        annotate(cache="hit")
+        # Callers edit the frame in place, so never hand out the cached object itself
+        return cached_df.copy()
 
-    if response.status_code == 200:
+    # Cold start: the on-disk snapshot survives restarts
+    snapshot_df = load_snapshot(filepath, sheet_name, version)
+    if snapshot_df is not None:
+        annotate(cache="snapshot")
+        cache.put(filepath, sheet_name, version, snapshot_df)
+        return snapshot_df.copy()
+
+    annotate(cache="miss")
+    excel_data = get_storage().read(access_token, filepath)
+
+    with excel_data:
         try:
-            excel_data = BytesIO(response.content)
             df = pd.read_excel(excel_data, sheet_name=sheet_name)
             df["Date"] = pd.to_datetime(df["Date"], errors="coerce").dt.date
-            return df
+            df.attrs["version"] = version
         except Exception as e:
             raise Exception(f"📄 Failed to parse Excel file: {e}")
 
+    cache.put(filepath, sheet_name, version, df)
+    save_snapshot(filepath, sheet_name, version, df)
+    return df.copy()
+
 
 
 
+# Column order of the JobTable table
+TABLE_COLUMNS = ["ID", "Job Type", "Date", "Company Name", "Url", "Created Application folder", "Status"]
+
+
 def append_row_to_excel_table(access_token, new_row: dict, filepath="Jobs/JobTracker.xlsx", table_name="JobTable"):
     """
     Appends a single new row to a named table in an Excel file stored on OneDrive using Microsoft Graph API.
     Assumes the table has the following columns (in order): ID, Job Type, Date, Company Name, Url, Created Application folder, Status
     """
+    append_rows_to_excel_table(access_token, [new_row], filepath=filepath, table_name=table_name)
 
-    # 1. Create a workbook session
-    session_url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{filepath}:/workbook/createSession"
-    try:
-        session_resp = requests.post(
-            session_url,
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json"
-            },
-            json={"persistChanges": True},
-            timeout=10
-        )
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"🔌 Network error while creating session: {e}")
-
-    if session_resp.status_code != 201:
-        raise Exception(f"❌ Failed to create Excel session: {session_resp.status_code} - {session_resp.text}")
-
-    session_id = session_resp.json()["id"]
-
-    # 2. Format row (ensure order matches table column structure)
-    values = [[
-        new_row.get("ID", ""),
-        new_row.get("Job Type", ""),
-        new_row.get("Date", ""),
-        new_row.get("Company Name", ""),
-        new_row.get("Url", ""),
-        new_row.get("Folder Created", ""),
-        new_row.get("Status", "")
-    ]]
-
-    # 3. Append the row to the table
-    append_url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{filepath}:/workbook/tables/{table_name}/rows/add"
-    try:
-        append_resp = requests.post(
-            append_url,
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json",
-                "workbook-session-id": session_id
-            },
-            json={"values": values},
-            timeout=10
-        )
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"🔌 Network error while appending row: {e}")
 
-    if append_resp.status_code not in [200, 201]:
-        raise Exception(f"❌ Failed to append row: {append_resp.status_code} - {append_resp.text}")
 
-    # 4. Close session (optional but good practice)
-    close_url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{filepath}:/workbook/closeSession"
+
+@traced()
+def append_rows_to_excel_table(access_token, new_rows: list, filepath="Jobs/JobTracker.xlsx", table_name="JobTable"):
+    """
+    Appends several rows to a named table with a single call to the storage backend
+    (on Graph: rows/add through the workbook's persistent session, see utils/workbook_session.py).
+
+    Parameters:
+    - access_token: Microsoft Graph token
+    - new_rows: list of dicts keyed by the TABLE_COLUMNS names
+    - filepath: path of the Excel file in OneDrive
+    - table_name: name of the Excel table
+    """
+    if not new_rows:
+        return
+
+    # 1. Format rows (ensure order matches table column structure)
+    values = [
+        [
+            # Older callers used "Folder Created" for the folder column
+            row.get(col, row.get("Folder Created", "")) if col == "Created Application folder" else row.get(col, "")
+            for col in TABLE_COLUMNS
+        ]
+        for row in new_rows
+    ]
+
+    # 2. Append the rows to the table
     try:
-        requests.post(
-            close_url,
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "workbook-session-id": session_id
-            },
-            timeout=5
-        )
-    except requests.exceptions.RequestException:
-        pass  # Fail silently if session close fails — Excel will auto-close it eventually
+        get_storage().append_rows(access_token, filepath, table_name, values)
+    finally:
+        get_excel_cache().invalidate(filepath)
 
 
 
 
-def overwrite_excel_file(access_token, updated_df, filepath="Jobs/JobTracker.xlsx"):
+@traced()
+def overwrite_excel_file(access_token, updated_df, filepath="Jobs/JobTracker.xlsx", progress_callback=None):
     """
     Overwrites the entire Excel file with the updated DataFrame.
     """
@@ -120,15 +173,167 @@ def overwrite_excel_file(access_token, updated_df, filepath="Jobs/JobTracker.xls
     updated_df.to_excel(buffer, index=False)
     buffer.seek(0)
 
-    url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{filepath}:/content"
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    try:
+        get_storage().write(
+            access_token,
+            filepath,
+            buffer,
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            progress_callback
+        )
+    except Exception as e:
+        raise Exception(f"❌ Failed to overwrite Excel file: {e}")
+    finally:
+        get_excel_cache().invalidate(filepath)
+
+
+
+# Columns the Tracker page lets the user edit
+EDITABLE_COLUMNS = ["Company Name", "Url", "Status"]
+
+
+def diff_tracker_rows(original_df, edited_df, columns=EDITABLE_COLUMNS) -> dict:
+    """
+    Compares the edited rows against the loaded DataFrame on the editable columns.
+
+    Returns:
+    - dict: {row position in original_df: {column: new value}} for every changed row
+    """
+    original = original_df.loc[edited_df.index, columns]
+    edited = edited_df[columns]
+
+    # Empty cells are NaN when read and "" or None once cleared in the editor; all are saved as ""
+    blank = (original.isna() | (original == "")) & (edited.isna() | (edited == ""))
+    changed = (original != edited) & ~blank
+    changes = {}
+    for label in edited.index[changed.any(axis=1)]:
+        position = original_df.index.get_loc(label)
+        changes[position] = {col: edited.at[label, col] for col in columns if changed.at[label, col]}
+    return changes
+
+
+def rebase_tracker_edits(edits: dict, edit_ids: dict, new_df, columns=EDITABLE_COLUMNS):
+    """
+    Moves unsaved edits onto a newer version of the tracker, following each row by its ID.
+
+    Parameters:
+    - edits: {row position in the old frame: {column: value}}
+    - edit_ids: {row position in the old frame: ID of that row}
+    - new_df: the freshly loaded DataFrame
+
+    Returns:
+    - (rebased edits keyed by position in new_df, number of edited rows that no longer exist)
+      Edits that new_df already contains (e.g. saved in the background) are dropped silently.
+    """
+    positions = {}
+    for position, row_id in enumerate(new_df["ID"]):
+        positions.setdefault(row_id, position)
+
+    rebased = {}
+    missing = 0
+    for position, row_changes in edits.items():
+        new_position = positions.get(edit_ids.get(position))
+        if new_position is None:
+            missing += 1
+            continue
+        remaining = {
+            col: value for col, value in row_changes.items()
+            if col in columns and not _same_cell(new_df.iat[new_position, new_df.columns.get_loc(col)], value)
+        }
+        if remaining:
+            rebased[new_position] = remaining
+    return rebased, missing
+
+
+def _same_cell(current, value) -> bool:
+    if _is_blank(current) and _is_blank(value):
+        return True
+    return current == value
+
+
+def _is_blank(value) -> bool:
+    return value is None or value == "" or (pd.api.types.is_scalar(value) and pd.isna(value))
+
+
+@traced()
+def update_excel_rows(access_token, changes: dict, filepath="Jobs/JobTracker.xlsx", table_name="JobTable", key_column=None):
+    """
+    Writes only the changed cells of a named table through the workbook API, leaving the rest of the file untouched.
+
+    Parameters:
+    - access_token: Microsoft Graph token
+    - changes: {row position in the table body: {column name: new value}}, as returned by diff_tracker_rows,
+      or {row ID: {column name: new value}} with key_column
+    - filepath: path of the Excel file in OneDrive
+    - table_name: name of the Excel table
+    - key_column: column holding the row IDs; the rows are looked up by ID right before writing
+    """
+    if not changes:
+        return
+
+    # Plain Python values only: numpy scalars and NaN do not serialize
+    changes = {
+        row: {col: _to_cell_value(value) for col, value in row_changes.items()}
+        for row, row_changes in changes.items()
+    }
+
+    try:
+        get_storage().update_rows(access_token, filepath, table_name, changes, key_column=key_column)
+    finally:
+        get_excel_cache().invalidate(filepath)
+
+
+def queue_excel_row_updates(access_token, changes: dict, filepath="Jobs/JobTracker.xlsx", table_name="JobTable", key_column="ID"):
+    """
+    Queues update_excel_rows on the write queue and returns at once.
+    Changes queued before the file is written are merged into one update.
+
+    Parameters:
+    - changes: {row ID: {column name: new value}}. Rows are addressed by ID, not position, because
+      rows may be added, deleted or sorted before the queue gets to write (or after a restart).
+    - key_column: column holding the row IDs
+    """
+    if not changes:
+        return
+
+    changes = {
+        row_key(row_id): {col: _to_cell_value(value) for col, value in row_changes.items()}
+        for row_id, row_changes in changes.items()
     }
+    get_write_queue().enqueue(
+        "update_rows", filepath,
+        data={"changes": changes, "table_name": table_name, "key_column": key_column},
+        access_token=access_token
+    )
+
+
+def apply_queued_row_updates(df, filepath="Jobs/JobTracker.xlsx"):
+    """
+    Shows cell updates that are still in the write queue in a freshly read DataFrame (in place).
+    Rows are matched by ID; rows that no longer exist are skipped (their queued write fails and is parked).
+    """
+    queued = get_write_queue().find("update_rows", filepath)
+    if not queued:
+        return df
+
+    positions = {}
+    for position, row_id in enumerate(df[queued["key_column"]]):
+        positions.setdefault(row_key(row_id), position)
 
-    response = requests.put(url, headers=headers, data=buffer)
+    for row_id, row_changes in queued["changes"].items():
+        position = positions.get(row_id)
+        if position is None:
+            continue
+        for col, value in row_changes.items():
+            if col in df.columns:
+                df.iat[position, df.columns.get_loc(col)] = value
+    return df
 
-    if response.status_code not in [200, 201]:
-        raise Exception(f"❌ Failed to overwrite Excel file: {response.status_code} - {response.text}")
 
+def _to_cell_value(value):
+    if value is None or pd.isna(value):
+        return ""
+    if hasattr(value, "item"):  # numpy scalar -> plain Python for JSON
+        return value.item()
+    return value
 
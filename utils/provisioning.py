@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+import streamlit as st
+from utils.helpers import get_drive_item, provision_application_folder, local_cache_path, folder_ancestors
+from utils.drive_index import get_drive_index, lookup_drive_items
+from utils.tracing import traced, annotate
+
+# Keep the manifest on disk so provisioning is also skipped after a restart
+PERSIST_MANIFEST = True
+
+# How long a provisioned folder is trusted before the template folder's version is checked again
+TEMPLATE_CHECK_TTL = 300
+
+
+class ProvisioningManifest:
+    """
+    Records which job folders have been provisioned, from which template folder and template version.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+
+    def get(self, target_folder):
+        with self._lock:
+            entry = self._entries.get(target_folder)
+            return dict(entry) if entry else None
+
+    def record(self, target_folder, entry: dict):
+        with self._lock:
+            self._entries[target_folder] = entry
+            self._persist()
+
+    def forget(self, target_folder):
+        with self._lock:
+            self._entries.pop(target_folder, None)
+            self._persist()
+
+    def _persist(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.path)
+
+
+@st.cache_resource
+def get_provisioning_manifest() -> ProvisioningManifest:
+    path = local_cache_path("provisioning_manifest.json") if PERSIST_MANIFEST else None
+    return ProvisioningManifest(path)
+
+
+def get_template_version(access_token, template_folder):
+    item = get_drive_item(access_token, template_folder, select="eTag,cTag")
+    if not item:
+        raise Exception(f"❌ Template folder not found: {template_folder}")
+    return item.get("cTag") or item.get("eTag")
+
+
+@traced()
+def ensure_application_folder(access_token, template_folder, target_folder, file_names, force=False) -> list:
+    """
+    Provisions a job folder once and remembers it in the provisioning manifest.
+
+    Later calls return without any Graph call, except for one template-folder metadata request
+    every TEMPLATE_CHECK_TTL seconds. Provisioning runs again when force=True (re-sync)
+    or when the template folder's version has changed.
+
+    Returns:
+    - list of file names that were copied (empty when provisioning was skipped)
+    """
+    manifest = get_provisioning_manifest()
+    entry = manifest.get(target_folder)
+
+    is_same_setup = (
+        entry is not None
+        and entry["template_folder"] == template_folder
+        and set(file_names) <= set(entry["files"])
+    )
+
+    template_version = None
+    if is_same_setup and not force:
+        if time.time() - entry["checked_at"] < TEMPLATE_CHECK_TTL:
+            annotate(cache="hit")
+            return []
+
+        template_version = get_template_version(access_token, template_folder)
+        if template_version == entry["template_version"]:
+            manifest.record(target_folder, {**entry, "checked_at": time.time()})
+            annotate(cache="revalidated")
+            return []
+
+    if template_version is None:
+        template_version = get_template_version(access_token, template_folder)
+
+    # Existence checks come from the delta-synced drive index when it covers the paths
+    known_items = lookup_drive_items(
+        access_token, folder_ancestors(target_folder) + [f"{target_folder}/{name}" for name in file_names]
+    )
+    copied = provision_application_folder(access_token, template_folder, target_folder, file_names, known_items)
+    get_drive_index().invalidate()
+
+    manifest.record(target_folder, {
+        "template_folder": template_folder,
+        "template_version": template_version,
+        "files": list(file_names),
+        "checked_at": time.time(),
+    })
+    return copied
@@ -0,0 +1,103 @@
+import email.utils
+import os
+import random
+import threading
+import time
+
+# Process-wide request rate towards Graph: steady requests per second and burst size
+RATE_LIMIT = float(os.environ.get("GRAPH_RATE_LIMIT", "20"))
+RATE_BURST = int(os.environ.get("GRAPH_RATE_BURST", "40"))
+
+# Retries after the first attempt
+MAX_RETRIES = int(os.environ.get("GRAPH_MAX_RETRIES", "4"))
+
+# Statuses that mean "try again later"
+RETRY_STATUSES = {429, 503, 504}
+
+# Methods that are safe to send twice
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every session of the process.
+
+    acquire() blocks until a token is free. pause() stops all callers for a while, so that
+    one throttled request (429 + Retry-After) slows every session down together.
+    """
+
+    def __init__(self, rate=RATE_LIMIT, burst=RATE_BURST, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def acquire(self):
+        if self.rate <= 0:
+            return  # Rate limiting disabled
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            self.sleep(wait)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, self.clock() + seconds)
+            self._tokens = 0.0
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, capped at max_delay; Retry-After wins when present.
+    """
+
+    def __init__(self, max_retries=MAX_RETRIES, base_delay=0.5, max_delay=30.0, max_retry_after=60.0,
+                 sleep=time.sleep):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.sleep = sleep
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Delay before retry number attempt (0-based).
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def delay(self, attempt: int, response=None) -> float:
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        return self.backoff(attempt)
+
+
+def parse_retry_after(value):
+    """
+    Retry-After is either seconds ("5") or an HTTP date. Returns seconds, or None.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
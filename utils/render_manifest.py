@@ -0,0 +1,87 @@
+import hashlib
+import json
+import threading
+import streamlit as st
+from utils.storage import get_storage
+from utils.helpers import upload_json_to_onedrive
+from utils.tracing import traced
+from utils.write_queue import get_write_queue
+
+# Lives next to the generated files in each job folder
+MANIFEST_FILENAME = "render_manifest.json"
+
+
+def content_hash(*inputs) -> str:
+    """
+    Stable SHA-256 of JSON-serializable inputs (other objects, e.g. RichText, are hashed by their str()).
+    """
+    payload = json.dumps(inputs, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderManifestStore:
+    """
+    Process-wide copy of each job folder's render manifest: {artifact path: hash of its inputs}.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._manifests = {}
+
+    def get(self, target_folder):
+        with self._lock:
+            manifest = self._manifests.get(target_folder)
+            return dict(manifest) if manifest is not None else None
+
+    def put(self, target_folder, manifest: dict):
+        with self._lock:
+            self._manifests[target_folder] = dict(manifest)
+
+
+@st.cache_resource
+def get_render_manifest_store() -> RenderManifestStore:
+    return RenderManifestStore()
+
+
+@traced()
+def load_render_manifest(access_token, target_folder) -> dict:
+    """
+    Returns the render manifest of a job folder, or an empty dict if nothing was generated yet.
+    """
+    # A manifest waiting in the write queue is newer than anything on the drive
+    queued = get_write_queue().find("render_manifest", f"{target_folder}/{MANIFEST_FILENAME}")
+    if queued is not None:
+        return queued["manifest"]
+
+    store = get_render_manifest_store()
+    manifest = store.get(target_folder)
+    if manifest is not None:
+        return manifest
+
+    try:
+        with get_storage().read(access_token, f"{target_folder}/{MANIFEST_FILENAME}") as manifest_stream:
+            manifest = json.load(manifest_stream)
+    except FileNotFoundError:
+        manifest = {}
+
+    store.put(target_folder, manifest)
+    return dict(manifest)
+
+
+@traced()
+def save_render_manifest(access_token, target_folder, manifest: dict):
+    upload_json_to_onedrive(access_token, manifest, f"{target_folder}/{MANIFEST_FILENAME}")
+    get_render_manifest_store().put(target_folder, manifest)
+
+
+def queue_render_manifest(target_folder, manifest: dict, access_token=None):
+    """
+    Saves the manifest through the write queue, after the artifacts queued before it in the job folder's lane.
+    """
+    get_write_queue().enqueue(
+        "render_manifest",
+        f"{target_folder}/{MANIFEST_FILENAME}",
+        data={"target_folder": target_folder, "manifest": manifest},
+        lane=target_folder,
+        access_token=access_token,
+    )
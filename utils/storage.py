@@ -0,0 +1,164 @@
+import os
+from abc import ABC, abstractmethod
+import streamlit as st
+
+# "graph" stores files in OneDrive, "local" in a directory tree (development, tests, offline use)
+STORAGE_BACKEND = os.environ.get("JOBSTREAMLIT_STORAGE", "graph")
+
+# Root directory of the local backend; it mirrors the OneDrive layout (Jobs/...)
+LOCAL_STORAGE_ROOT = os.environ.get("JOBSTREAMLIT_LOCAL_ROOT", "local_drive")
+
+DEFAULT_SELECT = "id,name,eTag,cTag,size"
+
+
+class WriteConflict(Exception):
+    """
+    Raised by write(..., if_match=...) when the file changed since the given eTag was read.
+    """
+
+
+class StorageBackend(ABC):
+    """
+    File operations the app needs, independent of where the files live.
+
+    Paths are drive-relative ("Jobs/JobTracker.xlsx"). Items are dicts shaped like Graph
+    driveItems: "id", "name", "eTag", "cTag", "size" and "folder" or "file".
+    access_token is passed through for backends that need it and ignored by the others.
+    A backend must implement every abstract method, or it cannot be instantiated.
+    """
+
+    name = "abstract"
+
+    @abstractmethod
+    def stat(self, access_token, path: str, select: str = DEFAULT_SELECT):
+        """
+        Returns the item's metadata, or None if it does not exist.
+        """
+        raise NotImplementedError
+
+    def stat_many(self, access_token, paths: list, select: str = DEFAULT_SELECT) -> dict:
+        """
+        Returns {path: item or None}. Backends override this when they can check several paths at once.
+        """
+        return {path: self.stat(access_token, path, select) for path in paths}
+
+    def exists(self, access_token, path: str) -> bool:
+        return self.stat(access_token, path, select="id") is not None
+
+    @abstractmethod
+    def read(self, access_token, path: str, item=None, max_size=None):
+        """
+        Returns a readable binary file object positioned at 0 (close it when done).
+        Raises FileNotFoundError if the file does not exist.
+
+        Parameters:
+        - item: metadata from stat(), lets a backend skip a lookup (e.g. Graph's download URL)
+        - max_size: refuse files bigger than this many bytes
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def write(self, access_token, path: str, stream, content_type: str, progress_callback=None, if_match=None):
+        """
+        Creates or replaces a file from a seekable binary stream, creating missing parent folders.
+
+        Parameters:
+        - progress_callback: optional callable(bytes_sent, total_bytes)
+        - if_match: only write if the file's eTag still equals this value, else raise WriteConflict
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def mkdir(self, access_token, path: str):
+        """
+        Creates one folder (its parent must exist). Existing folders are left alone.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def copy(self, access_token, source_path: str, target_path: str, **options):
+        """
+        Copies a file. An existing target is left alone.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def list(self, access_token, folder_path: str) -> list:
+        """
+        Returns the items directly inside a folder (empty if the folder does not exist).
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def convert_to_pdf(self, access_token, path: str):
+        """
+        Returns a readable binary file object with the PDF rendering of a document.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def append_rows(self, access_token, path: str, table_name: str, values: list):
+        """
+        Appends rows (lists of cell values in table column order) to a named Excel table.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_rows(self, access_token, path: str, table_name: str, changes: dict, key_column=None):
+        """
+        Writes changed cells of a named Excel table: {row position in the table body: {column name: value}}.
+        With key_column, changes are keyed by that column's value instead ({row ID: {...}}) and each row is
+        looked up right before writing; see resolve_row_keys.
+        """
+        raise NotImplementedError
+
+
+def row_key(value) -> str:
+    """
+    Row IDs as JSON keys: "7" for 7 and 7.0 (Excel numbers come back as floats), str() otherwise.
+    """
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def resolve_row_keys(keys: list, changes: dict) -> dict:
+    """
+    Turns {row ID: {column: value}} into {row position: {column: value}}.
+
+    Parameters:
+    - keys: the key column of the table body, top to bottom
+    - changes: changes keyed by row ID
+
+    Raises if a row is no longer in the table, so its values never land on another row.
+    """
+    positions = {}
+    for position, key in enumerate(keys):
+        positions.setdefault(row_key(key), position)
+
+    resolved = {}
+    for key, row_changes in changes.items():
+        position = positions.get(row_key(key))
+        if position is None:
+            raise Exception(f"❌ Row {key} is no longer in the table, its changes were not saved.")
+        resolved[position] = row_changes
+    return resolved
+
+
+@st.cache_resource
+def get_storage(backend: str = STORAGE_BACKEND) -> StorageBackend:
+    """
+    Returns the process-wide storage backend selected by JOBSTREAMLIT_STORAGE.
+    """
+    # Imported here: both backends import this module for the base class
+    if backend == "graph":
+        from utils.graph_storage import GraphStorage
+        return GraphStorage()
+    if backend == "local":
+        from utils.local_storage import LocalStorage
+        return LocalStorage(LOCAL_STORAGE_ROOT)
+    raise Exception(f"❌ Unknown storage backend '{backend}', use 'graph' or 'local'.")
+
+
+def is_graph_storage() -> bool:
+    return get_storage().name == "graph"
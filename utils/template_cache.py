@@ -0,0 +1,157 @@
+import copy
+import threading
+from collections import OrderedDict
+import streamlit as st
+from docxtpl import DocxTemplate
+from jinja2 import Template
+from utils.helpers import get_drive_item
+from utils.doc_helpers import load_docx_from_onedrive
+from utils.tracing import traced, annotate
+
+# Parsed documents take several times their file size in memory, entries are budgeted with this factor
+PARSED_SIZE_FACTOR = 8
+TEMPLATE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+TEMPLATE_CACHE_MAX_ENTRIES = 32
+
+
+class _CompiledEnv:
+    """
+    Stands in for a Jinja environment and hands back the template compiled on the first render.
+    """
+
+    def __init__(self, compiled: dict, key, jinja_env=None):
+        self.compiled = compiled
+        self.key = key
+        self.jinja_env = jinja_env
+
+    def from_string(self, source):
+        template = self.compiled.get(self.key)
+        if template is None:
+            template = self.jinja_env.from_string(source) if self.jinja_env else Template(source)
+            self.compiled[self.key] = template
+        return template
+
+
+class CompiledDocxTemplate(DocxTemplate):
+    """
+    DocxTemplate that keeps the parsed document and the compiled Jinja template of every part,
+    so repeated renders skip both the OOXML parse and the Jinja compile.
+
+    Use fresh() to get a render-ready copy; the cached object itself is never rendered.
+    """
+
+    def __init__(self, source):
+        super().__init__(source)
+        self.init_docx()
+        source.seek(0, 2)
+        self.size = source.tell() * PARSED_SIZE_FACTOR
+        self.etag = None
+        self._pristine = self.docx
+        self._compiled = {}
+        self._encodings = {}
+
+    def fresh(self) -> "CompiledDocxTemplate":
+        # copy.copy() would recurse through DocxTemplate.__getattr__, so copy the attributes by hand
+        clone = object.__new__(CompiledDocxTemplate)
+        clone.__dict__.update(self.__dict__)
+        clone.docx = copy.deepcopy(self._pristine)
+        clone.reset_replacements()
+        clone.is_rendered = False
+        clone.is_saved = False
+        return clone
+
+    @traced("DocxTemplate.render")
+    def render(self, *args, **kwargs):
+        return super().render(*args, **kwargs)
+
+    def _part_key(self, part, jinja_env):
+        return str(part.partname), id(jinja_env) if jinja_env else None
+
+    def render_xml_part(self, src_xml, part, context, jinja_env=None):
+        compiled_env = _CompiledEnv(self._compiled, self._part_key(part, jinja_env), jinja_env)
+        return super().render_xml_part(src_xml, part, context, compiled_env)
+
+    def build_xml(self, context, jinja_env=None):
+        part = self.docx._part
+        # Once compiled, the source XML is not needed anymore
+        if self._part_key(part, jinja_env) in self._compiled:
+            xml = ""
+        else:
+            xml = self.patch_xml(self.get_xml())
+        return self.render_xml_part(xml, part, context, jinja_env)
+
+    def build_headers_footers_xml(self, context, uri, jinja_env=None):
+        for relKey, part in self.get_headers_footers(uri):
+            key = self._part_key(part, jinja_env)
+            if key in self._compiled:
+                xml = ""
+            else:
+                xml = self.get_part_xml(part)
+                self._encodings[key] = self.get_headers_footers_encoding(xml)
+                xml = self.patch_xml(xml)
+            xml = self.render_xml_part(xml, part, context, jinja_env)
+            yield relKey, xml.encode(self._encodings[key])
+
+
+class TemplateCache:
+    """
+    LRU cache of CompiledDocxTemplate objects keyed by (drive path, eTag), bounded by entries and estimated memory.
+    """
+
+    def __init__(self, max_bytes=TEMPLATE_CACHE_MAX_BYTES, max_entries=TEMPLATE_CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+
+    def get(self, filepath, etag):
+        with self._lock:
+            template = self._entries.get((filepath, etag))
+            if template is not None:
+                self._entries.move_to_end((filepath, etag))
+            return template
+
+    def put(self, filepath, etag, template: CompiledDocxTemplate):
+        with self._lock:
+            # Older versions of the same file are never asked for again
+            for key in [k for k in self._entries if k[0] == filepath]:
+                self._total_bytes -= self._entries.pop(key).size
+
+            self._entries[(filepath, etag)] = template
+            self._total_bytes += template.size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.size
+
+
+@st.cache_resource
+def get_template_cache() -> TemplateCache:
+    return TemplateCache()
+
+
+@traced()
+def load_docx_template(access_token, filepath: str) -> CompiledDocxTemplate:
+    """
+    Returns a render-ready DocxTemplate for a .docx in OneDrive; its etag attribute holds the template version.
+
+    Only a metadata request is made when the template is cached for the file's current eTag;
+    otherwise the file is downloaded, parsed and cached.
+    """
+    item = get_drive_item(access_token, filepath, select="eTag")
+    if not item:
+        raise Exception(f"❌ Template not found in OneDrive: {filepath}")
+
+    cache = get_template_cache()
+    template = cache.get(filepath, item["eTag"])
+    annotate(cache="miss" if template is None else "hit")
+    if template is None:
+        with load_docx_from_onedrive(access_token, filepath) as docx_stream:
+            template = CompiledDocxTemplate(docx_stream)
+        template.etag = item["eTag"]
+        cache.put(filepath, item["eTag"], template)
+
+    return template.fresh()
@@ -0,0 +1,217 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Trace every session without the sidebar toggle (e.g. on a staging server)
+TRACE_ALL = os.environ.get("JOBSTREAMLIT_TRACE", "0") == "1"
+
+# Reruns kept per session for the debug panel
+MAX_RUNS_PER_SESSION = 20
+
+TRACE_LOG_FILENAME = "graph_trace.jsonl"
+
+
+class RunTrace:
+    """
+    Spans recorded during one script run (full rerun or fragment rerun) of a session.
+    """
+
+    def __init__(self, session_id, run_marker, page, fragment):
+        self.session_id = session_id
+        self.run_id = f"{int(time.time() * 1000)}-{id(run_marker) % 10000:04d}"
+        self.page = page
+        self.fragment = fragment
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.spans = []
+        self._marker = run_marker  # ScriptRunContext.cursors is a new dict on every run
+
+    def summary(self) -> dict:
+        http = [span for span in self.spans if span["kind"] == "http"]
+        return {
+            "run_id": self.run_id,
+            "page": self.page,
+            "fragment": self.fragment,
+            "spans": len(self.spans),
+            "graph_calls": len(http),
+            "bytes_in": sum(span.get("bytes_in") or 0 for span in http),
+            "bytes_out": sum(span.get("bytes_out") or 0 for span in http),
+            "duration_ms": round(max((span["start_ms"] + span["duration_ms"] for span in self.spans), default=0), 1),
+        }
+
+
+class TraceStore:
+    """
+    Process-wide store of recent runs per session, plus the JSON-lines trace log.
+    """
+
+    def __init__(self, log_path=None):
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._runs = {}  # session id -> deque of RunTrace
+
+    def current_run(self, ctx) -> RunTrace:
+        with self._lock:
+            runs = self._runs.setdefault(ctx.session_id, deque(maxlen=MAX_RUNS_PER_SESSION))
+            if not runs or runs[-1]._marker is not ctx.cursors:
+                page = os.path.basename(ctx.main_script_path)
+                if ctx.pages_manager:
+                    page_info = ctx.pages_manager.get_pages().get(ctx.page_script_hash) or {}
+                    page = page_info.get("page_name") or page
+                runs.append(RunTrace(ctx.session_id, ctx.cursors, page, bool(ctx.fragment_ids_this_run)))
+            return runs[-1]
+
+    def runs(self, session_id) -> list:
+        with self._lock:
+            return list(self._runs.get(session_id, []))
+
+    def write(self, run: RunTrace, span: dict):
+        if not self.log_path:
+            return
+        line = json.dumps({
+            "ts": run.started_at + span["start_ms"] / 1000,
+            "session_id": run.session_id,
+            "run_id": run.run_id,
+            "page": run.page,
+            **span,
+        }, default=str)
+        with self._lock:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+@st.cache_resource
+def get_trace_store() -> TraceStore:
+    from utils.helpers import local_cache_path  # helpers imports this module
+    return TraceStore(local_cache_path("traces", TRACE_LOG_FILENAME))
+
+
+_local = threading.local()
+
+
+def _active_run():
+    """
+    Returns the RunTrace to record into, or None when tracing is off for this thread.
+    Background threads (journal flushes, timers) have no script context and are not traced.
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return None
+    if not TRACE_ALL and not st.session_state.get("trace_enabled", False):
+        return None
+    return get_trace_store().current_run(ctx)
+
+
+@contextmanager
+def trace_span(name: str, kind: str = "function", **fields):
+    """
+    Records a span around a block. Yields the span dict (or a throwaway dict when tracing is off),
+    so the block can add fields such as status, bytes_in or cache.
+    """
+    run = _active_run()
+    if run is None:
+        yield {}
+        return
+
+    stack = _local.__dict__.setdefault("stack", [])
+    span = {"name": name, "kind": kind, "depth": len(stack), **fields}
+    stack.append(span)
+    started = time.perf_counter()
+    try:
+        yield span
+    except Exception as e:
+        span.setdefault("error", str(e)[:200])
+        raise
+    finally:
+        stack.pop()
+        span["start_ms"] = round((started - run.started) * 1000, 2)
+        span["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        run.spans.append(span)
+        get_trace_store().write(run, span)
+
+
+def traced(name=None):
+    """
+    Decorator recording a span for every call of a function.
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace_span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def annotate(**fields):
+    """
+    Adds fields (e.g. cache="hit") to the innermost open span of this thread, if any.
+    """
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1].update(fields)
+
+
+def render_trace_panel():
+    """
+    Opt-in sidebar panel: a waterfall of the Graph calls and traced functions of recent runs.
+    Call it at the end of a page so the current run is complete.
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return
+
+    with st.sidebar:
+        enabled = st.toggle("🐢 Performance trace", key="trace_enabled")
+        if not (enabled or TRACE_ALL):
+            return
+
+        runs = [run for run in get_trace_store().runs(ctx.session_id) if run.spans]
+        if not runs:
+            st.caption("No traced calls yet, interact with the page.")
+            return
+
+        labels = {
+            f"{run.run_id} · {run.page}{' (fragment)' if run.fragment else ''}": run
+            for run in reversed(runs)
+        }
+        run = labels[st.selectbox("Run", list(labels), key="trace_run")]
+        summary = run.summary()
+
+        col1, col2 = st.columns(2)
+        col1.metric("Wall time", f"{summary['duration_ms']:.0f} ms")
+        col2.metric("Graph calls", summary["graph_calls"])
+        st.caption(f"⬇️ {summary['bytes_in'] // 1024} KB in · ⬆️ {summary['bytes_out'] // 1024} KB out")
+
+        import altair as alt
+        import pandas as pd
+
+        spans = pd.DataFrame(run.spans).sort_values("start_ms").reset_index(drop=True)
+        spans["end_ms"] = spans["start_ms"] + spans["duration_ms"]
+        spans["label"] = [f"{i:02d} {'  ' * depth}{name}" for i, (depth, name) in enumerate(zip(spans["depth"], spans["name"]))]
+        for col in ["status", "cache", "bytes_in", "bytes_out"]:
+            if col not in spans:
+                spans[col] = None
+
+        chart = alt.Chart(spans).mark_bar().encode(
+            x=alt.X("start_ms:Q", title="ms"),
+            x2="end_ms:Q",
+            y=alt.Y("label:N", sort=None, title=None),
+            color=alt.Color("kind:N", legend=alt.Legend(orient="bottom")),
+            tooltip=["name", "kind", "duration_ms", "status", "cache", "bytes_in", "bytes_out"],
+        ).properties(height=max(120, 18 * len(spans)))
+        st.altair_chart(chart, use_container_width=True)
+
+        with st.expander("Spans"):
+            st.dataframe(
+                spans[["name", "kind", "start_ms", "duration_ms", "status", "cache", "bytes_in", "bytes_out"]],
+                hide_index=True
+            )
@@ -0,0 +1,102 @@
+import pandas as pd
+import streamlit as st
+
+# Funnel order of the tracker statuses
+FUNNEL_STAGES = ["Preparation", "Applied", "In process", "Rejected"]
+
+# Columns that may hold the date a rejection came in (the default tracker has none)
+REJECTION_DATE_COLUMNS = ["Rejected Date", "Rejection Date", "Status Date"]
+
+
+def compute_tracker_analytics(df: pd.DataFrame) -> dict:
+    """
+    Aggregates the tracker with vectorized groupby/resample calls.
+
+    Returns:
+    - dict with "funnel", "weekly", "monthly", "job_types" DataFrames and "rejection_days"
+      (a Series of days from application to rejection, or None without a rejection date column)
+    """
+    dates = pd.to_datetime(df["Date"], errors="coerce")
+    status = df["Status"].fillna("Unknown")
+
+    counts = status.value_counts()
+    stages = FUNNEL_STAGES + [s for s in counts.index if s not in FUNNEL_STAGES]
+    funnel = counts.reindex(stages, fill_value=0).rename_axis("Status").to_frame("Jobs")
+
+    by_date = pd.Series(1, index=dates[dates.notna()])
+    weekly = by_date.resample("W-MON", label="left", closed="left").sum().to_frame("Jobs")
+    monthly = by_date.resample("MS").sum().to_frame("Jobs")
+
+    job_types = pd.crosstab(df["Job Type"].fillna("Unknown"), status)
+    job_types = job_types.loc[job_types.sum(axis=1).sort_values(ascending=False).index]
+
+    rejection_days = None
+    rejection_column = next((col for col in REJECTION_DATE_COLUMNS if col in df.columns), None)
+    if rejection_column:
+        rejected_on = pd.to_datetime(df[rejection_column], errors="coerce")
+        mask = (status == "Rejected") & rejected_on.notna() & dates.notna()
+        rejection_days = (rejected_on[mask] - dates[mask]).dt.days
+
+    return {
+        "funnel": funnel,
+        "weekly": weekly,
+        "monthly": monthly,
+        "job_types": job_types,
+        "rejection_days": rejection_days,
+        "rejection_column": rejection_column,
+    }
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def get_tracker_analytics(filepath: str, version: str, _df: pd.DataFrame) -> dict:
+    """
+    compute_tracker_analytics() memoized on the tracker's version, so it runs once per data change.
+    """
+    return compute_tracker_analytics(_df)
+
+
+def render_tracker_dashboard(df: pd.DataFrame, filepath="Jobs/JobTracker.xlsx"):
+    """
+    Renders the analytics dashboard of the Tracker page.
+    """
+    version = df.attrs.get("version")
+    if version:
+        analytics = get_tracker_analytics(filepath, version, df)
+    else:
+        analytics = compute_tracker_analytics(df)
+
+    funnel = analytics["funnel"]
+    total = int(funnel["Jobs"].sum())
+    cols = st.columns(len(funnel) + 1)
+    cols[0].metric("Total", total)
+    for col, (stage, jobs) in zip(cols[1:], funnel["Jobs"].items()):
+        col.metric(stage, int(jobs), f"{jobs / total:.0%}" if total else None, delta_color="off")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**📊 Funnel by Status**")
+        st.bar_chart(funnel, horizontal=True)
+    with col2:
+        st.markdown("**🧩 By Job Type**")
+        st.bar_chart(analytics["job_types"], stack=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**📅 Weekly Applications**")
+        st.bar_chart(analytics["weekly"])
+    with col2:
+        st.markdown("**🗓️ Monthly Applications**")
+        st.bar_chart(analytics["monthly"])
+
+    st.markdown("**⏱️ Time to Rejection**")
+    rejection_days = analytics["rejection_days"]
+    if rejection_days is None:
+        st.caption(f"ℹ️ Add a '{REJECTION_DATE_COLUMNS[0]}' column to the tracker to see how long rejections take.")
+    elif rejection_days.empty:
+        st.caption("ℹ️ No rejections with a date yet.")
+    else:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Median", f"{rejection_days.median():.0f} days")
+        col2.metric("Average", f"{rejection_days.mean():.0f} days")
+        col3.metric("Rejections", len(rejection_days))
+        st.bar_chart(rejection_days.clip(lower=0).value_counts().sort_index().rename_axis("Days").to_frame("Jobs"))
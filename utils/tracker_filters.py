@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Rows per page of the Tracker data editor
+PAGE_SIZE = 50
+
+
+class TrackerIndex:
+    """
+    Lookup structures over a tracker DataFrame, built once per file version.
+
+    - Status and Job Type map to arrays of row positions
+    - dates are kept sorted, so a date range is two binary searches
+    - company names are lowercased once for substring search
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.labels = df.index
+        self.size = len(df)
+
+        self.by_status = {value: np.asarray(positions) for value, positions in df.groupby("Status", sort=True).indices.items()}
+        self.by_job_type = {value: np.asarray(positions) for value, positions in df.groupby("Job Type", sort=True).indices.items()}
+
+        dates = pd.to_datetime(df["Date"], errors="coerce").to_numpy()
+        valid = ~pd.isna(dates)
+        order = np.flatnonzero(valid)[np.argsort(dates[valid], kind="stable")]
+        self._date_order = order
+        self._sorted_dates = dates[order]
+        self.min_date = pd.Timestamp(self._sorted_dates[0]).date() if len(order) else None
+        self.max_date = pd.Timestamp(self._sorted_dates[-1]).date() if len(order) else None
+
+        self._companies = df["Company Name"].fillna("").astype(str).str.lower().to_numpy()
+
+    @property
+    def statuses(self) -> list:
+        return list(self.by_status)
+
+    @property
+    def job_types(self) -> list:
+        return list(self.by_job_type)
+
+    def filter(self, statuses=None, job_types=None, date_range=None, company_query="") -> np.ndarray:
+        """
+        Returns the sorted row positions matching every given filter (empty filters match everything).
+
+        Parameters:
+        - statuses / job_types: lists of accepted values
+        - date_range: (start date, end date), both inclusive
+        - company_query: case-insensitive substring of the company name
+        """
+        positions = None
+
+        def narrow(current, candidates):
+            return candidates if current is None else np.intersect1d(current, candidates, assume_unique=True)
+
+        if statuses:
+            positions = narrow(positions, self._union(self.by_status, statuses))
+        if job_types:
+            positions = narrow(positions, self._union(self.by_job_type, job_types))
+        if date_range and all(date_range):
+            start = np.searchsorted(self._sorted_dates, np.datetime64(pd.Timestamp(date_range[0])), side="left")
+            end = np.searchsorted(self._sorted_dates, np.datetime64(pd.Timestamp(date_range[1])), side="right")
+            positions = narrow(positions, np.sort(self._date_order[start:end]))
+
+        if positions is None:
+            positions = np.arange(self.size)
+
+        query = company_query.strip().lower()
+        if query:
+            # Only the rows left after the cheaper filters are scanned
+            names = self._companies[positions]
+            positions = positions[[query in name for name in names]]
+
+        return positions
+
+    @staticmethod
+    def _union(groups: dict, values: list) -> np.ndarray:
+        arrays = [groups[value] for value in values if value in groups]
+        if not arrays:
+            return np.array([], dtype=int)
+        return np.sort(np.concatenate(arrays))
+
+    def page(self, positions: np.ndarray, page: int, per_page: int = PAGE_SIZE):
+        """
+        Returns (index labels of the page, number of pages). Page numbers start at 0.
+        """
+        pages = max(1, -(-len(positions) // per_page))
+        page = min(max(page, 0), pages - 1)
+        return self.labels[positions[page * per_page:(page + 1) * per_page]], pages
+
+
+@st.cache_resource(max_entries=4)
+def get_tracker_index(filepath: str, version: str, _df: pd.DataFrame) -> TrackerIndex:
+    """
+    Returns the TrackerIndex of a tracker file, built once per file version.
+    """
+    return TrackerIndex(_df)
@@ -0,0 +1,95 @@
+import os
+import re
+import pandas as pd
+from utils.helpers import local_cache_path
+
+try:
+    import pyarrow as pa
+except ImportError:  # snapshots are an optimization, the app works without them
+    pa = None
+
+
+def snapshot_path(filepath: str, sheet_name=0) -> str:
+    """
+    Returns the local Arrow IPC snapshot path for an Excel file in OneDrive.
+    """
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{filepath}__{sheet_name}")
+    return local_cache_path("snapshots", f"{safe_name}.arrow")
+
+
+def load_snapshot(filepath: str, sheet_name, version):
+    """
+    Loads the memory-mapped snapshot of an Excel file if it was written for the given version.
+
+    Returns:
+    - pd.DataFrame, or None if there is no snapshot for this version
+    """
+    if pa is None or not version:
+        return None
+
+    path = snapshot_path(filepath, sheet_name)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with pa.memory_map(path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            metadata = reader.schema.metadata or {}
+            if metadata.get(b"version", b"").decode("utf-8") != version:
+                return None
+            df = reader.read_all().to_pandas()
+    except (OSError, pa.ArrowException):
+        return None
+
+    df.attrs["version"] = version
+    return df
+
+
+def save_snapshot(filepath: str, sheet_name, version, df: pd.DataFrame):
+    """
+    Writes an uncompressed Arrow IPC snapshot of the DataFrame, tagged with the file version.
+    Failures are ignored since the snapshot is only a cache.
+    """
+    if pa is None or not version:
+        return
+
+    path = snapshot_path(filepath, sheet_name)
+    tmp_path = f"{path}.tmp"
+    try:
+        table = pa.Table.from_pandas(_arrow_safe(df), preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), "version": version})
+
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    except (OSError, pa.ArrowException):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def delete_snapshots(filepath: str):
+    """
+    Removes the snapshots of every sheet of a file, e.g. after a write whose new cTag may lag behind.
+    """
+    prefix = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{filepath}__")
+    folder = os.path.dirname(snapshot_path(filepath))
+    for file_name in os.listdir(folder):
+        if file_name.startswith(prefix):
+            try:
+                os.remove(os.path.join(folder, file_name))
+            except OSError:
+                pass  # Another session removed it first
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Excel columns can mix numbers and text (e.g. numeric-looking IDs); store those as text.
+    """
+    df = df.copy()
+    for col in df.columns[df.dtypes == object]:
+        try:
+            pa.array(df[col], from_pandas=True)
+        except pa.ArrowException:
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
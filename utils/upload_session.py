@@ -0,0 +1,160 @@
+import io
+import requests
+from utils.graph_client import get_graph_client, LONG_TIMEOUT
+from utils.storage import WriteConflict
+from utils.tracing import traced
+
+# Files above this size go through an upload session instead of a simple PUT
+UPLOAD_SESSION_THRESHOLD = 4 * 1024 * 1024
+
+# Graph requires chunk sizes that are a multiple of 320 KiB
+CHUNK_SIZE = 10 * 320 * 1024
+MAX_CHUNK_RETRIES = 3
+
+
+@traced()
+def upload_file(access_token, filepath: str, stream, content_type: str, progress_callback=None, if_match=None):
+    """
+    Uploads a file-like object to OneDrive without copying the whole buffer.
+
+    Small files are sent with one streaming PUT, larger ones with a resumable upload session
+    in fixed-size chunks.
+
+    Parameters:
+    - access_token: Microsoft Graph token
+    - filepath: OneDrive relative path of the target file
+    - stream: seekable binary file-like object (BytesIO, SpooledTemporaryFile, open file...)
+    - content_type: MIME type, used for the simple PUT
+    - progress_callback: optional callable(bytes_sent, total_bytes)
+    - if_match: eTag the file must still have, else WriteConflict is raised
+    """
+    total = _stream_size(stream)
+
+    if total <= UPLOAD_SESSION_THRESHOLD:
+        _simple_upload(access_token, filepath, stream, content_type, total, if_match)
+    else:
+        _session_upload(access_token, filepath, stream, total, progress_callback, if_match)
+
+    if progress_callback:
+        progress_callback(total, total)
+
+
+def _stream_size(stream) -> int:
+    position = stream.tell()
+    stream.seek(0, io.SEEK_END)
+    size = stream.tell() - position
+    stream.seek(position)
+    return size
+
+
+def _read_chunk(stream, start: int, length: int):
+    """
+    Returns bytes [start, start + length) relative to the stream's start position.
+    BytesIO buffers are sliced through a memoryview, so no copy is made.
+    """
+    if isinstance(stream, io.BytesIO):
+        return stream.getbuffer()[start:start + length]
+    stream.seek(start)
+    return stream.read(length)
+
+
+def _simple_upload(access_token, filepath, stream, content_type, total, if_match=None):
+    client = get_graph_client()
+    url = client.drive_url(filepath, "/content")
+    headers = {"Content-Type": content_type, "Content-Length": str(total)}
+    if if_match:
+        headers["If-Match"] = if_match
+
+    # requests streams file-like bodies instead of reading them into one bytes object
+    try:
+        response = client.put(
+            url,
+            access_token,
+            headers=headers,
+            data=stream,
+            timeout=LONG_TIMEOUT
+        )
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"🔌 Network error while uploading {filepath}: {e}")
+
+    if response.status_code == 412:
+        raise WriteConflict(f"❌ {filepath} was changed by someone else.")
+    if response.status_code not in [200, 201]:
+        raise Exception(f"❌ Failed to upload {filepath}: {response.status_code} - {response.text}")
+
+
+def _session_upload(access_token, filepath, stream, total, progress_callback, if_match=None):
+    client = get_graph_client()
+
+    session_url = client.drive_url(filepath, "/createUploadSession")
+    try:
+        session_resp = client.post(
+            session_url,
+            access_token,
+            headers={"If-Match": if_match} if if_match else None,
+            json={"item": {"@microsoft.graph.conflictBehavior": "replace"}}
+        )
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"🔌 Network error while creating upload session: {e}")
+
+    if session_resp.status_code == 412:
+        raise WriteConflict(f"❌ {filepath} was changed by someone else.")
+    if session_resp.status_code != 200:
+        raise Exception(f"❌ Failed to create upload session: {session_resp.status_code} - {session_resp.text}")
+
+    # The upload URL is pre-authenticated, so no token is sent with the chunks
+    upload_url = session_resp.json()["uploadUrl"]
+    base = stream.tell()
+    offset = 0
+    failures = 0
+
+    while offset < total:
+        length = min(CHUNK_SIZE, total - offset)
+        chunk = _read_chunk(stream, base + offset, length)
+        headers = {
+            "Content-Length": str(length),
+            "Content-Range": f"bytes {offset}-{offset + length - 1}/{total}",
+        }
+
+        try:
+            resp = client.put(upload_url, headers=headers, data=chunk, timeout=LONG_TIMEOUT)
+        except requests.exceptions.RequestException:
+            resp = None
+
+        if resp is not None and resp.status_code in [200, 201]:
+            return  # Last chunk: the item was created
+        if resp is not None and resp.status_code == 202:
+            offset = _next_expected_offset(resp.json(), offset + length)
+            failures = 0
+            if progress_callback:
+                progress_callback(offset, total)
+            continue
+
+        # Chunk failed: ask the session where to resume
+        failures += 1
+        if failures > MAX_CHUNK_RETRIES:
+            try:
+                client.delete(upload_url)
+            except requests.exceptions.RequestException:
+                pass
+            detail = f"{resp.status_code} - {resp.text}" if resp is not None else "network error"
+            raise Exception(f"❌ Failed to upload {filepath} after {MAX_CHUNK_RETRIES} retries: {detail}")
+        offset = _resume_offset(upload_url, offset)
+
+
+def _next_expected_offset(session: dict, default: int) -> int:
+    ranges = session.get("nextExpectedRanges") or []
+    if not ranges:
+        return default
+    return int(ranges[0].split("-")[0])
+
+
+def _resume_offset(upload_url, offset: int) -> int:
+    client = get_graph_client()
+    try:
+        status_resp = client.get(upload_url)
+    except requests.exceptions.RequestException:
+        return offset
+    if status_resp.status_code != 200:
+        return offset
+    return _next_expected_offset(status_resp.json(), offset)
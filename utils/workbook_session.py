@@ -0,0 +1,132 @@
+import threading
+import time
+import requests
+import streamlit as st
+from utils.graph_client import get_graph_client
+
+# Persistent workbook sessions expire after about 5 minutes of inactivity
+SESSION_REFRESH_AFTER = 120   # idle seconds after which the session is refreshed before use
+SESSION_EXPIRE_AFTER = 280    # idle seconds after which the session is assumed gone and recreated
+
+
+class WorkbookSessionManager:
+    """
+    Keeps one persistent workbook session per Excel file and reuses it across appends and updates.
+
+    Sessions idle for a while are refreshed before use, sessions idle for too long are recreated,
+    and a request that fails because the server expired the session is retried once on a new session.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._file_locks = {}
+        self._sessions = {}
+
+    def _file_lock(self, filepath):
+        with self._lock:
+            return self._file_locks.setdefault(filepath, threading.Lock())
+
+    def _create_session(self, access_token, filepath):
+        client = get_graph_client()
+        try:
+            resp = client.post(
+                client.drive_url(filepath, "/workbook/createSession"),
+                access_token,
+                json={"persistChanges": True}
+            )
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"🔌 Network error while creating session: {e}")
+
+        if resp.status_code != 201:
+            raise Exception(f"❌ Failed to create Excel session: {resp.status_code} - {resp.text}")
+
+        session = {"id": resp.json()["id"], "last_used": time.time()}
+        self._sessions[filepath] = session
+        return session["id"]
+
+    def _refresh_session(self, access_token, filepath, session) -> bool:
+        client = get_graph_client()
+        try:
+            resp = client.post(
+                client.drive_url(filepath, "/workbook/refreshSession"),
+                access_token,
+                headers={"workbook-session-id": session["id"]}
+            )
+        except requests.exceptions.RequestException:
+            return False
+        return resp.status_code in [200, 204]
+
+    def session_id(self, access_token, filepath, renew=False):
+        """
+        Returns a live session id for the workbook, creating or refreshing the session as needed.
+        """
+        with self._file_lock(filepath):
+            session = self._sessions.get(filepath)
+            if session and not renew:
+                idle = time.time() - session["last_used"]
+                if idle < SESSION_REFRESH_AFTER:
+                    return session["id"]
+                if idle < SESSION_EXPIRE_AFTER and self._refresh_session(access_token, filepath, session):
+                    session["last_used"] = time.time()
+                    return session["id"]
+            return self._create_session(access_token, filepath)
+
+    def request(self, access_token, filepath, method, workbook_path, **kwargs):
+        """
+        Sends a workbook API request inside the file's persistent session.
+
+        Parameters:
+        - access_token: Microsoft Graph token
+        - filepath: path of the Excel file in OneDrive
+        - method: HTTP method
+        - workbook_path: path below /workbook, e.g. "/tables/JobTable/rows/add"
+        """
+        client = get_graph_client()
+        url = client.drive_url(filepath, f"/workbook{workbook_path}")
+        headers = kwargs.pop("headers", {})
+
+        session_id = self.session_id(access_token, filepath)
+        resp = client.request(method, url, access_token, headers={**headers, "workbook-session-id": session_id}, **kwargs)
+
+        if _is_session_error(resp):
+            # The server dropped the session: start a new one and retry once
+            session_id = self.session_id(access_token, filepath, renew=True)
+            resp = client.request(method, url, access_token, headers={**headers, "workbook-session-id": session_id}, **kwargs)
+
+        session = self._sessions.get(filepath)
+        if session and session["id"] == session_id:
+            session["last_used"] = time.time()
+        return resp
+
+    def close(self, access_token, filepath):
+        session = self._sessions.pop(filepath, None)
+        if not session:
+            return
+        client = get_graph_client()
+        try:
+            client.post(
+                client.drive_url(filepath, "/workbook/closeSession"),
+                access_token,
+                headers={"workbook-session-id": session["id"]},
+                timeout=5
+            )
+        except requests.exceptions.RequestException:
+            pass  # Excel will auto-close it eventually
+
+
+def _is_session_error(resp) -> bool:
+    if resp.status_code not in [400, 404, 409, 410, 440]:
+        return False
+    try:
+        code = resp.json().get("error", {}).get("code", "")
+    except ValueError:
+        return False
+    return "session" in code.lower()
+
+
+@st.cache_resource
+def get_workbook_sessions() -> WorkbookSessionManager:
+    """
+    Returns the process-wide workbook session manager.
+    """
+    return WorkbookSessionManager()
@@ -0,0 +1,476 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+import requests
+import streamlit as st
+from utils.helpers import local_cache_path
+from utils.rate_limit import RetryPolicy
+from utils.storage import is_graph_storage
+from utils.tracing import trace_span
+
+# Background threads draining the queue; jobs of the same lane never run concurrently
+WRITE_WORKERS = int(os.environ.get("JOBSTREAMLIT_WRITE_WORKERS", "4"))
+
+# Failures (other than network errors) before a job is parked for the user to retry or discard
+MAX_WRITE_ATTEMPTS = 5
+
+# Seconds between polls of the status indicator
+STATUS_POLL_SECONDS = 2
+
+# Backoff between attempts; network errors are retried until the connection is back
+RETRY_POLICY = RetryPolicy(base_delay=2.0, max_delay=60.0)
+
+# kind -> (handler(access_token, job, stream, progress_callback), merge(old data, new data) or None)
+WRITE_HANDLERS = {}
+
+
+def write_handler(kind, merge=None):
+    """
+    Registers the function that performs queued jobs of a kind. With merge, a new job
+    coalesced into a queued one combines both payloads instead of replacing the old one.
+    """
+    def decorator(func):
+        WRITE_HANDLERS[kind] = (func, merge)
+        return func
+    return decorator
+
+
+class WriteQueue:
+    """
+    Durable write-behind queue: pages enqueue writes and return, a worker pool performs them.
+
+    Every job is a JSON file under jobs/ (file contents go to blobs/), written with fsync +
+    rename before enqueue returns, and removed only after the write succeeded, so queued writes
+    survive restarts and are replayed on the next start.
+
+    Jobs run in enqueue order within their lane (by default the target path), lanes run in
+    parallel. A new job for the same kind and path as a job that is still waiting in the lane
+    replaces it, so repeated saves of a file upload only the latest version: in place when it is
+    the last job of the lane, otherwise moved to the end of the lane, behind the jobs queued after it.
+    A job that keeps failing stays at the head of its lane until it is retried or discarded.
+    """
+
+    def __init__(self, directory: str, workers=WRITE_WORKERS, token_source=None):
+        self.jobs_dir = os.path.join(directory, "jobs")
+        self.blobs_dir = os.path.join(directory, "blobs")
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        os.makedirs(self.blobs_dir, exist_ok=True)
+
+        self.token_source = token_source
+        self.last_saved_at = None
+        self._access_token = None
+        self._cond = threading.Condition()
+        self._jobs = {}       # job id -> job, in enqueue order
+        self._in_flight = {}  # lane -> job id
+        self._progress = {}   # job id -> (bytes sent, total bytes) of running uploads
+        self._next_id = 1
+        self._stopping = False
+        self._load()
+
+        self._workers = [
+            threading.Thread(target=self._work, name=f"write-queue-{i}", daemon=True) for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    # --- Journal ---
+
+    def _load(self):
+        for file_name in sorted(os.listdir(self.jobs_dir)):
+            if not file_name.endswith(".json"):
+                continue  # Leftover .tmp from a crash mid-write
+            try:
+                with open(os.path.join(self.jobs_dir, file_name), "r", encoding="utf-8") as f:
+                    job = json.load(f)
+            except ValueError:
+                continue
+            self._jobs[job["id"]] = job
+        if self._jobs:
+            self._next_id = max(self._jobs) + 1
+
+        # Blobs of jobs that never made it to disk
+        referenced = {job["blob"] for job in self._jobs.values()}
+        for file_name in os.listdir(self.blobs_dir):
+            if file_name not in referenced:
+                os.remove(os.path.join(self.blobs_dir, file_name))
+
+    def _job_path(self, job_id) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id:012d}.json")
+
+    def _save(self, job):
+        tmp_path = f"{self._job_path(job['id'])}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._job_path(job["id"]))
+
+    def _remove(self, job):
+        self._jobs.pop(job["id"], None)
+        if os.path.exists(self._job_path(job["id"])):
+            os.remove(self._job_path(job["id"]))
+        self._remove_blob(job.get("blob"))
+
+    def _write_blob(self, stream) -> str:
+        blob = f"{uuid.uuid4().hex}.bin"
+        tmp_path = os.path.join(self.blobs_dir, f"{blob}.tmp")
+        stream.seek(0)
+        with open(tmp_path, "wb") as f:
+            shutil.copyfileobj(stream, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.blobs_dir, blob))
+        return blob
+
+    def _remove_blob(self, blob):
+        if blob and os.path.exists(os.path.join(self.blobs_dir, blob)):
+            os.remove(os.path.join(self.blobs_dir, blob))
+
+    # --- Producers ---
+
+    def enqueue(self, kind: str, path: str, data=None, stream=None, content_type=None, lane=None,
+                delay=0.0, access_token=None) -> int:
+        """
+        Queues a write and returns its job id once it is on disk.
+
+        Parameters:
+        - kind: registered handler (see write_handler)
+        - path: file the job writes, also the coalescing key
+        - data: JSON-serializable payload for the handler
+        - stream: seekable binary content, copied into the queue before returning
+        - lane: jobs sharing a lane run one after another (default: path)
+        - delay: seconds to wait before the job may run, restarted when a new job is coalesced into it
+        - access_token: used by the workers when no token provider is available
+        """
+        if kind not in WRITE_HANDLERS:
+            raise Exception(f"❌ Unknown write kind '{kind}'.")
+        lane = lane or path
+        data = json.loads(json.dumps(data))  # The form it will have after a restart (e.g. str keys)
+        blob = self._write_blob(stream) if stream is not None else None
+
+        with self._cond:
+            if access_token:
+                self._access_token = access_token
+
+            lane_jobs = [queued for queued in self._jobs.values() if queued["lane"] == lane]
+            job = next((
+                queued for queued in reversed(lane_jobs)
+                if queued["kind"] == kind and queued["path"] == path
+                and self._in_flight.get(lane) != queued["id"]
+            ), None)
+
+            if job is not None:
+                merge = WRITE_HANDLERS[kind][1]
+                old_blob = job["blob"]
+                old_id = job["id"]
+                job.update(
+                    data=merge(job["data"], data) if merge and job["data"] is not None else data,
+                    blob=blob,
+                    content_type=content_type,
+                    not_before=time.time() + delay,
+                    attempts=0, retries=0, retry_at=0.0, error=None, failed=False,
+                )
+                if job is not lane_jobs[-1]:
+                    # Jobs queued after it may depend on the old content (e.g. a PDF of this DOCX),
+                    # so the merged job moves behind them instead of jumping ahead
+                    del self._jobs[old_id]
+                    job["id"] = self._next_id
+                    self._next_id += 1
+                    self._jobs[job["id"]] = job
+                self._save(job)
+                if job["id"] != old_id and os.path.exists(self._job_path(old_id)):
+                    os.remove(self._job_path(old_id))
+                self._remove_blob(old_blob)
+            else:
+                job = {
+                    "id": self._next_id,
+                    "kind": kind,
+                    "path": path,
+                    "lane": lane,
+                    "data": data,
+                    "blob": blob,
+                    "content_type": content_type,
+                    "created_at": time.time(),
+                    "not_before": time.time() + delay,
+                    "attempts": 0,
+                    "retries": 0,
+                    "retry_at": 0.0,
+                    "error": None,
+                    "failed": False,
+                }
+                self._next_id += 1
+                self._jobs[job["id"]] = job
+                self._save(job)
+
+            self._cond.notify_all()
+            return job["id"]
+
+    def enqueue_upload(self, path: str, stream, content_type: str, lane=None, access_token=None) -> int:
+        return self.enqueue("upload", path, stream=stream, content_type=content_type, lane=lane, access_token=access_token)
+
+    def find(self, kind: str, path: str):
+        """
+        Returns the payload of the newest queued job for kind and path, or None.
+        Lets readers see writes that are not on the drive yet.
+        """
+        with self._cond:
+            for job in reversed(list(self._jobs.values())):
+                if job["kind"] == kind and job["path"] == path:
+                    return json.loads(json.dumps(job["data"]))
+        return None
+
+    # --- Status and control ---
+
+    def status(self) -> dict:
+        with self._cond:
+            jobs = list(self._jobs.values())
+            running = len(self._in_flight)
+            uploads = [
+                {"path": self._jobs[job_id]["path"], "sent": sent, "total": total}
+                for job_id, (sent, total) in self._progress.items() if job_id in self._jobs
+            ]
+        failed = [job for job in jobs if job["failed"]]
+        retrying = [job for job in jobs if job["error"] and not job["failed"]]
+        return {
+            "pending": len(jobs) - len(failed),
+            "running": running,
+            "uploads": uploads,
+            "failed": [{"id": job["id"], "path": job["path"], "error": job["error"]} for job in failed],
+            "retrying": len(retrying),
+            "last_error": retrying[-1]["error"] if retrying else None,
+            "last_saved_at": self.last_saved_at,
+        }
+
+    def retry_failed(self):
+        with self._cond:
+            for job in self._jobs.values():
+                if job["failed"]:
+                    job.update(attempts=0, retries=0, retry_at=0.0, failed=False)
+                    self._save(job)
+            self._cond.notify_all()
+
+    def discard_failed(self):
+        with self._cond:
+            for job in [job for job in self._jobs.values() if job["failed"]]:
+                self._remove(job)
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout=None) -> bool:
+        """
+        Blocks until nothing is queued or running, except failed jobs and the jobs waiting behind
+        them in their lanes. Returns False on timeout.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._in_flight or self._has_runnable_jobs():
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(timeout=remaining if remaining is not None else 1.0)
+        return True
+
+    def _has_runnable_jobs(self) -> bool:
+        heads = {}
+        for job in self._jobs.values():
+            heads.setdefault(job["lane"], job)
+        return any(not head["failed"] for head in heads.values())
+
+    # --- Workers ---
+
+    def _next_job(self, now):
+        """
+        Returns (head job of a free lane that is due, None) or (None, earliest time something becomes due).
+        """
+        seen_lanes = set(self._in_flight)
+        wake_at = None
+        for job in self._jobs.values():
+            if job["lane"] in seen_lanes:
+                continue
+            seen_lanes.add(job["lane"])  # Only the oldest job of a lane may run
+
+            if job["failed"]:
+                continue
+            due_at = max(job["not_before"], job["retry_at"])
+            if due_at <= now:
+                return job, None
+            wake_at = due_at if wake_at is None else min(wake_at, due_at)
+        return None, wake_at
+
+    def stop(self, timeout=None):
+        """
+        Stops the workers once their running jobs are done. Queued jobs stay on disk for the next start.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopping:
+                        return
+                    job, wake_at = self._next_job(time.time())
+                    if job is not None:
+                        self._in_flight[job["lane"]] = job["id"]
+                        break
+                    self._cond.wait(timeout=None if wake_at is None else max(0.05, wake_at - time.time()))
+            self._run(job)
+
+    def _token(self):
+        token = self.token_source() if self.token_source else None
+        return token or self._access_token
+
+    def _run(self, job):
+        handler = WRITE_HANDLERS[job["kind"]][0]
+        error = None
+        network_error = False
+
+        def progress_callback(sent, total):
+            with self._cond:
+                self._progress[job["id"]] = (sent, total)
+        try:
+            access_token = self._token()
+            if access_token is None and is_graph_storage():
+                network_error = True  # Not a failure of the job: retried once someone signs in
+                raise Exception("🔒 Waiting for sign-in to save queued changes.")
+
+            # The span records a failure with its error; the job keeps it for render_write_status
+            with trace_span(f"write_queue:{job['kind']}", kind="queue", path=job["path"], attempt=job["retries"] + 1):
+                if job["blob"]:
+                    with open(os.path.join(self.blobs_dir, job["blob"]), "rb") as stream:
+                        handler(access_token, job, stream, progress_callback)
+                else:
+                    handler(access_token, job, None, progress_callback)
+        except Exception as e:
+            error = e
+            network_error = network_error or _is_network_error(e)
+
+        with self._cond:
+            self._in_flight.pop(job["lane"], None)
+            self._progress.pop(job["id"], None)
+            if error is None:
+                self._remove(job)
+                self.last_saved_at = time.time()
+            else:
+                if not network_error:
+                    job["attempts"] += 1
+                job["error"] = str(error)
+                job["failed"] = job["attempts"] >= MAX_WRITE_ATTEMPTS
+                job["retry_at"] = time.time() + RETRY_POLICY.backoff(job["retries"])
+                job["retries"] += 1
+                self._save(job)
+            self._cond.notify_all()
+
+
+def _is_network_error(error) -> bool:
+    """
+    True if a connection error or timeout caused the error (the helpers wrap them in plain Exceptions).
+    """
+    while error is not None:
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+@st.cache_resource
+def get_write_queue() -> WriteQueue:
+    """
+    Returns the process-wide write queue. Creating it replays jobs left by a previous run.
+    """
+    from utils.auth import get_background_token  # auth pulls in MSAL, only needed once a queue exists
+    return WriteQueue(os.path.dirname(local_cache_path("write_queue", "jobs")), token_source=get_background_token)
+
+
+@st.fragment(run_every=STATUS_POLL_SECONDS)
+def render_write_status():
+    """
+    Sidebar indicator of queued writes, polled every STATUS_POLL_SECONDS without rerunning the page.
+    Reruns the whole page once the queue drains, so it shows the new file versions.
+    """
+    queue = get_write_queue()
+    status = queue.status()
+
+    if status["failed"]:
+        st.error(f"❌ {len(status['failed'])} change(s) could not be saved: {status['failed'][0]['error']}")
+        for failed in status["failed"]:
+            st.caption(f"`{failed['path']}`")
+        col1, col2 = st.columns(2)
+        if col1.button("🔁 Retry", key="write_queue_retry"):
+            queue.retry_failed()
+            st.rerun(scope="fragment")
+        if col2.button("🗑️ Discard", key="write_queue_discard"):
+            queue.discard_failed()
+            st.rerun(scope="fragment")
+    elif status["retrying"]:
+        st.warning(f"🔌 {status['pending']} change(s) queued, retrying: {status['last_error']}")
+    elif status["pending"]:
+        st.info(f"⏳ Saving {status['pending']} change(s) in the background...")
+        for upload in status["uploads"]:
+            sent, total = upload["sent"], upload["total"]
+            st.progress(
+                sent / total if total else 1.0,
+                text=f"⬆️ {upload['path'].split('/')[-1]}: {sent // 1024} / {total // 1024} KB"
+            )
+    elif status["last_saved_at"]:
+        st.caption(f"✅ All changes saved ({time.strftime('%H:%M:%S', time.localtime(status['last_saved_at']))})")
+
+    was_pending = st.session_state.get("write_queue_pending", 0)
+    st.session_state["write_queue_pending"] = status["pending"]
+    if was_pending and not status["pending"] and not status["failed"]:
+        st.rerun()
+
+
+# --- Handlers (imported lazily: these modules import the queue to enqueue) ---
+
+@write_handler("upload")
+def _upload(access_token, job, stream, progress_callback):
+    from utils.storage import get_storage
+    get_storage().write(access_token, job["path"], stream, job["content_type"], progress_callback)
+
+
+@write_handler("json")
+def _upload_json(access_token, job, stream, progress_callback):
+    from utils.helpers import upload_json_to_onedrive
+    upload_json_to_onedrive(access_token, job["data"], job["path"], progress_callback)
+
+
+@write_handler("pdf")
+def _convert_to_pdf(access_token, job, stream, progress_callback):
+    from utils.doc_helpers import download_docx_as_pdf
+    download_docx_as_pdf(access_token, job["data"]["source"], job["path"], progress_callback)
+
+
+@write_handler("render_manifest")
+def _save_render_manifest(access_token, job, stream, progress_callback):
+    from utils.render_manifest import save_render_manifest
+    save_render_manifest(access_token, job["data"]["target_folder"], job["data"]["manifest"])
+
+
+def _merge_row_changes(old, new):
+    changes = {row_id: dict(row) for row_id, row in old["changes"].items()}
+    for row_id, row in new["changes"].items():
+        changes.setdefault(row_id, {}).update(row)
+    return {**new, "changes": changes}
+
+
+@write_handler("update_rows", merge=_merge_row_changes)
+def _update_rows(access_token, job, stream, progress_callback):
+    from utils.onedrive import update_excel_rows
+    # Keyed by row ID: the rows are looked up in the file right before writing
+    update_excel_rows(
+        access_token, job["data"]["changes"], filepath=job["path"],
+        table_name=job["data"]["table_name"], key_column=job["data"]["key_column"]
+    )
+
+
+@write_handler("merge_bullets")
+def _merge_bullets(access_token, job, stream, progress_callback):
+    from utils.bullet_journal import get_bullet_journal
+    get_bullet_journal().flush(access_token, job["path"])